@@ -0,0 +1,301 @@
+"""Throughput/latency benchmark for the SSO endpoints
+
+Boots the app in-process against SQLite (aiosqlite) and fakeredis, seeds
+a directory of the requested size and drives each scenario through the
+ASGI stack with httpx. Results are written as JSON so runs on different
+commits can be compared:
+
+    pip install aiosqlite "fakeredis[lua]"
+    python -m benchmarks.sso --users 1000,10000 --output before.json
+    python -m benchmarks.sso --users 1000,10000 --compare before.json
+
+Absolute numbers are not Postgres/Redis numbers; use them to compare
+commits on the same machine, not to size production.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# Must be set before anything reads settings
+BENCH_DB = os.path.join(tempfile.gettempdir(), "sso_bench.db")
+os.environ.update({
+    "ENVIRONMENT": "test",
+    "DEBUG": "false",
+    "DATABASE_URL": f"sqlite+aiosqlite:///{BENCH_DB}",
+    "REDIS_URL": "redis://bench:6379/0",
+    "JWT_SECRET_KEY": "benchmark-secret",
+    "GOOGLE_CLIENT_ID": "bench",
+    "GOOGLE_CLIENT_SECRET": "bench",
+    "GOOGLE_REDIRECT_URI": "http://bench/auth/callback",
+    "RATE_LIMIT_ENABLED": "false",
+    "METRICS_ENABLED": "false",
+    "WARMUP_ENABLED": "false",
+})
+
+import httpx
+from fakeredis import aioredis as fakeredis
+from sqlalchemy import insert
+from sqlmodel import SQLModel
+
+import src.core.redis as redis_module
+from src.auth.jwt import JWTHandler
+from src.core.database import get_engine, get_session, close_db
+from src.core.query_counter import count_queries, install
+from src.models import Role, Unit, User, UserRole
+from src.repositories.user import UserRepository
+from src.services.auth import AuthService
+from src.services.reference_data import reference_data
+from src.services.token import TokenBlacklistService
+
+ROLES = 20
+UNITS = 50
+
+class Bench:
+    def __init__(self, client: httpx.AsyncClient, redis_client, users: int) -> None:
+        self.client = client
+        self.redis = redis_client
+        self.users = users
+        self.access_token = ""
+        self.headers: Dict[str, str] = {}
+        self.refresh_tokens: List[str] = []
+
+    async def setup(self, concurrency: int) -> None:
+        async with get_session() as session:
+            admin = await UserRepository(session).get_by_id(1)
+            auth_service = AuthService(session, self.redis)
+            tokens = await auth_service.create_tokens(admin)
+            # One refresh family per worker; rotation makes each token single-use
+            self.refresh_tokens = [
+                (await auth_service.create_tokens(admin)).refresh_token
+                for _ in range(concurrency)
+            ]
+        self.access_token = tokens.access_token
+        self.headers = {"Authorization": f"Bearer {tokens.access_token}"}
+
+    async def token_verify(self, worker: int) -> int:
+        # What a resource server does per request: signature check + revocation check
+        JWTHandler.decode_token(self.access_token)
+        await TokenBlacklistService(self.redis).is_blacklisted(self.access_token)
+        return 200
+
+    async def me(self, worker: int) -> int:
+        response = await self.client.get("/auth/me", headers=self.headers)
+        return response.status_code
+
+    async def refresh(self, worker: int) -> int:
+        response = await self.client.post(
+            "/auth/refresh",
+            params={"refresh_token": self.refresh_tokens[worker]}
+        )
+        if response.status_code == 200:
+            self.refresh_tokens[worker] = response.json()["refresh_token"]
+        return response.status_code
+
+    async def list_users(self, worker: int) -> int:
+        response = await self.client.get("/api/users/", headers=self.headers)
+        return response.status_code
+
+    async def get_user(self, worker: int) -> int:
+        user_id = random.randint(1, self.users)
+        response = await self.client.get(f"/api/users/{user_id}", headers=self.headers)
+        return response.status_code
+
+    async def bulk_role_update(self, worker: int) -> int:
+        user_id = random.randint(2, self.users)
+        roles = random.sample(range(1, ROLES + 1), k=5)
+        response = await self.client.put(
+            f"/api/users/{user_id}",
+            json={"roles": roles},
+            headers=self.headers
+        )
+        return response.status_code
+
+    async def mixed(self, worker: int) -> int:
+        # Roughly the production shape: mostly verification, some refreshes
+        scenario = random.choices(
+            [self.token_verify, self.me, self.refresh, self.bulk_role_update],
+            weights=[70, 20, 8, 2]
+        )[0]
+        return await scenario(worker)
+
+SCENARIOS = ["token_verify", "me", "refresh", "list_users", "get_user", "bulk_role_update", "mixed"]
+# Listing every user is O(users) per request; keep its request count sane
+REQUESTS_OVERRIDE = {"list_users": 20}
+
+async def reset_database(users: int) -> None:
+    await close_db()
+    if os.path.exists(BENCH_DB):
+        os.remove(BENCH_DB)
+
+    now = datetime.now(timezone.utc)
+    stamps = {"created_at": now, "updated_at": now}
+    async with get_engine().begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.execute(insert(Unit), [
+            {"name": f"Unit {i}", "code": f"U{i:03d}", "path": f"/{i}/", **stamps} for i in range(1, UNITS + 1)
+        ])
+        await conn.execute(insert(Role), [
+            {"name": f"role-{i}", **stamps} for i in range(1, ROLES + 1)
+        ])
+        await conn.execute(insert(User), [
+            {
+                "email": f"user{i}@example.com",
+                "first_name": "User",
+                "last_name": str(i),
+                "is_active": True,
+                "is_superuser": i == 1,
+                "unit_id": (i % UNITS) + 1,
+                **stamps,
+            }
+            for i in range(1, users + 1)
+        ])
+        await conn.execute(insert(UserRole), [
+            {"user_id": i, "role_id": (i % ROLES) + 1} for i in range(1, users + 1)
+        ])
+
+    # Seeded behind the repositories' backs, so no invalidation was published
+    await reference_data.reload()
+
+async def run_scenario(
+    call: Callable[[int], Awaitable[int]],
+    requests: int,
+    concurrency: int
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker(index: int) -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                status_code = await call(index)
+            except Exception:
+                status_code = 599
+            latencies.append(time.perf_counter() - started)
+            if status_code >= 400:
+                errors += 1
+
+    # Worker tasks copy this context, so they all record into the same stats
+    with count_queries() as stats:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+        "queries_per_request": stats.count / len(latencies),
+        "n_plus_one": stats.n_plus_one(),
+    }
+
+async def run(args: argparse.Namespace) -> Dict:
+    from main import create_app
+
+    app = create_app()
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    results = []
+
+    for users in args.users:
+        await reset_database(users)
+        install(get_engine())
+
+        async with app.router.lifespan_context(app):
+            # Swap in fakeredis after lifespan opened the real (unused) pool
+            redis_module.redis_client = redis_client
+            await redis_client.flushall()
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                bench = Bench(client, redis_client, users)
+                await bench.setup(args.concurrency)
+
+                for name in args.scenarios:
+                    requests = min(args.requests, REQUESTS_OVERRIDE.get(name, args.requests))
+                    result = await run_scenario(getattr(bench, name), requests, args.concurrency)
+                    result.update({"scenario": name, "users": users, "concurrency": args.concurrency})
+                    results.append(result)
+                    print(
+                        f"{name:>18} users={users:<7} {result['throughput_rps']:9.1f} req/s "
+                        f"p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms "
+                        f"p99={result['p99_ms']:.2f}ms q/req={result['queries_per_request']:.1f} "
+                        f"errors={result['errors']}"
+                    )
+
+    await close_db()
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current: Dict, baseline_path: str) -> None:
+    """Print throughput/p99 change against a previous run"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r["scenario"], r["users"]): r for r in baseline["results"]}
+
+    print(f"\nvs {baseline.get('commit')} ({baseline_path})")
+    for result in current["results"]:
+        before = previous.get((result["scenario"], result["users"]))
+        if before is None:
+            continue
+        throughput = (result["throughput_rps"] / before["throughput_rps"] - 1) * 100
+        p99 = (result["p99_ms"] / before["p99_ms"] - 1) * 100
+        print(
+            f"{result['scenario']:>18} users={result['users']:<7} "
+            f"throughput {throughput:+6.1f}%  p99 {p99:+6.1f}%  "
+            f"q/req {before['queries_per_request']:.1f} -> {result['queries_per_request']:.1f}"
+        )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", default="1000", help="Comma-separated directory sizes, e.g. 1000,10000,100000")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Previous JSON result to compare against")
+    args = parser.parse_args()
+    args.users = [int(size) for size in args.users.split(",")]
+    args.scenarios = [name for name in args.scenarios.split(",") if name]
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    result = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        compare(result, args.compare)
+
+if __name__ == "__main__":
+    main()
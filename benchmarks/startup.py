@@ -0,0 +1,73 @@
+"""Worker cold-start benchmark
+
+Starts N fresh interpreters, as uvicorn would for N workers, and reports
+per worker how long `import main` takes and how long the lifespan startup
+takes until the app is ready to serve.
+
+    python -m benchmarks.startup --workers 8 --output startup.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+def measure_worker() -> Dict[str, float]:
+    """Measure one cold start in this process"""
+    started = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+
+    async def run_lifespan() -> float:
+        async with main.app.router.lifespan_context(main.app):
+            return time.perf_counter()
+
+    ready = asyncio.run(run_lifespan())
+    return {
+        "import_seconds": imported - started,
+        "ready_seconds": ready - imported,
+        "total_seconds": ready - started,
+    }
+
+def summarize(samples: List[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    summary = {}
+    for key in ("import_seconds", "ready_seconds", "total_seconds"):
+        values = sorted(sample[key] for sample in samples)
+        summary[key] = {
+            "min": values[0],
+            "median": statistics.median(values),
+            "max": values[-1],
+        }
+    return summary
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure_worker()))
+        return
+
+    # Run workers one at a time so they do not compete for CPU
+    samples = []
+    for _ in range(args.workers):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--worker"],
+            check=True, capture_output=True, text=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    result = {"workers": samples, "summary": summarize(samples)}
+    print(json.dumps(result["summary"], indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Access token size and verification latency per claim profile and format
+
+Builds a user with the requested number of roles in memory, issues an
+access token for every TOKEN_CLAIM_PROFILE x ACCESS_TOKEN_FORMAT pair and
+reports the Authorization header size and the time to resolve the token
+back into claims:
+
+    pip install "fakeredis[lua]"
+    python -m benchmarks.token_profiles --roles 5,50
+    python -m benchmarks.token_profiles --redis-url redis://localhost:6379/15
+
+fakeredis makes reference-token lookups look cheaper than they are; pass
+--redis-url to include a real round trip.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from datetime import timedelta
+from typing import Dict, List
+
+# Must be set before anything reads settings
+os.environ.update({
+    "ENVIRONMENT": "test",
+    "DEBUG": "false",
+    "DATABASE_URL": "sqlite+aiosqlite://",
+    "REDIS_URL": "redis://bench:6379/0",
+    "JWT_SECRET_KEY": "benchmark-secret",
+    "GOOGLE_CLIENT_ID": "bench",
+    "GOOGLE_CLIENT_SECRET": "bench",
+    "GOOGLE_REDIRECT_URI": "http://bench/auth/callback",
+    "METRICS_ENABLED": "false",
+})
+
+from src.auth.jwt import JWTHandler
+from src.auth.permissions import Permission
+from src.core.config import settings
+from src.models import Role, Unit, User
+from src.services.auth import AuthService
+from src.services.token import AccessTokenService, ReferenceTokenService
+
+PROFILES = ("minimal", "standard", "full")
+FORMATS = ("jwt", "reference")
+
+
+def build_user(roles: int) -> User:
+    unit = Unit(id=7, name="Directorate of Operations", code="OPS-07", path="/1/3/7/")
+    user = User(
+        id=42,
+        email="jane.doe@example.com",
+        first_name="Jane",
+        last_name="Doe",
+        google_id="104857600000000000042",
+        is_active=True,
+        is_superuser=False,
+        unit_id=unit.id,
+    )
+    user.unit = unit
+    user.roles = [
+        Role(id=i, name=f"role-{i:03d}", permissions=int(Permission.USERS_READ))
+        for i in range(1, roles + 1)
+    ]
+    return user
+
+
+async def issue(redis_client, claims: Dict, token_format: str) -> str:
+    expires_delta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    if token_format == "reference":
+        return await ReferenceTokenService(redis_client).issue(claims, int(expires_delta.total_seconds()))
+    return JWTHandler.create_token(data=claims, expires_delta=expires_delta)
+
+
+async def measure(redis_client, token: str, iterations: int) -> List[float]:
+    service = AccessTokenService(redis_client)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await service.resolve(token)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def run(args: argparse.Namespace) -> List[Dict]:
+    if args.redis_url:
+        import redis.asyncio as redis
+        redis_client = redis.from_url(args.redis_url, decode_responses=True)
+    else:
+        from fakeredis import aioredis as fakeredis
+        redis_client = fakeredis.FakeRedis(decode_responses=True)
+
+    results = []
+    auth = AuthService(db=None)
+    for roles in (int(n) for n in args.roles.split(",")):
+        user = build_user(roles)
+        for profile in PROFILES:
+            claims = await auth._prepare_token_data(user, profile)
+            for token_format in FORMATS:
+                token = await issue(redis_client, claims, token_format)
+                latencies = sorted(await measure(redis_client, token, args.iterations))
+                result = {
+                    "roles": roles,
+                    "profile": profile,
+                    "format": token_format,
+                    "header_bytes": len(f"Authorization: Bearer {token}"),
+                    "verify_p50_us": round(statistics.median(latencies) * 1e6, 1),
+                    "verify_p99_us": round(latencies[int(len(latencies) * 0.99) - 1] * 1e6, 1),
+                }
+                results.append(result)
+                print(
+                    f"roles={roles:<4} {profile:<9} {token_format:<10} "
+                    f"header={result['header_bytes']:>6}B "
+                    f"p50={result['verify_p50_us']:>8}us p99={result['verify_p99_us']:>8}us"
+                )
+
+    await redis_client.aclose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--roles", default="5,50", help="Comma-separated role counts per user")
+    parser.add_argument("--iterations", type=int, default=2000, help="Resolves per profile/format")
+    parser.add_argument("--redis-url", help="Real Redis for reference tokens instead of fakeredis")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
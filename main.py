@@ -4,14 +4,27 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 
 from src.core.config import settings
-from src.core.database import init_db
+from src.core.database import close_db
 from src.middleware.cors import setup_cors
 from src.core.redis import init_redis_pool, close_redis_connection
+from src.core.http import init_http_client, close_http_client
+from src.core.monitoring import loop_lag_monitor
+from src.core.audit import audit_log
+from src.core.cache import caches
+from src.core.jobs import jobs
+from src.core.warmup import warm_up
+from src.core.tracing import setup_tracing
+from src.services.reference_data import reference_data
 from src.api.auth import router as auth_router
 from src.api.user import router as user_router
 from src.api.unit import router as unit_router
 from src.api.role import router as role_router
+from src.api.admin import router as admin_router
+from src.api.health import router as health_router
+from src.api.metrics import router as metrics_router
 from src.middleware.token_blacklist import TokenBlacklistMiddleware
+from src.middleware.metrics import MetricsMiddleware
+from src.middleware.query_count import QueryCountMiddleware
 
 
 
@@ -20,14 +33,26 @@ async def lifespan(app: FastAPI):
     """
     Handle startup and shutdown events
     """
-    # Initialize connections
-    await init_db()
+    # Initialize connections (schema is managed by Alembic, not here)
     await init_redis_pool()
+    await init_http_client()
+    if settings.WARMUP_ENABLED:
+        await warm_up()
+    loop_lag_monitor.start()
+    audit_log.start()
+    caches.start()
     
     yield
     
-    # Cleanup
+    # Cleanup (audit events are flushed while the database is still open)
+    await loop_lag_monitor.stop()
+    await jobs.stop()
+    await caches.stop()
+    await reference_data.stop()
+    await audit_log.stop()
+    await close_http_client()
     await close_redis_connection()
+    await close_db()
 
 def setup_middleware(app: FastAPI):
     """
@@ -45,10 +70,26 @@ def setup_middleware(app: FastAPI):
         session_cookie="sso_session"
     )
 
+    if settings.QUERY_COUNT_ENABLED:
+        app.middleware("http")(QueryCountMiddleware())
+
+    # Outermost, so latency covers every other middleware
+    if settings.METRICS_ENABLED:
+        app.middleware("http")(MetricsMiddleware())
+
 def setup_routers(app: FastAPI):
     """
     Configure all API routes
     """
+    # Load balancer probes
+    app.include_router(
+        health_router,
+        tags=["Health"]
+    )
+
+    if settings.METRICS_ENABLED:
+        app.include_router(metrics_router)
+
     app.include_router(
         auth_router,
         prefix="/auth",
@@ -76,9 +117,18 @@ def setup_routers(app: FastAPI):
         tags=["Roles"]
     )
 
-def create_app() -> FastAPI:
+    # Maintenance routes (superusers only)
+    app.include_router(
+        admin_router,
+        prefix="/api/admin",
+        tags=["Admin"]
+    )
+
+def create_app(span_exporter=None) -> FastAPI:
     """
     Create FastAPI application with all configurations
+
+    span_exporter enables tracing into the given exporter (for tests)
     """
     app = FastAPI(
         title=settings.PROJECT_NAME,
@@ -92,6 +142,9 @@ def create_app() -> FastAPI:
     
     # Setup routers
     setup_routers(app)
+
+    # Optional tracing (no-op unless TRACING_ENABLED or an exporter is given)
+    setup_tracing(app, span_exporter)
     
     return app
 
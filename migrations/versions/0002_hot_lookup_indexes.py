@@ -0,0 +1,52 @@
+"""indexes for hot lookup columns
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00
+
+Indexes are built CONCURRENTLY so the migration does not lock users or
+user_roles against writes on a large directory. The unique google_id
+index fails if two users already share a google_id; resolve those first.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_google_id",
+            "users",
+            ["google_id"],
+            unique=True,
+            postgresql_where=sa.text("google_id IS NOT NULL"),
+            postgresql_concurrently=True,
+        )
+        op.create_index("ix_users_unit_id", "users", ["unit_id"], postgresql_concurrently=True)
+        op.create_index(
+            "ix_users_email_lower",
+            "users",
+            [sa.text("lower(email)")],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_user_roles_role_id_user_id",
+            "user_roles",
+            ["role_id", "user_id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_roles_role_id_user_id", table_name="user_roles")
+    op.drop_index("ix_users_email_lower", table_name="users")
+    op.drop_index("ix_users_unit_id", table_name="users")
+    op.drop_index("ix_users_google_id", table_name="users")
@@ -0,0 +1,33 @@
+"""unit hierarchy
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00
+
+Existing units become roots: path is backfilled as "/<id>/".
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("units", sa.Column("parent_id", sa.Integer(), sa.ForeignKey("units.id"), nullable=True))
+    op.add_column("units", sa.Column("path", sa.String(collation="C"), nullable=False, server_default=""))
+    op.execute("UPDATE units SET path = '/' || id || '/'")
+    op.alter_column("units", "path", server_default=None)
+    op.create_index("ix_units_parent_id", "units", ["parent_id"])
+    op.create_index("ix_units_path", "units", ["path"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_units_path", table_name="units")
+    op.drop_index("ix_units_parent_id", table_name="units")
+    op.drop_column("units", "path")
+    op.drop_column("units", "parent_id")
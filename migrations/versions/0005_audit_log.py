@@ -0,0 +1,38 @@
+"""audit log
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "audit_logs",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("action", sa.String(), nullable=False),
+        sa.Column("actor_id", sa.Integer(), nullable=True),
+        sa.Column("subject_type", sa.String(), nullable=True),
+        sa.Column("subject_id", sa.String(), nullable=True),
+        sa.Column("ip", sa.String(), nullable=True),
+        sa.Column("details", postgresql.JSONB(), nullable=False),
+    )
+    op.create_index("ix_audit_logs_occurred_at", "audit_logs", ["occurred_at"])
+    op.create_index("ix_audit_logs_subject", "audit_logs", ["subject_type", "subject_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_audit_logs_subject", table_name="audit_logs")
+    op.drop_index("ix_audit_logs_occurred_at", table_name="audit_logs")
+    op.drop_table("audit_logs")
@@ -0,0 +1,35 @@
+"""federated identity links
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 00:00:00
+
+Users of non-Google providers were matched by email on every login and
+have no links yet; each gets one on their next verified login.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_identities",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("provider", sa.String(), nullable=False),
+        sa.Column("subject", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint("provider", "subject", name="uq_user_identities_provider_subject"),
+        sa.UniqueConstraint("user_id", "provider", name="uq_user_identities_user_id_provider"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_identities")
@@ -0,0 +1,60 @@
+"""case-insensitive unique email
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 00:00:00
+
+get_by_email matches lower(email) and expects at most one row, so two
+users whose emails differ only in case made login fail with a 500.
+ix_users_email_lower becomes UNIQUE. The upgrade refuses to run while
+such duplicates exist; merge or rename them first. If the concurrent
+build fails anyway (a duplicate written meanwhile), drop the INVALID
+index it leaves behind before retrying.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _check_duplicates() -> None:
+    if op.get_context().as_sql:
+        # No database to ask; the unique index build fails on duplicates instead
+        return
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT lower(email) FROM users GROUP BY lower(email) HAVING count(*) > 1 LIMIT 10"
+    )).scalars().all()
+    if duplicates:
+        raise RuntimeError(
+            "users differing only in email case must be merged first: " + ", ".join(duplicates)
+        )
+
+
+def upgrade() -> None:
+    _check_duplicates()
+    # DROP/CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_users_email_lower", table_name="users", postgresql_concurrently=True)
+        op.create_index(
+            "ix_users_email_lower",
+            "users",
+            [sa.text("lower(email)")],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_users_email_lower", table_name="users", postgresql_concurrently=True)
+        op.create_index(
+            "ix_users_email_lower",
+            "users",
+            [sa.text("lower(email)")],
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,89 @@
+import json
+from typing import Dict
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+import redis.asyncio as redis
+
+from src.core.audit import audit_log
+from src.core.jobs import jobs
+from src.core.redis import get_redis
+from src.auth.dependencies import get_current_admin_user
+from src.models.user import User
+from src.services.token import TokenBlacklistService
+
+router = APIRouter()
+
+@router.post("/blacklist/count", status_code=status.HTTP_202_ACCEPTED)
+async def count_blacklist(
+    redis_client: redis.Redis = Depends(get_redis),
+    admin: User = Depends(get_current_admin_user)
+) -> Dict:
+    """Count blacklisted tokens in the background"""
+    blacklist = TokenBlacklistService(redis_client)
+    return await jobs.start(redis_client, "blacklist.count", blacklist.count, actor_id=admin.id)
+
+@router.post("/blacklist/clear", status_code=status.HTTP_202_ACCEPTED)
+async def clear_blacklist(
+    redis_client: redis.Redis = Depends(get_redis),
+    admin: User = Depends(get_current_admin_user)
+) -> Dict:
+    """Remove every blacklisted token in the background
+
+    This un-revokes them: every logged-out or revoked token that has not
+    expired yet is accepted again. Audited as "auth.tokens_unrevoked".
+    """
+    blacklist = TokenBlacklistService(redis_client)
+    job = await jobs.start(redis_client, "blacklist.clear", blacklist.clear_blacklist, actor_id=admin.id)
+    await audit_log.record("auth.tokens_unrevoked", actor_id=admin.id, job=job["id"])
+    return job
+
+@router.post("/blacklist/purge/{user_id}", status_code=status.HTTP_202_ACCEPTED)
+async def purge_user_blacklist(
+    user_id: int,
+    redis_client: redis.Redis = Depends(get_redis),
+    admin: User = Depends(get_current_admin_user)
+) -> Dict:
+    """Remove one user's blacklisted tokens in the background
+
+    This un-revokes them: the user's logged-out or revoked tokens that have
+    not expired yet are accepted again. Audited as "auth.tokens_unrevoked".
+    """
+    blacklist = TokenBlacklistService(redis_client)
+    job = await jobs.start(
+        redis_client,
+        "blacklist.purge_user",
+        lambda progress: blacklist.purge_user(user_id, progress),
+        actor_id=admin.id,
+        user_id=user_id
+    )
+    await audit_log.record("auth.tokens_unrevoked", "user", user_id, actor_id=admin.id, job=job["id"])
+    return job
+
+@router.get("/blacklist/export")
+async def export_blacklist(
+    redis_client: redis.Redis = Depends(get_redis),
+    _: User = Depends(get_current_admin_user)
+) -> StreamingResponse:
+    """Stream every blacklisted token as NDJSON ({digest, user_id, ttl} per line)"""
+    blacklist = TokenBlacklistService(redis_client)
+
+    async def lines():
+        async for entry in blacklist.export():
+            yield json.dumps(entry) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    redis_client: redis.Redis = Depends(get_redis),
+    _: User = Depends(get_current_admin_user)
+) -> Dict:
+    """Progress and result of a background job"""
+    job = await jobs.get(redis_client, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
@@ -1,29 +1,52 @@
-from typing import Annotated, Optional
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+import json
+import re
+from typing import Annotated, Any, Dict, List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from redis import Redis
 from sqlmodel.ext.asyncio.session import AsyncSession
 import redis.asyncio as redis
 
 from src.models.user import User
 from src.schemas.user import UserResponse
+from src.core.config import settings
 from src.core.database import get_db
 from src.core.redis import get_redis
 from src.services.auth import AuthService
-from src.schemas.token import TokenResponse, TokenVerifyResponse
+from src.services.introspection import IntrospectionService
+from src.services.revocation import RevocationStreamService
+from src.schemas.token import TokenResponse, TokenVerifyResponse, OAuthUserData, SessionResponse
 from src.auth.security import SecurityService
 from src.auth.oauth import oauth_provider
-from src.auth.dependencies import oauth2_scheme, get_current_user
-from src.auth.oauth import oauth_provider
+from src.utils.helpers import claim_is_true
+from src.auth.dependencies import oauth2_scheme, get_current_user, introspection_client, rate_limit_ip
 
+# Redis stream ids: "<milliseconds>-<sequence>"
+CURSOR_PATTERN = r"^\d+(-\d+)?$"
 
 router = APIRouter()
-@router.get("/login")
+
+def client_info(request: Request) -> Dict[str, str]:
+    """Device description stored with a new session"""
+    return {
+        "ip": request.client.host if request.client else "",
+        "user_agent": request.headers.get("User-Agent", "")[:256],
+    }
+
+@router.get("/login", dependencies=[Depends(rate_limit_ip("login"))])
 async def login(request: Request):
     """Start Google OAuth flow"""
     redirect_uri = request.url_for('google_oauth_callback')
     return await oauth_provider.google.authorize_redirect(request, redirect_uri)
 
-@router.get("/callback")
+@router.get("/login/{provider}", dependencies=[Depends(rate_limit_ip("login"))])
+async def provider_login(provider: str, request: Request):
+    """Start OAuth flow for a configured provider"""
+    client = oauth_provider.get(provider)
+    redirect_uri = request.url_for('provider_oauth_callback', provider=provider)
+    return await client.authorize_redirect(request, redirect_uri)
+
+@router.get("/callback", dependencies=[Depends(rate_limit_ip("callback"))])
 async def google_oauth_callback(
     request: Request,
     db: AsyncSession = Depends(get_db),
@@ -31,6 +54,7 @@ async def google_oauth_callback(
 ):
     """Handle Google OAuth callback"""
     # Get token from Google
+    oauth_provider.acquire('google')
     token = await oauth_provider.google.authorize_access_token(request)
     
     auth_service = AuthService(db, redis)
@@ -38,11 +62,53 @@ async def google_oauth_callback(
     # Verify token and get user info
     user_info = await auth_service.verify_google_token(token['id_token'])
     
-    # Get or create user
-    user = await auth_service.get_or_create_user(user_info)
-    
-    # Create session tokens
-    return await auth_service.create_tokens(user)
+    # Get or create user and create session tokens, once per concurrent identity
+    return await auth_service.login(OAuthUserData(
+        provider="google",
+        email=user_info.email,
+        subject=user_info.google_id,
+        email_verified=user_info.email_verified,
+        first_name=user_info.first_name,
+        last_name=user_info.last_name
+    ), client=client_info(request))
+
+@router.get("/callback/{provider}", dependencies=[Depends(rate_limit_ip("callback"))])
+async def provider_oauth_callback(
+    provider: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
+):
+    """Handle OAuth callback for a configured provider"""
+    client = oauth_provider.get(provider)
+    config = oauth_provider.get_config(provider)
+
+    oauth_provider.acquire(provider)
+    token = await client.authorize_access_token(request)
+
+    # OIDC providers return verified claims with the token; others need a userinfo call
+    claims = token.get('userinfo')
+    if not claims:
+        oauth_provider.acquire(provider)
+        claims = await client.userinfo(token=token)
+
+    if not claims.get(config.email_claim) or not claims.get(config.subject_claim):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Provider did not return an email address"
+        )
+
+    user_info = OAuthUserData(
+        provider=provider,
+        email=claims[config.email_claim],
+        subject=str(claims[config.subject_claim]),
+        email_verified=claim_is_true(claims.get(config.email_verified_claim)),
+        first_name=claims.get(config.first_name_claim),
+        last_name=claims.get(config.last_name_claim)
+    )
+
+    auth_service = AuthService(db, redis)
+    return await auth_service.login(user_info, client=client_info(request))
 
 @router.post("/logout", status_code=status.HTTP_200_OK)
 async def logout(
@@ -63,17 +129,105 @@ async def verify_token_endpoint(
 ) -> TokenVerifyResponse:
     """Verify token validity"""
     auth_service = AuthService(db, redis)
-    
-    if await auth_service.is_token_blacklisted(token):
+    return await auth_service.verify_token(token)
+
+@router.post("/introspect", dependencies=[Depends(introspection_client)])
+async def introspect_token(
+    request: Request,
+    redis: Annotated[redis.Redis, Depends(get_redis)]
+) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+    """RFC 7662 token introspection
+
+    Takes a form-encoded ``token``; repeat the field to introspect a batch,
+    which returns a list of responses in the same order.
+    """
+    form = await request.form()
+    tokens = form.getlist("token")
+    if not tokens:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has been blacklisted"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="token is required"
         )
-    
-    return await auth_service.verify_token(token)
+    if len(tokens) > settings.INTROSPECTION_MAX_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.INTROSPECTION_MAX_BATCH} tokens per request"
+        )
+
+    results = await IntrospectionService(redis).introspect_many(tokens)
+    return results[0] if len(tokens) == 1 else results
+
+@router.get("/revocations", dependencies=[Depends(introspection_client)])
+async def poll_revocations(
+    redis: Annotated[redis.Redis, Depends(get_redis)],
+    cursor: Optional[str] = Query(None, pattern=CURSOR_PATTERN),
+    timeout: float = Query(0, ge=0)
+) -> Dict[str, Any]:
+    """Long-poll the revocation feed
+
+    Without a cursor, starts from the newest event. Waits up to ``timeout``
+    seconds (capped at REVOCATION_POLL_TIMEOUT_SECONDS) for events after
+    the cursor. ``reset`` means events were trimmed before they were read;
+    the consumer should drop its whole cache.
+    """
+    revocations = RevocationStreamService(redis)
+    reset = False
+    if cursor is None:
+        cursor = await revocations.latest_cursor()
+    else:
+        reset = await revocations.has_gap(cursor)
 
+    timeout = min(timeout, settings.REVOCATION_POLL_TIMEOUT_SECONDS)
+    cursor, events = await revocations.read(cursor, timeout=timeout)
+    return {"cursor": cursor, "reset": reset, "events": events}
 
-@router.post("/refresh", response_model=TokenResponse)
+@router.get("/revocations/stream", dependencies=[Depends(introspection_client)])
+async def stream_revocations(
+    request: Request,
+    redis: Annotated[redis.Redis, Depends(get_redis)],
+    cursor: Optional[str] = Query(None, pattern=CURSOR_PATTERN)
+) -> StreamingResponse:
+    """Revocation feed as server-sent events
+
+    Reconnecting clients resume from Last-Event-ID (or ``cursor``). An
+    ``event: reset`` means events were missed and the consumer should drop
+    its whole cache.
+    """
+    cursor = request.headers.get("Last-Event-ID") or cursor
+    if cursor is not None and not re.fullmatch(CURSOR_PATTERN, cursor):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    revocations = RevocationStreamService(redis)
+
+    async def events():
+        position = cursor
+        if position is None:
+            position = await revocations.latest_cursor()
+        elif await revocations.has_gap(position):
+            yield f"event: reset\nid: {position}\ndata: {{}}\n\n"
+
+        while not await request.is_disconnected():
+            position, batch = await revocations.read(
+                position,
+                timeout=settings.REVOCATION_POLL_TIMEOUT_SECONDS
+            )
+            if not batch:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+            for event in batch:
+                yield f"id: {event['id']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/refresh", response_model=TokenResponse, dependencies=[Depends(rate_limit_ip("refresh"))])
 async def refresh_token(
     refresh_token: str,
     db: AsyncSession = Depends(get_db),
@@ -100,4 +254,37 @@ async def revoke_refresh_token(
     """Revoke refresh token"""
     auth_service = AuthService(db, redis)
     await auth_service.revoke_refresh_token(refresh_token)
-    return {"message": "Token revoked successfully"}
\ No newline at end of file
+    return {"message": "Token revoked successfully"}
+
+@router.get("/sessions", response_model=List[SessionResponse])
+async def list_sessions(
+    user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    redis: Annotated[redis.Redis, Depends(get_redis)]
+):
+    """List the current user's signed-in devices"""
+    auth_service = AuthService(db, redis)
+    return await auth_service.list_sessions(user)
+
+@router.delete("/sessions/{session_id}")
+async def revoke_session(
+    session_id: str,
+    user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    redis: Annotated[redis.Redis, Depends(get_redis)]
+):
+    """Sign one device out"""
+    auth_service = AuthService(db, redis)
+    await auth_service.revoke_session(user, session_id)
+    return {"message": "Session revoked successfully"}
+
+@router.delete("/sessions")
+async def revoke_all_sessions(
+    user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    redis: Annotated[redis.Redis, Depends(get_redis)]
+):
+    """Sign every device out"""
+    auth_service = AuthService(db, redis)
+    revoked = await auth_service.revoke_all_sessions(user)
+    return {"message": "Sessions revoked successfully", "revoked": revoked}
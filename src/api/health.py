@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Response, status
+
+from src.services.health import ReadinessService
+
+router = APIRouter()
+
+@router.get("/healthz")
+async def liveness():
+    """Process is alive (no I/O)"""
+    return {"status": "ok"}
+
+@router.get("/readyz")
+async def readiness(response: Response):
+    """Dependencies are reachable; 503 when the worker should not get traffic"""
+    result = await ReadinessService().check()
+    if not result["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return result
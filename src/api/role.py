@@ -1,9 +1,10 @@
-from typing import List
+from typing import Dict, List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.core.database import get_db
-from src.auth.dependencies import get_current_user
+from src.auth.dependencies import get_current_user, require_permission
+from src.auth.permissions import Permission, decode_permissions
 from src.services.role import RoleService
 from src.schemas.role import RoleCreate, RoleUpdate, RoleResponse
 from src.models.user import User
@@ -14,14 +15,9 @@ router = APIRouter()
 async def create_role(
     role_data: RoleCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    _: Dict = Depends(require_permission(Permission.ROLES_WRITE))
 ):
-    """Create new role (admin only)"""
-    if not current_user.is_superuser:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to create roles"
-        )
+    """Create new role (requires roles:write)"""
     role_service = RoleService(db)
     return await role_service.create_role(role_data)
 
@@ -49,14 +45,9 @@ async def update_role(
     role_id: int,
     role_data: RoleUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    _: Dict = Depends(require_permission(Permission.ROLES_WRITE))
 ):
-    """Update role (admin only)"""
-    if not current_user.is_superuser:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update roles"
-        )
+    """Update role (requires roles:write)"""
     role_service = RoleService(db)
     return await role_service.update_role(role_id, role_data)
 
@@ -64,25 +55,21 @@ async def update_role(
 async def delete_role(
     role_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    _: Dict = Depends(require_permission(Permission.ROLES_WRITE))
 ):
-    """Delete role (admin only)"""
-    if not current_user.is_superuser:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete roles"
-        )
+    """Delete role (requires roles:write)"""
     role_service = RoleService(db)
+    return await role_service.delete_role(role_id)
 
 @router.get("/user/{user_id}", response_model=List[RoleResponse])
 async def get_user_roles(
     user_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    claims: Dict = Depends(require_permission())
 ):
     """Get all roles assigned to a specific user"""
-    # Only allow superusers or the user themselves to see their roles
-    if not current_user.is_superuser and current_user.id != user_id:
+    # Only allow users:read holders or the user themselves to see their roles
+    if claims.get("user_id") != user_id and not Permission.USERS_READ & decode_permissions(claims.get("perms")):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view roles for this user"
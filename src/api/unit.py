@@ -1,11 +1,13 @@
-from typing import List
+from typing import Dict, List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.core.database import get_db
-from src.auth.dependencies import get_current_user
+from src.auth.dependencies import get_current_user, require_permission
+from src.auth.permissions import Permission
 from src.services.unit import UnitService
 from src.schemas.unit import UnitCreate, UnitUpdate, UnitResponse
+from src.schemas.user import UserResponse
 from src.models.user import User
 
 router = APIRouter()
@@ -23,14 +25,9 @@ async def get_units(
 async def create_unit(
     unit_data: UnitCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    _: Dict = Depends(require_permission(Permission.UNITS_WRITE))
 ):
-    """Create new unit (admin only)"""
-    if not current_user.is_superuser:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to create units"
-        )
+    """Create new unit (requires units:write)"""
     try:
         unit_service = UnitService(db)
         return await unit_service.create_unit(unit_data)
@@ -50,19 +47,35 @@ async def get_unit(
     unit_service = UnitService(db)
     return await unit_service.get_unit(unit_id)
 
+@router.get("/{unit_id}/subtree", response_model=List[UnitResponse])
+async def get_unit_subtree(
+    unit_id: int,
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user)
+):
+    """Get a unit and all units below it"""
+    unit_service = UnitService(db)
+    return await unit_service.get_subtree(unit_id)
+
+@router.get("/{unit_id}/users", response_model=List[UserResponse])
+async def get_unit_users(
+    unit_id: int,
+    recursive: bool = True,
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user)
+):
+    """Get users of a unit, including units below it unless recursive=false"""
+    unit_service = UnitService(db)
+    return await unit_service.get_unit_users(unit_id, recursive)
+
 @router.put("/{unit_id}", response_model=UnitResponse)
 async def update_unit(
     unit_id: int,
     unit_data: UnitUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    _: Dict = Depends(require_permission(Permission.UNITS_WRITE))
 ):
-    """Update unit (admin only)"""
-    if not current_user.is_superuser:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update units"
-        )
+    """Update unit (requires units:write)"""
     unit_service = UnitService(db)
     return await unit_service.update_unit(unit_id, unit_data)
 
@@ -70,13 +83,8 @@ async def update_unit(
 async def delete_unit(
     unit_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    _: Dict = Depends(require_permission(Permission.UNITS_WRITE))
 ):
-    """Delete unit (admin only)"""
-    if not current_user.is_superuser:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete units"
-        )
+    """Delete unit (requires units:write)"""
     unit_service = UnitService(db)
     return await unit_service.delete_unit(unit_id)
\ No newline at end of file
@@ -1,8 +1,12 @@
-from typing import List
+from typing import Dict, List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel.ext.asyncio.session import AsyncSession
+import redis.asyncio as redis
 
 from src.core.database import get_db
+from src.core.redis import get_redis
+from src.auth.dependencies import require_permission
+from src.auth.permissions import Permission
 from src.services.user import UserService
 from src.schemas.user import UserCreate, UserUpdate, UserResponse
 
@@ -11,26 +15,29 @@ router = APIRouter()
 @router.post("/", response_model=UserResponse)
 async def create_user(
   user_data: UserCreate,
-  db: AsyncSession = Depends(get_db)
+  db: AsyncSession = Depends(get_db),
+  _: Dict = Depends(require_permission(Permission.USERS_WRITE))
 ):
-  """Create a new user"""
+  """Create a new user (requires users:write)"""
   user_service = UserService(db)
   return await user_service.create_user(user_data)
 
 @router.get("/", response_model=List[UserResponse])
 async def get_users(
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    _: Dict = Depends(require_permission(Permission.USERS_READ))
 ):
-    """Get all registered users"""
+    """Get all registered users (requires users:read)"""
     user_service = UserService(db)
     return await user_service.get_all_users()
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    _: Dict = Depends(require_permission(Permission.USERS_READ))
 ):
-    """Get specific user by ID"""
+    """Get specific user by ID (requires users:read)"""
     user_service = UserService(db)
     return await user_service.get_user(user_id)
 
@@ -38,17 +45,21 @@ async def get_user(
 async def update_user(
     user_id: int,
     user_data: UserUpdate,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
+    _: Dict = Depends(require_permission(Permission.USERS_WRITE))
 ):
-    """Update user"""
-    user_service = UserService(db)
+    """Update user (requires users:write)"""
+    user_service = UserService(db, redis_client)
     return await user_service.update_user(user_id, user_data)
 
 @router.delete("/{user_id}")
 async def delete_user(
     user_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
+    _: Dict = Depends(require_permission(Permission.USERS_WRITE))
 ):
-    """Delete user"""
-    user_service = UserService(db)
+    """Delete user (requires users:write)"""
+    user_service = UserService(db, redis_client)
     return await user_service.delete_user(user_id)
\ No newline at end of file
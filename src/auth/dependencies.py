@@ -1,23 +1,35 @@
-from typing import Annotated
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+import secrets
+from typing import Annotated, Dict, Optional
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPBasic, HTTPBasicCredentials, OAuth2PasswordBearer
 from sqlmodel.ext.asyncio.session import AsyncSession
+import redis.asyncio as redis
 
+from src.core.audit import bind_actor
+from src.core.config import settings
 from src.core.database import get_db
+from src.core.redis import get_redis
 from src.models.user import User
 from src.auth.security import SecurityService
+from src.services.token import AccessTokenService
+from src.auth.permissions import Permission, decode_permissions
+from src.services.rate_limit import RateLimitService
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+introspection_basic = HTTPBasic(auto_error=False)
 
 # Dependency for getting current authenticated user
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
-    db: Annotated[AsyncSession, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_db)],
+    redis_client: Annotated[redis.Redis, Depends(get_redis)]
 ) -> User:
     """Dependency to get the current authenticated user"""
-    security = SecurityService(db)
-    return await security.verify_and_get_user(token)
+    security = SecurityService(db, redis_client)
+    user = await security.verify_and_get_user(token)
+    bind_actor(user.id)
+    return user
 
 # Dependency for getting current active user
 async def get_current_active_user(
@@ -41,4 +53,62 @@ async def get_current_admin_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return user
\ No newline at end of file
+    return user
+
+# Dependency factory for per-IP rate limiting of an endpoint group
+def rate_limit_ip(scope: str):
+    """Build a dependency that rate limits requests by client IP"""
+    async def dependency(
+        request: Request,
+        redis_client: Annotated[redis.Redis, Depends(get_redis)]
+    ) -> None:
+        client_ip = request.client.host if request.client else None
+        await RateLimitService(redis_client).hit_ip(scope, client_ip)
+    return dependency
+
+# Dependency authenticating resource servers that call /auth/introspect
+async def introspection_client(
+    credentials: Annotated[Optional[HTTPBasicCredentials], Depends(introspection_basic)]
+) -> str:
+    """Check HTTP Basic client credentials against INTROSPECTION_CLIENTS
+
+    Fails closed: with no clients configured every caller is rejected
+    (RFC 7662 section 2.1 requires introspection to be authorized).
+    """
+    expected = settings.INTROSPECTION_CLIENTS.get(credentials.username) if credentials else None
+    if expected is None or not secrets.compare_digest(credentials.password.encode(), expected.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid client credentials",
+            headers={"WWW-Authenticate": "Basic"},
+        )
+    return credentials.username
+
+# Dependency factory for permission checks against the token alone
+def require_permission(*permissions: Permission):
+    """Build a dependency that requires all given permissions.
+
+    Checks the permission bitset embedded in the verified access token with
+    one bitwise AND: no database lookup, and no Redis lookup for JWTs
+    (reference tokens still read their claims). Revocation, by blacklist or
+    user watermark, is left to TokenBlacklistMiddleware. Returns the token
+    claims.
+    """
+    required = 0
+    for permission in permissions:
+        required |= permission
+
+    async def dependency(
+        token: Annotated[str, Depends(oauth2_scheme)],
+        redis_client: Annotated[redis.Redis, Depends(get_redis)]
+    ) -> Dict:
+        # Rejects refresh tokens; the middleware already read the watermark of a JWT
+        claims = await AccessTokenService(redis_client).resolve(token)
+        bind_actor(claims.get("user_id"))
+        if decode_permissions(claims.get("perms")) & required != required:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions"
+            )
+        return claims
+    return dependency
\ No newline at end of file
@@ -1,9 +1,12 @@
+import time
 from datetime import datetime, timedelta
 from typing import Dict
 from jose import JWTError, jwt
 from fastapi import HTTPException, status
 
 from src.core.config import settings
+from src.core.metrics import AUTH_FAILURES, JWT_DECODE_SECONDS, JWT_ENCODE_SECONDS
+from src.core.tracing import span
 from src.schemas.token import TokenPayload
 
 class JWTHandler:
@@ -13,31 +16,40 @@ class JWTHandler:
     def create_token(data: Dict, expires_delta: timedelta) -> str:
         """Create a JWT token with expiration"""
         to_encode = data.copy()
-        expire = datetime.utcnow() + expires_delta
-        to_encode.update({"exp": expire})
+        issued_at = datetime.utcnow()
+        to_encode.update({"iat": issued_at, "exp": issued_at + expires_delta})
         
-        return jwt.encode(
-            to_encode,
-            settings.JWT_SECRET_KEY,
-            algorithm=settings.JWT_ALGORITHM
-        )
+        started = time.perf_counter()
+        with span("jwt.encode"):
+            token = jwt.encode(
+                to_encode,
+                settings.JWT_SECRET_KEY,
+                algorithm=settings.JWT_ALGORITHM
+            )
+        JWT_ENCODE_SECONDS.observe(time.perf_counter() - started)
+        return token
 
     @staticmethod
     def decode_token(token: str) -> Dict:
         """Decode and verify a JWT token"""
+        started = time.perf_counter()
         try:
-            payload = jwt.decode(
-                token,
-                settings.JWT_SECRET_KEY,
-                algorithms=[settings.JWT_ALGORITHM]
-            )
+            with span("jwt.decode"):
+                payload = jwt.decode(
+                    token,
+                    settings.JWT_SECRET_KEY,
+                    algorithms=[settings.JWT_ALGORITHM]
+                )
             return payload
         except JWTError:
+            AUTH_FAILURES.labels("invalid_token").inc()
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        finally:
+            JWT_DECODE_SECONDS.observe(time.perf_counter() - started)
             
     @staticmethod
     def create_access_token(data: Dict) -> str:
@@ -1,33 +1,123 @@
+import time
+from typing import Dict, List
+
 from authlib.integrations.starlette_client import OAuth
-from src.core.config import settings
+from fastapi import HTTPException, status
+
+from src.core.config import settings, OAuthProviderSettings
+from src.core.http import shared_client_kwargs
+
+GOOGLE_METADATA_URL = 'https://accounts.google.com/.well-known/openid-configuration'
+
+class ProviderRateLimiter:
+    """Token bucket limiting outbound calls to one provider"""
+
+    def __init__(self, rate: float, burst: int):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
 
 class OAuthProvider:
-    """Provider for OAuth authentication services"""
+    """Registry of OAuth providers.
+
+    Provider configs are read from settings on first access. Each authlib
+    client (and with it the provider's metadata and JWKS, which authlib
+    fetches on first use) is created the first time the provider is
+    requested, then cached.
+    """
     
     def __init__(self):
         self.oauth = OAuth()
-        self._configure_providers()
+        self._configs: Dict[str, OAuthProviderSettings] = {}
+        self._clients = {}
+        self._limiters: Dict[str, ProviderRateLimiter] = {}
     
     def _configure_providers(self):
-        """Configure supported OAuth providers"""
-        self.oauth.register(
+        """Collect supported OAuth provider configs"""
+        self._configs['google'] = OAuthProviderSettings(
             name='google',
             client_id=settings.GOOGLE_CLIENT_ID,
             client_secret=settings.GOOGLE_CLIENT_SECRET,
-            server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-            client_kwargs={'scope': 'openid email profile'}
+            server_metadata_url=GOOGLE_METADATA_URL,
+            rate_limit_per_second=settings.GOOGLE_RATE_LIMIT_PER_SECOND,
+            rate_limit_burst=settings.GOOGLE_RATE_LIMIT_BURST
         )
-        
-        # Future providers can be added here
-        # self.oauth.register(
-        #     name='github',
-        #     ...
-        # )
+
+        for provider in settings.OAUTH_PROVIDERS:
+            self._configs[provider.name] = provider
+
+    def _register(self, config: OAuthProviderSettings):
+        """Register a provider with authlib"""
+        kwargs = {
+            'client_id': config.client_id,
+            'client_secret': config.client_secret,
+            'client_kwargs': {'scope': config.scope, **shared_client_kwargs()},
+        }
+        for key in ('server_metadata_url', 'authorize_url', 'access_token_url', 'userinfo_endpoint', 'api_base_url'):
+            value = getattr(config, key)
+            if value:
+                kwargs[key] = value
+
+        return self.oauth.register(name=config.name, **kwargs)
+
+    @property
+    def configs(self) -> Dict[str, OAuthProviderSettings]:
+        """Provider configs by name"""
+        if not self._configs:
+            self._configure_providers()
+        return self._configs
+
+    @property
+    def names(self) -> List[str]:
+        """Names of all configured providers"""
+        return list(self.configs)
+
+    def get_config(self, name: str) -> OAuthProviderSettings:
+        """Get a provider config or raise 404"""
+        config = self.configs.get(name)
+        if config is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Unknown OAuth provider: {name}"
+            )
+        return config
+
+    def get(self, name: str):
+        """Get a provider client, creating it on first use"""
+        client = self._clients.get(name)
+        if client is None:
+            client = self._register(self.get_config(name))
+            self._clients[name] = client
+        return client
+
+    def acquire(self, name: str) -> None:
+        """Consume one outbound call from the provider's rate limit"""
+        limiter = self._limiters.get(name)
+        if limiter is None:
+            config = self.get_config(name)
+            limiter = ProviderRateLimiter(config.rate_limit_per_second, config.rate_limit_burst)
+            self._limiters[name] = limiter
+
+        if not limiter.try_acquire():
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Too many requests to {name}, please retry"
+            )
     
     @property
     def google(self):
         """Get Google OAuth client"""
-        return self.oauth.google
+        return self.get('google')
 
 # Create a singleton instance
-oauth_provider = OAuthProvider()
\ No newline at end of file
+oauth_provider = OAuthProvider()
@@ -0,0 +1,44 @@
+from enum import IntFlag
+from functools import reduce
+from typing import Iterable, List
+
+class Permission(IntFlag):
+    """Permission bits. Never renumber: roles store these bits in the database
+    and issued tokens carry them."""
+    USERS_READ = 1 << 0
+    USERS_WRITE = 1 << 1
+    ROLES_READ = 1 << 2
+    ROLES_WRITE = 1 << 3
+    UNITS_READ = 1 << 4
+    UNITS_WRITE = 1 << 5
+
+ALL_PERMISSIONS = reduce(lambda mask, permission: mask | permission, Permission, 0)
+
+def compile_permissions(names: Iterable[str]) -> int:
+    """Compile permission names, e.g. "users:write", into a bitset"""
+    mask = 0
+    for name in names:
+        key = name.replace(":", "_").upper()
+        if key not in Permission.__members__:
+            raise ValueError(f"Unknown permission: {name}")
+        mask |= Permission[key]
+    return int(mask)
+
+def permission_names(mask: int) -> List[str]:
+    """Names of the permissions set in a bitset"""
+    return [
+        name.lower().replace("_", ":", 1)
+        for name, permission in Permission.__members__.items()
+        if mask & permission
+    ]
+
+def encode_permissions(mask: int) -> str:
+    """Compact token form of a bitset (hex)"""
+    return format(mask, "x")
+
+def decode_permissions(value: str) -> int:
+    """Bitset from its token form; malformed values grant nothing"""
+    try:
+        return int(value, 16)
+    except (TypeError, ValueError):
+        return 0
@@ -1,57 +1,138 @@
-from typing import Optional
+import asyncio
+import re
+from typing import Dict, Optional
+import httpx
+import redis.asyncio as redis
 from fastapi import HTTPException, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
-from google.oauth2 import id_token
-from google.auth.transport import requests
-from sqlalchemy.orm import selectinload
+from sqlalchemy import func
+from google.auth import jwt as google_jwt
 
+from src.core.cache import caches
 from src.core.config import settings
+from src.core.http import get_http_client
+from src.core.metrics import AUTH_FAILURES, GOOGLE_VERIFY_SECONDS, timed
 from src.models.user import User
 from src.schemas.token import GoogleTokenData
 from src.auth.jwt import JWTHandler
+from src.repositories.user import USER_LOADERS
+from src.services.token import AccessTokenService
+from src.utils.helpers import claim_is_true
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_verify_slots: Optional[asyncio.Semaphore] = None
+_certs_lock = asyncio.Lock()
+# One entry, kept for the max-age Google sends with the certs
+_google_certs = caches.register("google_certs", max_size=1)
+
+
+def _get_verify_slots() -> asyncio.Semaphore:
+    """Get the semaphore bounding concurrent Google verifications"""
+    global _verify_slots
+    if _verify_slots is None:
+        _verify_slots = asyncio.Semaphore(settings.GOOGLE_VERIFY_MAX_CONCURRENCY)
+    return _verify_slots
+
+
+def _max_age(cache_control: str) -> int:
+    match = re.search(r"max-age=(\d+)", cache_control or "")
+    return int(match.group(1)) if match else 0
+
+
+async def _get_google_certs() -> Dict[str, str]:
+    """Get Google's signing certs, refreshed per their Cache-Control"""
+    certs = _google_certs.get(GOOGLE_CERTS_URL)
+    if certs:
+        return certs
+
+    async with _certs_lock:
+        # Another caller may have refreshed while we waited
+        certs = _google_certs.get(GOOGLE_CERTS_URL)
+        if certs:
+            return certs
+
+        client = await get_http_client()
+        response = await client.get(GOOGLE_CERTS_URL)
+        response.raise_for_status()
+
+        certs = response.json()
+        # No max-age means "don't cache"; keep them for the next second at least
+        _google_certs.set(GOOGLE_CERTS_URL, certs, ttl=_max_age(response.headers.get("cache-control")) or 1)
+        return certs
+
 
 class SecurityService:
     """Service for security operations"""
     
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, redis_client: Optional[redis.Redis] = None):
         self._db = db
         self._jwt_handler = JWTHandler()
+        self._access_tokens = AccessTokenService(redis_client)
 
     @staticmethod
+    @timed(GOOGLE_VERIFY_SECONDS)
     async def verify_google_token(token: str) -> GoogleTokenData:
         """Verify Google OAuth token and extract user data"""
+        slots = _get_verify_slots()
+        try:
+            await asyncio.wait_for(
+                slots.acquire(),
+                timeout=settings.GOOGLE_VERIFY_QUEUE_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            AUTH_FAILURES.labels("verify_busy").inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Login is busy, please retry"
+            )
+
         try:
-            idinfo = id_token.verify_oauth2_token(
+            certs = await _get_google_certs()
+            # Signature check is CPU-only and takes microseconds; no I/O here
+            idinfo = google_jwt.decode(
                 token,
-                requests.Request(),
-                settings.GOOGLE_CLIENT_ID
+                certs=certs,
+                audience=settings.GOOGLE_CLIENT_ID,
+                clock_skew_in_seconds=10
             )
-            
-            if idinfo['iss'] not in ['accounts.google.com', 'https://accounts.google.com']:
+
+            if idinfo['iss'] not in GOOGLE_ISSUERS:
                 raise ValueError('Invalid token issuer')
                 
             return GoogleTokenData(
                 email=idinfo['email'],
                 google_id=idinfo['sub'],
+                email_verified=claim_is_true(idinfo.get('email_verified')),
                 first_name=idinfo.get('given_name'),
                 last_name=idinfo.get('family_name')
             )
         except ValueError as e:
+            AUTH_FAILURES.labels("invalid_google_token").inc()
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=f"Invalid Google token: {str(e)}"
             )
+        except httpx.HTTPError:
+            AUTH_FAILURES.labels("google_unavailable").inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Could not reach Google to verify token"
+            )
+        finally:
+            slots.release()
 
     async def get_user_by_email(self, email: str) -> Optional[User]:
-        """Get user by email from database, including roles"""
-        query = select(User).where(User.email == email).options(selectinload(User.roles))
+        """Get user by email from database, including roles and unit"""
+        query = select(User).where(func.lower(User.email) == email.lower()).options(*USER_LOADERS["auth"])
         result = await self._db.exec(query)
         return result.first()
 
     async def verify_and_get_user(self, token: str) -> User:
         """Verify token and return corresponding user"""
-        payload = self._jwt_handler.decode_token(token)
+        payload = await self._access_tokens.resolve(token)
         email = payload.get("sub")
         
         if not email:
@@ -67,6 +148,4 @@ class SecurityService:
                 detail="User not found"
             )
         
-        await self._db.refresh(user)
-        
         return user
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""Audit log pipeline.
+
+Producers (AuthService, repositories, middleware) call ``audit_log.record``,
+which only puts the event on a bounded in-process queue. A background task
+started in lifespan drains the queue and writes each batch with a single
+multi-row INSERT on its own session, so request paths never wait on an
+audit write. On shutdown the queue is drained before the engine closes.
+"""
+import asyncio
+import logging
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from src.core.config import settings
+from src.core.database import get_session
+from src.core.metrics import AUDIT_EVENTS, AUDIT_FLUSH_SECONDS, AUDIT_QUEUE_DEPTH
+from src.models.audit_log import AuditLog
+
+logger = logging.getLogger(__name__)
+
+# Request context attached to every event recorded while handling a request
+_client_ip: ContextVar[Optional[str]] = ContextVar("audit_client_ip", default=None)
+_actor_id: ContextVar[Optional[int]] = ContextVar("audit_actor_id", default=None)
+
+def bind_request(client_ip: Optional[str]) -> None:
+    """Attach the client address to events of the current request"""
+    _client_ip.set(client_ip)
+
+def bind_actor(user_id: Optional[int]) -> None:
+    """Attach the authenticated user to events of the current request"""
+    _actor_id.set(user_id)
+
+class AuditLogger:
+    """Bounded queue of audit events with a batching writer task"""
+
+    WRITE_ATTEMPTS = 3
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=settings.AUDIT_QUEUE_SIZE)
+        return self._queue
+
+    async def record(
+        self,
+        action: str,
+        subject_type: Optional[str] = None,
+        subject_id: Any = None,
+        actor_id: Optional[int] = None,
+        **details: Any
+    ) -> None:
+        """
+        Enqueue one event
+
+        Waits at most AUDIT_ENQUEUE_TIMEOUT_SECONDS on a full queue (and
+        not at all while no writer is running), then drops the event.
+
+        Args:
+            action: Dotted event name, e.g. "auth.login" or "role.update"
+            subject_type: Kind of the affected record, e.g. "user"
+            subject_id: Id of the affected record
+            actor_id: Acting user. Defaults to the request's authenticated user
+        """
+        if not settings.AUDIT_ENABLED:
+            return
+
+        event = {
+            "occurred_at": datetime.now(timezone.utc),
+            "action": action,
+            "actor_id": actor_id if actor_id is not None else _actor_id.get(),
+            "subject_type": subject_type,
+            "subject_id": str(subject_id) if subject_id is not None else None,
+            "ip": _client_ip.get(),
+            "details": details,
+        }
+
+        try:
+            if self._task is None:
+                self.queue.put_nowait(event)
+            else:
+                await asyncio.wait_for(self.queue.put(event), settings.AUDIT_ENQUEUE_TIMEOUT_SECONDS)
+        except (asyncio.QueueFull, asyncio.TimeoutError):
+            AUDIT_EVENTS.labels("dropped").inc()
+            logger.warning("Audit queue full, dropped %s event", action)
+            return
+
+        AUDIT_EVENTS.labels("enqueued").inc()
+        AUDIT_QUEUE_DEPTH.inc()
+
+    async def _next_batch(self) -> List[Dict]:
+        batch = [await self.queue.get()]
+        # Give a trickle of events a moment to accumulate into one INSERT
+        if not self._stopping and self.queue.qsize() < settings.AUDIT_BATCH_SIZE - 1:
+            await asyncio.sleep(settings.AUDIT_FLUSH_INTERVAL_SECONDS)
+        while len(batch) < settings.AUDIT_BATCH_SIZE and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def _write(self, batch: List[Dict]) -> None:
+        for attempt in range(1, self.WRITE_ATTEMPTS + 1):
+            try:
+                with AUDIT_FLUSH_SECONDS.time():
+                    async with get_session() as session:
+                        await session.execute(insert(AuditLog), batch)
+                AUDIT_EVENTS.labels("written").inc(len(batch))
+                return
+            except Exception:
+                if attempt == self.WRITE_ATTEMPTS:
+                    AUDIT_EVENTS.labels("failed").inc(len(batch))
+                    logger.exception("Dropped %d audit events after %d attempts", len(batch), attempt)
+                    return
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._write(batch)
+            finally:
+                AUDIT_QUEUE_DEPTH.dec(len(batch))
+                for _ in batch:
+                    self.queue.task_done()
+
+    def start(self) -> None:
+        """Start the writer on the running loop"""
+        if settings.AUDIT_ENABLED and self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Write everything still queued, then stop the writer"""
+        if self._task is None:
+            return
+
+        self._stopping = True
+        try:
+            await asyncio.wait_for(self.queue.join(), settings.AUDIT_SHUTDOWN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.error("Audit queue not drained on shutdown, %d events lost", self.queue.qsize())
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+audit_log = AuditLogger()
@@ -0,0 +1,192 @@
+"""Per-worker caches with invalidation broadcast across workers.
+
+Every uvicorn worker keeps its own LRU/TTL caches, registered by name at
+import. Caches subscribe to topics ("roles", "units"); repository writes
+call ``caches.invalidate(topic)``, which drops matching entries in
+this worker at once and publishes the invalidation on a Redis channel so
+every other worker does the same. If the subscription drops, invalidations
+may have been missed, so all caches are cleared when it reconnects.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Union
+
+from src.core.metrics import CACHE_INVALIDATIONS, CACHE_SIZE, record_cache
+from src.core.redis import get_redis
+from src.utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache:invalidate"
+MISSING = object()
+
+# Seconds, or a callable read on use so settings stay lazy
+TTL = Union[float, Callable[[], float], None]
+Listener = Callable[[Optional[Hashable]], Awaitable[None]]
+
+class LocalCache:
+    """LRU cache with an optional TTL, local to this worker"""
+
+    def __init__(self, name: str, max_size: int, ttl: TTL = None):
+        self.name = name
+        self.max_size = max_size
+        self._ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._flight = SingleFlight()
+        # Bumped on invalidation so a load that started before it is not stored
+        self._generation = 0
+        self._size = CACHE_SIZE.labels(name)
+
+    def _expires_at(self, ttl: TTL) -> float:
+        ttl = ttl if ttl is not None else self._ttl
+        if callable(ttl):
+            ttl = ttl()
+        return time.monotonic() + ttl if ttl else float("inf")
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            record_cache(self.name, False)
+            return default
+        self._entries.move_to_end(key)
+        record_cache(self.name, True)
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: TTL = None) -> None:
+        """Store a value; ttl overrides the cache's default for this entry"""
+        self._entries[key] = (self._expires_at(ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        self._size.set(len(self._entries))
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: TTL = None) -> Any:
+        """Cached value, loading it once for concurrent misses"""
+        value = self.get(key, MISSING)
+        if value is not MISSING:
+            return value
+
+        generation = self._generation
+
+        async def load() -> Any:
+            loaded = await loader()
+            if generation == self._generation:
+                self.set(key, loaded, ttl)
+            return loaded
+
+        # Keyed by generation too: a miss after an invalidation must not join
+        # a load that started before it and may return the old value
+        return await self._flight.do((key, generation), load)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one entry, or all of them"""
+        self._generation += 1
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+        self._size.set(len(self._entries))
+
+class CacheRegistry:
+    """Named caches and topic listeners, kept consistent across workers"""
+
+    def __init__(self):
+        self._caches: Dict[str, LocalCache] = {}
+        self._topics: Dict[str, List[Listener]] = {}
+        self._origin = uuid.uuid4().hex
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, max_size: int, ttl: TTL = None, topics: Iterable[str] = ()) -> LocalCache:
+        """Create (or return) the named cache, cleared on changes to topics"""
+        if name not in self._caches:
+            cache = LocalCache(name, max_size, ttl)
+            self._caches[name] = cache
+            for topic in topics:
+                self.subscribe(topic, self._dropper(cache))
+        return self._caches[name]
+
+    @staticmethod
+    def _dropper(cache: LocalCache) -> Listener:
+        async def drop(key: Optional[Hashable]) -> None:
+            cache.invalidate(key)
+        return drop
+
+    def subscribe(self, topic: str, listener: Listener) -> None:
+        """Call listener(key) whenever topic is invalidated in any worker"""
+        self._topics.setdefault(topic, []).append(listener)
+
+    def get(self, name: str) -> LocalCache:
+        return self._caches[name]
+
+    async def _apply(self, topic: str, key: Optional[Hashable], source: str) -> None:
+        for listener in self._topics.get(topic, ()):
+            try:
+                await listener(key)
+            except Exception:
+                logger.exception("Cache listener for %s failed", topic)
+        CACHE_INVALIDATIONS.labels(topic, source).inc()
+
+    async def invalidate(self, topic: str, key: Optional[Hashable] = None) -> None:
+        """
+        Invalidate a topic here and in every other worker
+
+        Args:
+            topic: What changed, e.g. "units"
+            key: Id of the changed record (JSON-serializable), or None for everything
+        """
+        if topic not in self._topics:
+            return
+        await self._apply(topic, key, "local")
+        try:
+            redis_client = await get_redis()
+            await redis_client.publish(CHANNEL, json.dumps({"topic": topic, "key": key, "origin": self._origin}))
+        except Exception:
+            # The write has happened; other workers catch up when their entries expire
+            logger.warning("Could not broadcast invalidation of %s", topic, exc_info=True)
+
+    async def _clear_all(self) -> None:
+        for topic in self._topics:
+            await self._apply(topic, None, "resync")
+
+    async def _listen(self) -> None:
+        subscribed_before = False
+        while True:
+            try:
+                redis_client = await get_redis()
+                async with redis_client.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    if subscribed_before:
+                        await self._clear_all()
+                    subscribed_before = True
+
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        event = json.loads(message["data"])
+                        if event.get("origin") != self._origin:
+                            await self._apply(event["topic"], event.get("key"), "remote")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Cache invalidation subscription lost, retrying", exc_info=True)
+                await asyncio.sleep(1.0)
+
+    def start(self) -> None:
+        """Start listening for invalidations from other workers"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+caches = CacheRegistry()
@@ -1,15 +1,41 @@
 import os
-from typing import Literal
-from dotenv import load_dotenv
+from functools import lru_cache
+from typing import Any, Literal, Optional
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-# Load .env manually
+# .env is read by pydantic-settings when Settings is first built, not at import
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Path ke direktori `config.py`
 ENV_PATH = os.path.join(BASE_DIR, "..", "..", ".env")  # Sesuaikan jika path beda
-load_dotenv(ENV_PATH)
 
-# print(f"Trying to load .env from: {ENV_PATH}")  # Debugging path .env
-# print(f"Loaded from dotenv: {os.getenv('DATABASE_URL')}")  # Debugging apakah DATABASE_URL terbaca
+class OAuthProviderSettings(BaseModel):
+    """Configuration for one federated identity provider"""
+    name: str
+    client_id: str
+    client_secret: str
+    # OIDC providers only need discovery; plain OAuth2 ones need explicit endpoints
+    server_metadata_url: Optional[str] = None
+    authorize_url: Optional[str] = None
+    access_token_url: Optional[str] = None
+    userinfo_endpoint: Optional[str] = None
+    api_base_url: Optional[str] = None
+    scope: str = "openid email profile"
+
+    # Claim names used to map the provider's userinfo onto a user
+    subject_claim: str = "sub"
+    email_claim: str = "email"
+    email_verified_claim: str = "email_verified"
+    first_name_claim: str = "given_name"
+    last_name_claim: str = "family_name"
+
+    # A first login is matched to an existing user by email only when the
+    # provider marks the address verified. Turn off only for providers that
+    # verify every address they return and send no such claim.
+    require_verified_email: bool = True
+
+    # Outbound calls allowed per second, with short bursts up to rate_limit_burst
+    rate_limit_per_second: float = 10.0
+    rate_limit_burst: int = 20
 
 class Settings(BaseSettings):
     # Application Settings
@@ -35,11 +61,95 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: Literal["HS256", "HS512", "RS256"] = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Claims embedded in access tokens: minimal (ids + permissions),
+    # standard (+ unit and role names) or full (+ names and flags)
+    TOKEN_CLAIM_PROFILE: Literal["minimal", "standard", "full"] = "full"
+    # "reference" issues opaque handles resolved through Redis
+    ACCESS_TOKEN_FORMAT: Literal["jwt", "reference"] = "jwt"
+    # Also honour blacklist entries keyed by the raw token, written before keys
+    # became digests; safe to turn off REFRESH_TOKEN_EXPIRE_DAYS after that deploy
+    BLACKLIST_LEGACY_KEYS: bool = True
+    # Keys per SCAN page for blacklist maintenance jobs
+    BLACKLIST_SCAN_COUNT: int = 1000
+    # How long finished background job results are kept
+    JOB_RESULT_TTL_SECONDS: int = 86400
+
+    # Token introspection (RFC 7662)
+    INTROSPECTION_CACHE_SECONDS: int = 30
+    INTROSPECTION_MAX_BATCH: int = 100
+    # client_id -> secret for HTTP Basic auth on /auth/introspect and the
+    # revocation feed; empty rejects every caller
+    INTROSPECTION_CLIENTS: dict[str, str] = {}
+
+    # Revocation feed for downstream token caches
+    REVOCATION_STREAM_MAXLEN: int = 100_000
+    REVOCATION_BATCH_SIZE: int = 500
+    REVOCATION_POLL_TIMEOUT_SECONDS: float = 25.0
     
     # OAuth2
     GOOGLE_CLIENT_ID: str
     GOOGLE_CLIENT_SECRET: str
     GOOGLE_REDIRECT_URI: str
+    GOOGLE_RATE_LIMIT_PER_SECOND: float = 50.0
+    GOOGLE_RATE_LIMIT_BURST: int = 100
+    GOOGLE_VERIFY_MAX_CONCURRENCY: int = 8
+    GOOGLE_VERIFY_QUEUE_TIMEOUT_SECONDS: float = 5.0
+
+    # Additional providers as a JSON list of OAuthProviderSettings
+    OAUTH_PROVIDERS: list[OAuthProviderSettings] = []
+
+    # Outbound HTTP (identity providers)
+    HTTP_TIMEOUT_SECONDS: float = 10.0
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_RETRIES: int = 2
+    HTTP2_ENABLED: bool = True
+
+    # Rate limiting (sliding window, per client IP and per identity)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_WINDOW_SECONDS: int = 60
+    RATE_LIMIT_PER_IP: int = 60
+    RATE_LIMIT_PER_IDENTITY: int = 10
+
+    # Warm-up during startup
+    WARMUP_ENABLED: bool = False
+    WARMUP_DB_CONNECTIONS: int = 5
+    WARMUP_REDIS_CONNECTIONS: int = 5
+    WARMUP_STEP_TIMEOUT_SECONDS: float = 5.0
+
+    # Units
+    UNIT_SUBTREE_CACHE_SECONDS: float = 60.0
+    # Shortest gap between reloads of roles and units caused by unknown ids
+    REFERENCE_DATA_MIN_RELOAD_SECONDS: float = 1.0
+
+    # Health probes
+    READINESS_TIMEOUT_SECONDS: float = 0.5
+    READINESS_CACHE_SECONDS: float = 2.0
+
+    # Observability
+    METRICS_ENABLED: bool = True
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATIO: float = 0.1
+    # None uses OTEL_EXPORTER_OTLP_ENDPOINT / the exporter default
+    TRACING_OTLP_ENDPOINT: Optional[str] = None
+    # Per-request SQL statement counting and N+1 warnings; not for production
+    QUERY_COUNT_ENABLED: bool = False
+    QUERY_COUNT_WARN_THRESHOLD: int = 10
+
+    # Audit log (in-process queue flushed to the database in batches)
+    AUDIT_ENABLED: bool = True
+    AUDIT_QUEUE_SIZE: int = 10_000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    # How long a producer waits on a full queue before the event is dropped
+    AUDIT_ENQUEUE_TIMEOUT_SECONDS: float = 0.05
+    AUDIT_SHUTDOWN_TIMEOUT_SECONDS: float = 10.0
+
+    # Event loop monitoring
+    LOOP_LAG_INTERVAL_SECONDS: float = 0.5
+    LOOP_LAG_WARN_SECONDS: float = 0.1
 
     model_config = SettingsConfigDict(
         env_file=ENV_PATH,
@@ -47,9 +157,15 @@ class Settings(BaseSettings):
         case_sensitive=True
     )
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Build settings once, on first use"""
+    return Settings()
+
+class _LazySettings:
+    """Proxy that defers reading the environment until a setting is accessed"""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_settings(), name)
 
-# Debugging apakah nilai dari DATABASE_URL terbaca oleh Pydantic Settings
-print(f"Loaded DATABASE_URL from Pydantic: {settings.DATABASE_URL}")
-print(f"Loaded GOOGLE_CLIENT_ID from Pydantic: {settings.GOOGLE_CLIENT_ID}")
-print(f"Loaded GOOGLE_CLIENT_SECRET from Pydantic: {settings.GOOGLE_CLIENT_SECRET}")
+settings: Settings = _LazySettings()  # type: ignore[assignment]
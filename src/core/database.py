@@ -1,29 +1,48 @@
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator, Optional
-from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from src.core.config import settings
+from src.core.tracing import instrument_engine
+from src.core import query_counter
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DATABASE_ECHO,
-    future=True
-)
+# Built on first use so importing this module does not create a pool.
+# Schema is managed by Alembic (see migrations/), never at startup.
+_engine: Optional[AsyncEngine] = None
+_async_session: Optional[sessionmaker] = None
 
-async_session = sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False
-)
+def get_engine() -> AsyncEngine:
+    """Get the database engine, creating it on first use"""
+    global _engine
+    if _engine is None:
+        _engine = create_async_engine(
+            settings.DATABASE_URL,
+            echo=settings.DATABASE_ECHO,
+            future=True
+        )
+        instrument_engine(_engine)
+        if settings.QUERY_COUNT_ENABLED:
+            query_counter.install(_engine)
+    return _engine
+
+def get_sessionmaker() -> sessionmaker:
+    """Get the session factory bound to the engine"""
+    global _async_session
+    if _async_session is None:
+        _async_session = sessionmaker(
+            get_engine(),
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autocommit=False,
+            autoflush=False
+        )
+    return _async_session
 
 @asynccontextmanager
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session() as session:
+    async with get_sessionmaker()() as session:
         try:
             yield session
             await session.commit()
@@ -37,6 +56,10 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with get_session() as session:
         yield session
 
-async def init_db() -> None:
-    async with engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
\ No newline at end of file
+async def close_db() -> None:
+    """Dispose the engine and its pooled connections"""
+    global _engine, _async_session
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        _async_session = None
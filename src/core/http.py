@@ -0,0 +1,77 @@
+import asyncio
+import importlib.util
+from typing import Optional
+
+import httpx
+
+from src.core.config import settings
+
+http_transport: Optional[httpx.AsyncHTTPTransport] = None
+http_client: Optional[httpx.AsyncClient] = None
+lock = asyncio.Lock()
+
+def _build_timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        settings.HTTP_TIMEOUT_SECONDS,
+        connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS
+    )
+
+async def init_http_client() -> None:
+    """Initialize the application-scoped outbound HTTP connection pool"""
+    global http_transport, http_client
+    # HTTP/2 needs the optional h2 package; fall back to keep-alive HTTP/1.1
+    http2 = settings.HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+    http_transport = httpx.AsyncHTTPTransport(
+        http2=http2,
+        retries=settings.HTTP_RETRIES,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+        )
+    )
+    http_client = httpx.AsyncClient(
+        transport=http_transport,
+        timeout=_build_timeout()
+    )
+
+async def get_http_client() -> httpx.AsyncClient:
+    """Get the shared outbound HTTP client"""
+    global http_client
+    if http_client is None:
+        async with lock:
+            if http_client is None:
+                await init_http_client()
+    return http_client
+
+async def close_http_client() -> None:
+    """Close the shared outbound HTTP client and its pool"""
+    global http_transport, http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+        http_transport = None
+
+class SharedTransport(httpx.AsyncBaseTransport):
+    """Transport that routes short-lived clients through the shared pool.
+
+    Third-party clients (authlib) open and close their own httpx client per
+    call; handing them this transport keeps their connections pooled while
+    ignoring their close, since the pool is owned by lifespan.
+    """
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await get_http_client()
+        return await http_transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass
+
+shared_transport = SharedTransport()
+
+def shared_client_kwargs() -> dict:
+    """httpx client kwargs that make a client use the shared pool"""
+    return {
+        "transport": shared_transport,
+        "timeout": _build_timeout(),
+    }
@@ -0,0 +1,112 @@
+"""Background jobs for long-running maintenance.
+
+A job runs as an asyncio task on the worker that started it; its state
+lives in a Redis hash so any worker can report progress. Results are kept
+for JOB_RESULT_TTL_SECONDS.
+"""
+import asyncio
+import logging
+import secrets
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+import redis.asyncio as redis
+
+from src.core.audit import audit_log
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class JobProgress:
+    """Progress reporter handed to a running job"""
+
+    def __init__(self, redis: redis.Redis, key: str):
+        self._redis = redis
+        self._key = key
+
+    async def __call__(self, processed: int, matched: int) -> None:
+        await self._redis.hset(self._key, mapping={
+            "processed": processed,
+            "matched": matched,
+            "updated_at": int(time.time()),
+        })
+
+JobFunction = Callable[[JobProgress], Awaitable[int]]
+
+class JobRegistry:
+    """Start jobs and look up their state"""
+
+    def __init__(self):
+        self._prefix = "jobs:"
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def start(
+        self,
+        redis: redis.Redis,
+        kind: str,
+        func: JobFunction,
+        actor_id: Optional[int] = None,
+        **params
+    ) -> Dict:
+        """
+        Run func in the background and return the job's initial state
+
+        Args:
+            redis: Client the job state is written with
+            kind: Job name, e.g. "blacklist.clear"
+            func: Coroutine function taking a progress reporter and returning a result count
+            actor_id: User who started the job, recorded as "started_by" and in the audit log
+            params: Recorded with the job for reference
+        """
+        job_id = secrets.token_urlsafe(12)
+        key = f"{self._prefix}{job_id}"
+        state = {
+            "id": job_id,
+            "kind": kind,
+            "state": "running",
+            "processed": 0,
+            "matched": 0,
+            "started_at": int(time.time()),
+            **{name: str(value) for name, value in params.items()},
+        }
+        if actor_id is not None:
+            state["started_by"] = str(actor_id)
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=state)
+            pipe.expire(key, settings.JOB_RESULT_TTL_SECONDS)
+            await pipe.execute()
+
+        await audit_log.record("job.start", "job", job_id, actor_id=actor_id, kind=kind, **params)
+
+        task = asyncio.create_task(self._run(redis, key, func))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        return state
+
+    async def _run(self, redis: redis.Redis, key: str, func: JobFunction) -> None:
+        final = {}
+        try:
+            final = {"state": "succeeded", "result": await func(JobProgress(redis, key))}
+        except asyncio.CancelledError:
+            final = {"state": "cancelled"}
+            raise
+        except Exception as e:
+            logger.exception("Job %s failed", key)
+            final = {"state": "failed", "error": str(e)}
+        finally:
+            final["finished_at"] = int(time.time())
+            await redis.hset(key, mapping=final)
+
+    async def get(self, redis: redis.Redis, job_id: str) -> Optional[Dict]:
+        """State of a job, or None when unknown or expired"""
+        state = await redis.hgetall(f"{self._prefix}{job_id}")
+        return state or None
+
+    async def stop(self) -> None:
+        """Cancel jobs still running on this worker (shutdown)"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+jobs = JobRegistry()
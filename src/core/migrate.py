@@ -0,0 +1,19 @@
+"""One-shot schema migration: `python -m src.core.migrate [revision]`
+
+Run once per deploy (e.g. a release job or init container) before
+starting workers; workers never touch the schema themselves.
+"""
+import os
+import sys
+
+from alembic import command
+from alembic.config import Config
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "alembic.ini")
+
+def migrate(revision: str = "head") -> None:
+    """Upgrade the database schema to the given revision"""
+    command.upgrade(Config(ALEMBIC_INI), revision)
+
+if __name__ == "__main__":
+    migrate(sys.argv[1] if len(sys.argv) > 1 else "head")
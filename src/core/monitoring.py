@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from src.core.config import settings
+from src.core.metrics import EVENT_LOOP_LAG
+
+logger = logging.getLogger(__name__)
+
+class LoopLagMonitor:
+    """Measure how late the event loop wakes up a periodic sleeper.
+
+    Any blocking call on the loop (sync I/O, CPU-heavy crypto) shows up as
+    lag, so a flat lag during a login burst proves the hot path is async.
+    """
+
+    def __init__(self, interval: Optional[float] = None, warn_threshold: Optional[float] = None):
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.samples = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.samples += 1
+            EVENT_LOOP_LAG.set(lag)
+
+            if lag > self.warn_threshold:
+                logger.warning("Event loop lag %.3fs exceeds %.3fs", lag, self.warn_threshold)
+
+    def start(self) -> None:
+        """Start sampling on the running loop"""
+        if self.interval is None:
+            self.interval = settings.LOOP_LAG_INTERVAL_SECONDS
+        if self.warn_threshold is None:
+            self.warn_threshold = settings.LOOP_LAG_WARN_SECONDS
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, float]:
+        """Current lag statistics in seconds"""
+        return {
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+            "samples": self.samples,
+        }
+
+loop_lag_monitor = LoopLagMonitor()
@@ -0,0 +1,108 @@
+"""SQL statement counting and N+1 detection.
+
+Statements are recorded into the QueryStats of the innermost
+count_queries() block active in the current context, so the count covers
+exactly one request or one repository call even under concurrency.
+
+In tests:
+
+    install(get_engine())
+    with assert_max_queries(3, label="GET /api/users"):
+        await client.get("/api/users/")
+"""
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Identical statements repeated at least this often in one scope are N+1 suspects
+N_PLUS_ONE_THRESHOLD = 3
+
+# Relationship lazy loads and the SQL shape they produce
+WATCHED_RELATIONSHIPS = {
+    "User.roles": re.compile(r"FROM roles.*user_roles\.user_id", re.S),
+    "User.unit": re.compile(r"FROM units\s+WHERE units\.id =", re.S),
+    "Role.users": re.compile(r"FROM users.*user_roles\.role_id", re.S),
+}
+
+_IN_LIST = re.compile(r"IN \([^)]*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+def normalize(statement: str) -> str:
+    """Collapse whitespace and expanded IN lists so equivalent queries compare equal"""
+    return _IN_LIST.sub("IN (...)", _WHITESPACE.sub(" ", statement.strip()))
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a scope issues more statements than its budget"""
+
+@dataclass
+class QueryStats:
+    label: str = ""
+    statements: List[str] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+        """Normalized statements issued at least threshold times"""
+        counts = Counter(normalize(statement) for statement in self.statements)
+        return {statement: n for statement, n in counts.items() if n >= threshold}
+
+    def n_plus_one(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+        """Repeated statements, keyed by the relationship they lazily load when known"""
+        suspects = {}
+        for statement, n in self.repeated(threshold).items():
+            name = next(
+                (rel for rel, pattern in WATCHED_RELATIONSHIPS.items() if pattern.search(statement)),
+                statement[:120]
+            )
+            suspects[name] = suspects.get(name, 0) + n
+        return suspects
+
+    def report(self) -> str:
+        lines = [f"{self.label or 'scope'}: {self.count} statements"]
+        for name, n in self.n_plus_one().items():
+            lines.append(f"  possible N+1 on {name}: {n} repeated statements")
+        return "\n".join(lines)
+
+def _record(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.statements.append(statement)
+
+def install(engine) -> None:
+    """Start recording statements from an engine (sync or async)"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _record):
+        event.listen(sync_engine, "before_cursor_execute", _record)
+
+@contextmanager
+def count_queries(label: str = "") -> Iterator[QueryStats]:
+    """Collect the statements issued inside the block"""
+    stats = QueryStats(label)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+@contextmanager
+def assert_max_queries(budget: int, label: str = "", allow_n_plus_one: bool = False) -> Iterator[QueryStats]:
+    """Fail when the block exceeds its query budget or shows an N+1 pattern"""
+    with count_queries(label) as stats:
+        yield stats
+
+    if stats.count > budget:
+        raise QueryBudgetExceeded(f"expected at most {budget} statements\n{stats.report()}")
+    if not allow_n_plus_one and stats.n_plus_one():
+        raise QueryBudgetExceeded(f"N+1 query pattern detected\n{stats.report()}")
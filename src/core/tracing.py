@@ -0,0 +1,90 @@
+"""Optional OpenTelemetry tracing.
+
+Disabled by default. While disabled, span() hands back one shared no-op
+context manager, so instrumented code pays a function call and nothing
+else, and the OpenTelemetry packages are never imported.
+"""
+import logging
+from contextlib import nullcontext
+from typing import Any, ContextManager, Optional
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_NOOP_SPAN = nullcontext()
+_tracer: Optional[Any] = None
+_tracer_provider: Optional[Any] = None
+
+def span(name: str) -> ContextManager:
+    """Context manager for a child span of the current request"""
+    if _tracer is None:
+        return _NOOP_SPAN
+    return _tracer.start_as_current_span(name)
+
+def setup_tracing(app, span_exporter: Optional[Any] = None) -> Optional[Any]:
+    """
+    Configure tracing for the app when enabled
+
+    Args:
+        app: FastAPI application to create a span per request for
+        span_exporter: Exporter to use instead of OTLP, e.g. an
+            InMemorySpanExporter in tests. Passing one enables tracing
+            regardless of TRACING_ENABLED and exports synchronously.
+
+    Returns:
+        The TracerProvider, or None when tracing is off
+    """
+    global _tracer, _tracer_provider
+    if not settings.TRACING_ENABLED and span_exporter is None:
+        return None
+
+    try:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+        from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+        from opentelemetry.instrumentation.redis import RedisInstrumentor
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ALWAYS_ON, ParentBased, TraceIdRatioBased
+    except ImportError:
+        logger.warning("TRACING_ENABLED is set but OpenTelemetry is not installed; tracing is off")
+        return None
+
+    if span_exporter is None:
+        # Respect the caller's sampling decision, sample new traces by ratio
+        sampler = ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO))
+    else:
+        # An injected exporter is there to see every span
+        sampler = ALWAYS_ON
+    provider = TracerProvider(
+        sampler=sampler,
+        resource=Resource.create({"service.name": settings.PROJECT_NAME})
+    )
+    if span_exporter is None:
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)))
+    else:
+        provider.add_span_processor(SimpleSpanProcessor(span_exporter))
+
+    FastAPIInstrumentor.instrument_app(app, tracer_provider=provider)
+    RedisInstrumentor().instrument(tracer_provider=provider)
+    HTTPXClientInstrumentor().instrument(tracer_provider=provider)
+
+    _tracer_provider = provider
+    _tracer = provider.get_tracer("src")
+    return provider
+
+def instrument_engine(engine) -> None:
+    """Emit a span per SQL statement on an engine (called when it is built)"""
+    if _tracer_provider is None:
+        return
+
+    # Not SQLAlchemyInstrumentor().instrument(engine=...): the instrumentor is a
+    # process-wide singleton and ignores every call after the first, so an
+    # engine rebuilt after close_db() would go untraced
+    from opentelemetry.instrumentation.sqlalchemy.engine import EngineTracer
+    from opentelemetry.metrics import get_meter
+
+    connections = get_meter("src").create_up_down_counter("db.client.connections.usage", unit="connections")
+    EngineTracer(_tracer_provider.get_tracer("src.sql"), engine.sync_engine, connections)
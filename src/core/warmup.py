@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict
+
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+
+from src.core.config import settings
+from src.core.database import get_engine
+from src.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+async def _configure_mappers() -> None:
+    # Otherwise done lazily by the first query that touches a model
+    import src.models  # noqa: F401
+    configure_mappers()
+
+async def _open_db_connections() -> None:
+    # Hold all connections at once so the pool really grows to N
+    engine = get_engine()
+    connections = await asyncio.gather(
+        *(engine.connect().start() for _ in range(settings.WARMUP_DB_CONNECTIONS))
+    )
+    try:
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in connections))
+    finally:
+        await asyncio.gather(*(conn.close() for conn in connections))
+
+async def _open_redis_connections() -> None:
+    # Concurrent commands each check out their own pooled connection
+    redis_client = await get_redis()
+    await asyncio.gather(*(redis_client.ping() for _ in range(settings.WARMUP_REDIS_CONNECTIONS)))
+
+async def _prefetch_oidc_metadata() -> None:
+    from src.auth.oauth import oauth_provider
+    from src.auth.security import _get_google_certs
+
+    await oauth_provider.google.load_server_metadata()
+    await _get_google_certs()
+
+async def _load_reference_data() -> None:
+    from src.services.reference_data import reference_data
+
+    await reference_data.reload()
+
+WARMUP_STEPS: Dict[str, Callable[[], Awaitable[None]]] = {
+    "mappers": _configure_mappers,
+    "database": _open_db_connections,
+    "redis": _open_redis_connections,
+    "oidc_metadata": _prefetch_oidc_metadata,
+    "reference_data": _load_reference_data,
+}
+
+async def warm_up() -> Dict[str, float]:
+    """
+    Pay connection and discovery costs before the worker takes traffic
+
+    Runs during lifespan startup, so uvicorn only accepts requests once it
+    finishes. Steps are best-effort: a failing step is logged and skipped
+    rather than keeping the worker down.
+
+    Returns:
+        Seconds spent per step
+    """
+    timings = {}
+    for name, step in WARMUP_STEPS.items():
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(step(), timeout=settings.WARMUP_STEP_TIMEOUT_SECONDS)
+        except Exception:
+            logger.warning("Warm-up step %s failed", name, exc_info=True)
+        timings[name] = time.perf_counter() - started
+
+    logger.info("Warm-up finished: %s", {name: round(seconds, 3) for name, seconds in timings.items()})
+    return timings
@@ -0,0 +1,23 @@
+import time
+from fastapi import Request
+
+from src.core.metrics import HTTP_REQUEST_SECONDS
+
+class MetricsMiddleware:
+    """Middleware recording per-route request latency"""
+
+    async def __call__(self, request: Request, call_next):
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            # Label by route template, not raw path, to bound cardinality
+            route = request.scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                request.method,
+                route.path if route is not None else "unmatched",
+                str(status_code)
+            ).observe(time.perf_counter() - started)
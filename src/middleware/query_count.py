@@ -0,0 +1,19 @@
+import logging
+from fastapi import Request
+
+from src.core.config import settings
+from src.core.query_counter import count_queries
+
+logger = logging.getLogger(__name__)
+
+class QueryCountMiddleware:
+    """Middleware counting SQL statements per request (diagnostics only)"""
+
+    async def __call__(self, request: Request, call_next):
+        with count_queries(f"{request.method} {request.url.path}") as stats:
+            response = await call_next(request)
+
+        response.headers["X-Query-Count"] = str(stats.count)
+        if stats.count > settings.QUERY_COUNT_WARN_THRESHOLD or stats.n_plus_one():
+            logger.warning(stats.report())
+        return response
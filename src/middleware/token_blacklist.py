@@ -3,7 +3,9 @@ from fastapi.security.utils import get_authorization_scheme_param
 from fastapi.responses import JSONResponse
 import redis.asyncio as redis
 
-from src.services.token import TokenBlacklistService
+from src.core.audit import audit_log, bind_request
+from src.core.metrics import AUTH_FAILURES
+from src.services.token import AccessTokenService
 from src.core.redis import get_redis
 
 class TokenBlacklistMiddleware:
@@ -11,27 +13,41 @@ class TokenBlacklistMiddleware:
     
     def __init__(self):
         self.redis = None
-        self.blacklist_service = None
+        self.access_tokens = None
         # Public paths that don't need token validation
         self.public_paths = {
             "/auth/login", 
             "/auth/callback",
             "/auth/refresh",
+            "/auth/introspect",
+            "/auth/revocations",
+            "/auth/revocations/stream",
             "/docs",
             "/redoc",
             "/openapi.json",
+            "/healthz",
+            "/readyz",
+            "/metrics",
         }
+        # Per-provider OAuth routes, e.g. /auth/login/github
+        self.public_prefixes = (
+            "/auth/login/",
+            "/auth/callback/",
+        )
 
     async def __call__(self, request: Request, call_next):
+        bind_request(request.client.host if request.client else None)
+
         # Skip middleware for non-authenticated routes
-        if request.url.path in self.public_paths:
+        path = request.url.path
+        if path in self.public_paths or path.startswith(self.public_prefixes):
             return await call_next(request)
         
         # Initialize redis and blacklist service if not already done
         if not self.redis:
             try:
                 self.redis = await get_redis()
-                self.blacklist_service = TokenBlacklistService(self.redis)
+                self.access_tokens = AccessTokenService(self.redis)
             except Exception as e:
                 # Handle Redis connection errors gracefully
                 return JSONResponse(
@@ -49,8 +65,10 @@ class TokenBlacklistMiddleware:
             return await call_next(request)
         
         try:
-            # Check if token is blacklisted
-            if await self.blacklist_service.is_blacklisted(token):
+            # Check if token is blacklisted, or its user deactivated since it was issued (one round trip)
+            if await self.access_tokens.is_revoked(token):
+                AUTH_FAILURES.labels("revoked_token").inc()
+                await audit_log.record("auth.revoked_token_used", path=path)
                 # Return proper JSONResponse instead of raising exception
                 return JSONResponse(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -2,12 +2,16 @@ from src.models.user_role import UserRole
 
 from src.models.unit import Unit
 from src.models.user import User
+from src.models.user_identity import UserIdentity
 from src.models.role import Role
+from src.models.audit_log import AuditLog
 
 
 __all__ = [
     "Unit", 
     "User", 
     "Role", 
-    "UserRole"
+    "UserRole",
+    "UserIdentity",
+    "AuditLog"
 ]
\ No newline at end of file
@@ -0,0 +1,20 @@
+from typing import Any, Dict, Optional
+from datetime import datetime
+from sqlalchemy import JSON, BigInteger, Index, Integer
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel, Column, DateTime
+
+class AuditLog(SQLModel, table=True):
+    __tablename__ = "audit_logs"
+    # Append-only and written in batches: keep indexes to what lookups need
+    __table_args__ = (Index("ix_audit_logs_subject", "subject_type", "subject_id"),)
+
+    # SQLite only auto-increments INTEGER PRIMARY KEY columns (tests, benchmarks)
+    id: Optional[int] = Field(default=None, sa_column=Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True))
+    occurred_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False, index=True))
+    action: str
+    actor_id: Optional[int] = None
+    subject_type: Optional[str] = None
+    subject_id: Optional[str] = None
+    ip: Optional[str] = None
+    details: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON().with_variant(JSONB, "postgresql"), nullable=False))
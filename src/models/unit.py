@@ -1,19 +1,43 @@
 from typing import Optional, List, TYPE_CHECKING
 from datetime import datetime
+from sqlalchemy import String, and_
 from sqlmodel import Field, SQLModel, Column, DateTime, Relationship
 
 # Use TYPE_CHECKING for type hints without importing at runtime
 if TYPE_CHECKING:
     from src.models.user import User
 
+# Byte-wise collation on Postgres so "/1/4/" sorts next to its descendants and
+# subtree range scans can use a plain btree index
+PathType = String().with_variant(String(collation="C"), "postgresql")
+
 class Unit(SQLModel, table=True):
     __tablename__ = "units"
 
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(unique=True, index=True)
     code: str = Field(unique=True, index=True)
+    parent_id: Optional[int] = Field(default=None, foreign_key="units.id", index=True)
+    # Materialized path of ids from the root, e.g. "/1/4/9/"
+    path: str = Field(default="", sa_column=Column(PathType, nullable=False, index=True))
     created_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime(timezone=True)))
     updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime(timezone=True), onupdate=datetime.utcnow))
 
     # Relationship should be indented properly and use string for forward reference
-    users: List["User"] = Relationship(back_populates="unit")
\ No newline at end of file
+    users: List["User"] = Relationship(back_populates="unit")
+
+def build_path(unit_id: int, parent_path: Optional[str] = None) -> str:
+    """Materialized path of a unit under the given parent path"""
+    return f"{parent_path or '/'}{unit_id}/"
+
+def ancestor_ids(path: str) -> List[int]:
+    """Unit ids from the root down to the unit itself"""
+    return [int(part) for part in path.strip("/").split("/") if part]
+
+def in_subtree(path: str):
+    """Filter matching a unit and all of its descendants with one index range scan.
+
+    Paths only contain digits and "/", and "0" sorts right after "/", so
+    every descendant of "/1/4/" falls in ["/1/4/", "/1/40").
+    """
+    return and_(Unit.path >= path, Unit.path < path[:-1] + "0")
@@ -1,5 +1,6 @@
 from typing import Optional, List, TYPE_CHECKING
 from datetime import datetime
+from sqlalchemy import Index, func
 from sqlmodel import Field, SQLModel, Column, DateTime, Relationship
 
 from src.models.user_role import UserRole
@@ -21,7 +22,7 @@ class User(SQLModel, table=True):
     google_id: Optional[str] = None
     is_active: bool = Field(default=True)
     is_superuser: bool = Field(default=False)
-    unit_id: Optional[int] = Field(default=None, foreign_key="units.id")
+    unit_id: Optional[int] = Field(default=None, foreign_key="units.id", index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime(timezone=True)))
     updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime(timezone=True), onupdate=datetime.utcnow))
 
@@ -29,3 +30,14 @@ class User(SQLModel, table=True):
     unit: Optional["Unit"] = Relationship(back_populates="users")
     roles: List["Role"] = Relationship(back_populates="users", link_model=UserRole)
 
+# Login looks users up by google_id; only linked accounts carry one
+Index(
+    "ix_users_google_id",
+    User.google_id,
+    unique=True,
+    postgresql_where=User.google_id.isnot(None),
+    sqlite_where=User.google_id.isnot(None)
+)
+# Email lookups are case-insensitive, so emails are unique regardless of case
+Index("ix_users_email_lower", func.lower(User.email), unique=True)
+
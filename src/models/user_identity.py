@@ -0,0 +1,20 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import ForeignKey, Integer, UniqueConstraint
+from sqlmodel import Field, SQLModel, Column, DateTime
+
+class UserIdentity(SQLModel, table=True):
+    """Link between a user and their account at a federated identity provider"""
+    __tablename__ = "user_identities"
+    __table_args__ = (
+        # Login looks identities up by (provider, subject); one link per provider per user
+        UniqueConstraint("provider", "subject", name="uq_user_identities_provider_subject"),
+        UniqueConstraint("user_id", "provider", name="uq_user_identities_user_id_provider"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(sa_column=Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False))
+    provider: str
+    # The provider's stable id for the account (its subject claim)
+    subject: str
+    created_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime(timezone=True)))
@@ -1,7 +1,10 @@
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 class UserRole(SQLModel, table=True):
     __tablename__ = "user_roles"
+    # The primary key serves user -> roles; this serves role -> users
+    __table_args__ = (Index("ix_user_roles_role_id_user_id", "role_id", "user_id"),)
     
     user_id: int = Field(foreign_key="users.id", primary_key=True)
     role_id: int = Field(foreign_key="roles.id", primary_key=True)
\ No newline at end of file
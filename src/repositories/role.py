@@ -1,19 +1,42 @@
 from typing import List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from src.models.role import Role
 from src.models.user import UserRole
 from src.schemas.role import RoleCreate, RoleUpdate
+from src.auth.permissions import compile_permissions
+from src.core.audit import audit_log
+from src.core.cache import caches
+from src.core.metrics import instrument_repository
 
+def _name_taken() -> HTTPException:
+    # Only reachable when another request took the name after validation
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Role name already exists"
+    )
+
+@instrument_repository("role")
 class RoleRepository:
     def __init__(self, db: AsyncSession):
         self._db = db
     
     async def create(self, role_data: RoleCreate) -> Role:
-        role = Role(**role_data.model_dump())
+        role = Role(
+            name=role_data.name,
+            permissions=compile_permissions(role_data.permissions)
+        )
         self._db.add(role)
-        await self._db.commit()
+        try:
+            await self._db.commit()
+        except IntegrityError:
+            await self._db.rollback()
+            raise _name_taken()
         await self._db.refresh(role)
+        await caches.invalidate("roles", role.id)
+        await audit_log.record("role.create", "role", role.id, name=role.name)
         return role
     
     async def get_by_id(self, role_id: int) -> Optional[Role]:
@@ -37,11 +60,20 @@ class RoleRepository:
             return None
             
         update_data = role_data.model_dump(exclude_unset=True)
+        fields = sorted(update_data)
+        if update_data.get("permissions") is not None:
+            update_data["permissions"] = compile_permissions(update_data["permissions"])
         for key, value in update_data.items():
             setattr(role, key, value)
             
-        await self._db.commit()
+        try:
+            await self._db.commit()
+        except IntegrityError:
+            await self._db.rollback()
+            raise _name_taken()
         await self._db.refresh(role)
+        await caches.invalidate("roles", role_id)
+        await audit_log.record("role.update", "role", role_id, fields=fields)
         return role
     
     async def delete(self, role_id: int) -> bool:
@@ -57,9 +89,11 @@ class RoleRepository:
             
         await self._db.delete(role)
         await self._db.commit()
+        await caches.invalidate("roles", role_id)
+        await audit_log.record("role.delete", "role", role_id)
         return True
 
     async def get_user_roles(self, user_id: int) -> List[Role]:
         query = select(Role).join(UserRole).where(UserRole.user_id == user_id)
-        result = await self._db.execute(query)
+        result = await self._db.exec(query)
         return result.all()
\ No newline at end of file
@@ -1,9 +1,23 @@
 from typing import List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import String, func, literal, update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from src.models.unit import Unit
+from src.models.unit import Unit, build_path, in_subtree
 from src.schemas.unit import UnitCreate, UnitUpdate
+from src.core.audit import audit_log
+from src.core.cache import caches
+from src.core.metrics import instrument_repository
 
+def _write_conflict() -> HTTPException:
+    # Only reachable when the name or code was taken, or the parent removed, after validation
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Unit name or code already exists, or parent unit not found"
+    )
+
+@instrument_repository("unit")
 class UnitRepository:
     def __init__(self, db: AsyncSession):
         self._db = db
@@ -11,8 +25,20 @@ class UnitRepository:
     async def create(self, unit_data: UnitCreate) -> Unit:
         unit = Unit(**unit_data.model_dump())
         self._db.add(unit)
-        await self._db.commit()
+        try:
+            # Flush for the id, then derive the path in the same transaction
+            await self._db.flush()
+
+            parent = await self.get_by_id(unit.parent_id) if unit.parent_id else None
+            unit.path = build_path(unit.id, parent.path if parent else None)
+
+            await self._db.commit()
+        except IntegrityError:
+            await self._db.rollback()
+            raise _write_conflict()
         await self._db.refresh(unit)
+        await caches.invalidate("units", unit.id)
+        await audit_log.record("unit.create", "unit", unit.id, code=unit.code)
         return unit
     
     async def get_by_id(self, unit_id: int) -> Optional[Unit]:
@@ -29,6 +55,23 @@ class UnitRepository:
         query = select(Unit)
         result = await self._db.exec(query)
         return result.all()
+
+    async def get_subtree(self, path: str) -> List[Unit]:
+        """Get a unit and all of its descendants"""
+        query = select(Unit).where(in_subtree(path)).order_by(Unit.path)
+        result = await self._db.exec(query)
+        return result.all()
+
+    async def get_subtree_ids(self, path: str) -> List[int]:
+        """Get ids of a unit and all of its descendants"""
+        query = select(Unit.id).where(in_subtree(path))
+        result = await self._db.exec(query)
+        return result.all()
+
+    async def has_children(self, unit_id: int) -> bool:
+        query = select(Unit.id).where(Unit.parent_id == unit_id).limit(1)
+        result = await self._db.exec(query)
+        return result.first() is not None
     
     async def update(self, unit_id: int, unit_data: UnitUpdate) -> Optional[Unit]:
         unit = await self.get_by_id(unit_id)
@@ -36,11 +79,34 @@ class UnitRepository:
             return None
             
         update_data = unit_data.model_dump(exclude_unset=True)
+        fields = sorted(update_data)
+
+        # Moving a unit rewrites the path prefix of its whole subtree in one UPDATE
+        if "parent_id" in update_data and update_data["parent_id"] != unit.parent_id:
+            parent_id = update_data.pop("parent_id")
+            parent = await self.get_by_id(parent_id) if parent_id else None
+            old_path = unit.path
+            new_path = build_path(unit.id, parent.path if parent else None)
+
+            await self._db.execute(
+                update(Unit)
+                .where(in_subtree(old_path))
+                .values(path=literal(new_path, String) + func.substr(Unit.path, len(old_path) + 1, type_=String))
+                .execution_options(synchronize_session=False)
+            )
+            unit.parent_id = parent_id
+
         for key, value in update_data.items():
             setattr(unit, key, value)
             
-        await self._db.commit()
+        try:
+            await self._db.commit()
+        except IntegrityError:
+            await self._db.rollback()
+            raise _write_conflict()
         await self._db.refresh(unit)
+        await caches.invalidate("units", unit_id)
+        await audit_log.record("unit.update", "unit", unit_id, fields=fields)
         return unit
     
     async def delete(self, unit_id: int) -> bool:
@@ -50,4 +116,6 @@ class UnitRepository:
             
         await self._db.delete(unit)
         await self._db.commit()
-        return True
\ No newline at end of file
+        await caches.invalidate("units", unit_id)
+        await audit_log.record("unit.delete", "unit", unit_id)
+        return True
@@ -1,20 +1,68 @@
 from typing import Optional, List
-from fastapi import HTTPException
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, insert
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
 
 from src.models.user import User
 from src.models.role import Role
 from src.models.unit import Unit
 from src.models.user import UserRole
+from src.models.user_identity import UserIdentity
 from src.schemas.user import UserCreate, UserUpdate, UserResponse
+from src.core.audit import audit_log
+from src.core.metrics import instrument_repository
 
+# Loader strategy per use case. Each one fetches users, their roles and
+# their unit in a fixed number of queries however many users match.
+USER_LOADERS = {
+  # Many users: one extra SELECT ... IN per relationship, no row fan-out
+  "list": (selectinload(User.roles), selectinload(User.unit)),
+  # Single user: unit is many-to-one, so join it into the main query
+  "detail": (selectinload(User.roles), joinedload(User.unit)),
+  # Login, refresh and token verification: everything token claims need
+  "auth": (selectinload(User.roles), joinedload(User.unit)),
+}
+
+def _write_conflict() -> HTTPException:
+  # Only reachable when a role/unit vanished, or the email was taken, after validation
+  return HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail="Email already registered or unknown role/unit"
+  )
+
+@instrument_repository("user")
 class UserRepository:
   def __init__(self, db: AsyncSession):
     self.db = db
 
+  async def _add_roles(self, user_id: int, role_ids: List[int]) -> None:
+    """Link roles to a user with one multi-row INSERT"""
+    role_ids = set(role_ids)
+    if role_ids:
+      await self.db.exec(insert(UserRole), params=[{"user_id": user_id, "role_id": role_id} for role_id in role_ids])
+
+  async def _set_roles(self, user_id: int, role_ids: List[int]) -> None:
+    """Replace a user's role links with one DELETE and one multi-row INSERT"""
+    await self.db.exec(delete(UserRole).where(UserRole.user_id == user_id))
+    await self._add_roles(user_id, role_ids)
+
+  async def _reload(self, user_id: int) -> Optional[User]:
+    # populate_existing: the identity map still holds the pre-write roles/unit
+    query = (
+      select(User)
+      .options(*USER_LOADERS["detail"])
+      .where(User.id == user_id)
+      .execution_options(populate_existing=True)
+    )
+    result = await self.db.exec(query)
+    return result.one_or_none()
+
   async def create(self, user_data: UserCreate) -> User:
+    # Roles and unit are validated by the caller (see UserService); user and
+    # links are written in one transaction, so a bad reference leaves nothing behind
     user = User(
       email=user_data.email,
       first_name=user_data.first_name,
@@ -22,30 +70,56 @@ class UserRepository:
       unit_id=user_data.unit_id,
     )
     self.db.add(user)
-    await self.db.commit()
-    await self.db.refresh(user)
-
-    # Add roles
-    for role_id in user_data.roles:
-      user_role = UserRole(user_id=user.id, role_id=role_id)
-      self.db.add(user_role)
-    await self.db.commit()
+    try:
+      # Flush for the id without committing; a new user has no links to replace
+      await self.db.flush()
+      await self._add_roles(user.id, user_data.roles)
+      await self.db.commit()
+    except IntegrityError:
+      await self.db.rollback()
+      raise _write_conflict()
+    await audit_log.record("user.create", "user", user.id)
 
-    return await self.get_by_id(user.id)
+    return await self._reload(user.id)
   
-  async def get_by_id(self, user_id: int) -> Optional[User]:
-    query = select(User).options(selectinload(User.roles)).where(User.id == user_id)
+  async def get_by_id(self, user_id: int, loader: str = "detail") -> Optional[User]:
+    query = select(User).options(*USER_LOADERS[loader]).where(User.id == user_id)
 
     result = await self.db.exec(query)
     return result.one_or_none()
   
-  async def get_by_email(self, email: str) -> Optional[User]:
-    query = select(User).where(User.email == email)
+  async def get_by_email(self, email: str, loader: Optional[str] = None) -> Optional[User]:
+    query = select(User).where(func.lower(User.email) == email.lower())
+    if loader:
+      query = query.options(*USER_LOADERS[loader])
+    result = await self.db.exec(query)
+    return result.one_or_none()
+  
+  async def get_by_google_id(self, google_id: str, loader: Optional[str] = None) -> Optional[User]:
+    query = select(User).where(User.google_id == google_id)
+    if loader:
+      query = query.options(*USER_LOADERS[loader])
+    result = await self.db.exec(query)
+    return result.one_or_none()
+  
+  async def get_by_identity(self, provider: str, subject: str, loader: Optional[str] = None) -> Optional[User]:
+    query = (
+      select(User)
+      .join(UserIdentity, UserIdentity.user_id == User.id)
+      .where(UserIdentity.provider == provider, UserIdentity.subject == subject)
+    )
+    if loader:
+      query = query.options(*USER_LOADERS[loader])
     result = await self.db.exec(query)
     return result.one_or_none()
   
-  async def get_all(self) -> List[User]:
-    query = select(User).options(selectinload(User.roles))
+  async def get_all(self, loader: str = "list") -> List[User]:
+    query = select(User).options(*USER_LOADERS[loader])
+    result = await self.db.exec(query)
+    return result.all()
+  
+  async def get_by_unit_ids(self, unit_ids: List[int], loader: str = "list") -> List[User]:
+    query = select(User).where(User.unit_id.in_(unit_ids)).options(*USER_LOADERS[loader])
     result = await self.db.exec(query)
     return result.all()
   
@@ -55,30 +129,25 @@ class UserRepository:
       return None
     
     update_data = user_data.model_dump(exclude_unset=True)
+    fields = sorted(update_data)
 
-    # Handle role updates if provided
-    if "roles" in update_data:
-      roles = update_data.pop("roles")
-
-      # Remove existing roles
-      delete_query = select(UserRole).where(UserRole.user_id == user_id)
-      existing_roles = await self.db.exec(delete_query)
-      for user_role in existing_roles.scalars().all():
-        await self.db.delete(user_role)
-
-      # Add new roles
-      for role_id in roles:
-        user_role = UserRole(user_id=user_id, role_id=role_id)
-        self.db.add(user_role)
-    
     # Update user fields
+    roles = update_data.pop("roles", None)
     for key, value in update_data.items():
       setattr(user, key, value)
-    
-    await self.db.commit()
-    await self.db.refresh(user)
 
-    return user
+    # Replace role links in the same transaction as the field changes
+    try:
+      await self.db.flush()
+      if roles is not None:
+        await self._set_roles(user_id, roles)
+      await self.db.commit()
+    except IntegrityError:
+      await self.db.rollback()
+      raise _write_conflict()
+    await audit_log.record("user.update", "user", user_id, fields=fields)
+
+    return await self._reload(user_id)
   
   async def delete(self, user_id: int) -> bool:
     user = await self.get_by_id(user_id)
@@ -87,6 +156,7 @@ class UserRepository:
     
     await self.db.delete(user)
     await self.db.commit()
+    await audit_log.record("user.delete", "user", user_id)
     return True
   
   async def update_google_id(self, user_id: int, google_id: str) -> Optional[User]:
@@ -95,6 +165,18 @@ class UserRepository:
       user.google_id = google_id
       await self.db.commit()
       await self.db.refresh(user)
+      await audit_log.record("user.link_google", "user", user_id, actor_id=user_id)
       return user
     return user
 
+  async def link_identity(self, user_id: int, provider: str, subject: str) -> bool:
+    """Link a provider account to a user; False if either side is already linked"""
+    self.db.add(UserIdentity(user_id=user_id, provider=provider, subject=subject))
+    try:
+      await self.db.commit()
+    except IntegrityError:
+      await self.db.rollback()
+      return False
+    await audit_log.record("user.link_identity", "user", user_id, actor_id=user_id, provider=provider)
+    return True
+
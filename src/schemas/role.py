@@ -1,21 +1,37 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+
+from src.auth.permissions import compile_permissions, permission_names
 
 class RoleBase(BaseModel):
     name: str
 
 class RoleCreate(RoleBase):
-    pass
+    permissions: List[str] = []
+
+    @field_validator("permissions")
+    @classmethod
+    def validate_permissions(cls, value: Optional[List[str]]) -> Optional[List[str]]:
+        if value is not None:
+            compile_permissions(value)
+        return value
 
 class RoleResponse(RoleBase):
     id: int
+    permissions: List[str] = []
     created_at: datetime
     updated_at: datetime
 
+    @field_validator("permissions", mode="before")
+    @classmethod
+    def expand_permissions(cls, value):
+        return permission_names(value) if isinstance(value, int) else value
+
 
-class RoleUpdate(RoleBase):
+class RoleUpdate(RoleCreate):
     name: Optional[str] = None
+    permissions: Optional[List[str]] = None
     
 
 
@@ -15,8 +15,27 @@ class TokenVerifyResponse(BaseModel):
     is_valid: bool
     payload: TokenPayload
 
+class SessionResponse(BaseModel):
+    id: str
+    # Absent for sessions started before the session registry existed
+    created_at: Optional[int] = None
+    refreshed_at: int
+    expires_at: int
+    ip: Optional[str] = None
+    user_agent: Optional[str] = None
+
 class GoogleTokenData(BaseModel):
     email: EmailStr
     google_id: str
+    email_verified: bool = False
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+class OAuthUserData(BaseModel):
+    provider: str
+    email: EmailStr
+    subject: str
+    # As reported by the provider
+    email_verified: bool = False
     first_name: Optional[str] = None
     last_name: Optional[str] = None
\ No newline at end of file
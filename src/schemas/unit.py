@@ -5,17 +5,20 @@ from typing import Optional
 class UnitBase(BaseModel):
     name: str
     code: str
+    parent_id: Optional[int] = None
 
 class UnitCreate(UnitBase):
     pass
 
 class UnitResponse(UnitBase):
     id: int
+    path: str
     created_at: datetime
     updated_at: datetime
 
 class UnitUpdate(UnitBase):
     name: Optional[str] = None
     code: Optional[str] = None
+    parent_id: Optional[int] = None
   
 
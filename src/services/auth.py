@@ -1,16 +1,31 @@
 # src/services/auth.py
 from datetime import timedelta
+from typing import Dict, List, NoReturn, Optional, Tuple
 from fastapi import HTTPException, status
+from sqlalchemy import inspect
 from sqlmodel.ext.asyncio.session import AsyncSession
 import redis.asyncio as redis
 
+from src.core.audit import audit_log
 from src.core.config import settings
+from src.core.metrics import AUTH_FAILURES
+from src.auth.permissions import ALL_PERMISSIONS, encode_permissions
+from src.auth.oauth import oauth_provider
 from src.auth.security import SecurityService
 from src.auth.jwt import JWTHandler
 from src.models.user import User
 from src.repositories.user import UserRepository
-from src.schemas.token import TokenResponse, GoogleTokenData
-from src.services.token import TokenBlacklistService
+from src.schemas.token import TokenResponse, TokenPayload, TokenVerifyResponse, GoogleTokenData, OAuthUserData
+from src.services.introspection import IntrospectionService
+from src.services.revocation import RevocationStreamService
+from src.services.token import AccessTokenService, TokenBlacklistService, RefreshTokenFamilyService
+from src.services.rate_limit import RateLimitService
+from src.utils.singleflight import SingleFlight
+
+# Concurrent callbacks for the same identity (front-end retries) share one
+# user lookup and claim build; each caller still gets its own tokens and
+# refresh family, so rotating one never looks like reuse of another
+_login_flight = SingleFlight()
 
 class AuthService:
     def __init__(
@@ -20,84 +35,169 @@ class AuthService:
     ):
         self._db = db
         self._repository = UserRepository(db)
-        self._security = SecurityService(db)
+        self._security = SecurityService(db, redis_client)
         self._jwt_handler = JWTHandler()
         self._blacklist = TokenBlacklistService(redis_client) if redis_client else None
+        self._rate_limiter = RateLimitService(redis_client) if redis_client else None
+        self._refresh_families = RefreshTokenFamilyService(redis_client) if redis_client else None
+        self._access_tokens = AccessTokenService(redis_client)
+        self._introspection = IntrospectionService(redis_client) if redis_client else None
+        self._revocations = RevocationStreamService(redis_client) if redis_client else None
 
-    async def _prepare_token_data(self, user: User) -> dict:
-        """Prepare token payload data from user"""
-        # Pastikan relasi sudah diload sebelum diakses
-        # Gunakan refresh untuk memastikan relasi diload dengan benar
-        await self._db.refresh(user, ["roles", "unit"])
-        
-        # Get user roles asynchronously setelah dipastikan sudah diload
-        role_data = []
-        if hasattr(user, "roles") and user.roles is not None:
-            role_data = [
-                {
-                    "id": role.id,
-                    "name": role.name
-                } for role in user.roles
-            ]
-        
-        # Get user unit asynchronously
-        unit_data = None
-        if hasattr(user, "unit") and user.unit is not None:
-            unit_data = {
-                "id": user.unit.id,
-                "code": user.unit.code,
-                "name": user.unit.name
-            }
-
-        return {
+    async def _prepare_token_data(self, user: User, profile: Optional[str] = None) -> dict:
+        """Prepare token payload data from user for a claim profile"""
+        profile = profile or settings.TOKEN_CLAIM_PROFILE
+
+        # Callers normally pass a user loaded with the "auth" loader; only
+        # hit the database for relationships that are still unloaded
+        unloaded = inspect(user).unloaded & {"roles", "unit"}
+        if unloaded:
+            await self._db.refresh(user, list(unloaded))
+        roles = user.roles or []
+
+        # Effective permissions are OR'd once here, so checks need no lookups
+        permissions = ALL_PERMISSIONS if user.is_superuser else 0
+        for role in roles:
+            permissions |= role.permissions
+
+        # minimal: what authorization needs, ids only
+        claims = {
             "sub": user.email,
             "user_id": user.id,
+            "perms": encode_permissions(permissions),
+        }
+        if profile == "minimal":
+            return claims
+
+        # standard: plus unit (with its path, so resource servers can check
+        # "unit X or below" locally) and role names
+        unit = user.unit
+        claims.update({
+            "unit": {"id": unit.id, "code": unit.code, "path": unit.path} if unit else None,
+            "roles": [role.name for role in roles],
+        })
+        if profile == "standard":
+            return claims
+
+        # full: everything, for consumers that render user details from the token
+        if unit:
+            claims["unit"]["name"] = unit.name
+        claims.update({
             "email": user.email,
             "is_active": user.is_active,
             "is_superuser": user.is_superuser,
-            "unit": unit_data,
-            "roles": role_data,
+            "roles": [{"id": role.id, "name": role.name} for role in roles],
             "first_name": user.first_name,
-            "last_name": user.last_name
-        }
-
+            "last_name": user.last_name,
+        })
+        return claims
 
     async def verify_google_token(self, token: str) -> GoogleTokenData:
         return await self._security.verify_google_token(token)
 
-    async def get_or_create_user(self, user_data: GoogleTokenData) -> User:
-        user = await self._repository.get_by_email(user_data.email)
+    @staticmethod
+    async def _deny_login(reason: str, provider: str, email: str, detail: str) -> NoReturn:
+        AUTH_FAILURES.labels(reason).inc()
+        await audit_log.record("auth.login_denied", provider=provider, email=email, reason=reason)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=detail
+        )
 
+    async def _get_unlinked_user(self, provider: str, email: str, email_verified: bool) -> User:
+        """User to link a provider account to on its first login, matched by email
+
+        Anyone can claim an address at a provider that does not verify it,
+        so the match requires a verified address unless the provider's
+        config says every address it returns is verified.
+        """
+        if not email_verified and oauth_provider.get_config(provider).require_verified_email:
+            await self._deny_login("unverified_email", provider, email, "Email address is not verified by the provider")
+
+        user = await self._repository.get_by_email(email, loader="auth")
         # Jika email tidak ditemukan, tolak akses
         if not user:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Email is not registered. Contact admin."
-            )
+            await self._deny_login("unregistered_email", provider, email, "Email is not registered. Contact admin.")
+        return user
+
+    async def get_or_create_user(self, user_data: GoogleTokenData) -> User:
+        # Linked accounts are found by their stable Google id; email is the fallback
+        user = await self._repository.get_by_google_id(user_data.google_id, loader="auth")
+        if user:
+            return user
+
+        user = await self._get_unlinked_user("google", user_data.email, user_data.email_verified)
+
+        if user.google_id:
+            await self._deny_login("identity_mismatch", "google", user_data.email, "Account is linked to a different google account")
 
         # Jika email ditemukan tetapi google_id masih kosong, update google_id
-        if not user.google_id:
-            user = await self._repository.update_google_id(user.id, user_data.google_id)
+        return await self._repository.update_google_id(user.id, user_data.google_id)
 
+    async def get_provider_user(self, user_data: OAuthUserData) -> User:
+        """Resolve the user behind a provider account, linking it on first login"""
+        if user_data.provider == "google":
+            return await self.get_or_create_user(GoogleTokenData(
+                email=user_data.email,
+                google_id=user_data.subject,
+                email_verified=user_data.email_verified,
+                first_name=user_data.first_name,
+                last_name=user_data.last_name
+            ))
+
+        # Linked accounts are found by (provider, subject), never by email again
+        user = await self._repository.get_by_identity(user_data.provider, user_data.subject, loader="auth")
+        if user:
+            return user
+
+        user = await self._get_unlinked_user(user_data.provider, user_data.email, user_data.email_verified)
+        if not await self._repository.link_identity(user.id, user_data.provider, user_data.subject):
+            # Either a concurrent first login linked this account already, or
+            # the user is linked to a different account at this provider
+            user = await self._repository.get_by_identity(user_data.provider, user_data.subject, loader="auth")
+            if not user:
+                await self._deny_login(
+                    "identity_mismatch", user_data.provider, user_data.email,
+                    f"Account is linked to a different {user_data.provider} account"
+                )
         return user
 
-    async def create_tokens(self, user: User) -> TokenResponse:
-        """Create access and refresh tokens with complete user data"""
-        # Verify user is active
-        if not user.is_active:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Inactive user"
-            )
+    async def login(self, user_data: OAuthUserData, client: Optional[Dict[str, str]] = None) -> TokenResponse:
+        """Resolve the user behind a verified identity and issue tokens"""
+        identity = f"{user_data.provider}:{user_data.subject}"
+        if self._rate_limiter:
+            await self._rate_limiter.hit_identity("callback", identity)
+
+        async def resolve() -> Tuple[User, dict]:
+            user = await self.get_provider_user(user_data)
+            return user, await self._prepare_token_data(user)
+
+        user, claims = await _login_flight.do(identity, resolve)
+        tokens = await self.create_tokens(user, client=client, claims=claims)
+        await audit_log.record("auth.login", "user", user.id, actor_id=user.id, provider=user_data.provider)
+        return tokens
+
+    async def create_tokens(
+        self,
+        user: User,
+        family_id: Optional[str] = None,
+        jti: Optional[str] = None,
+        client: Optional[Dict[str, str]] = None,
+        claims: Optional[dict] = None
+    ) -> TokenResponse:
+        """Create access and refresh tokens with complete user data
+
+        Without family_id a new refresh token family is started (login);
+        refresh passes the family and the id it just rotated to. claims
+        skips rebuilding the access token claims when the caller has them.
+        """
+        self._check_active(user)
 
         # Prepare token data
-        token_data = await self._prepare_token_data(user)
+        token_data = claims if claims is not None else await self._prepare_token_data(user)
         
-        # Create access token menggunakan JWTHandler
-        access_token = self._jwt_handler.create_token(
-            data=token_data,
-            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        )
+        # Create access token (JWT or opaque reference, per ACCESS_TOKEN_FORMAT)
+        access_token = await self._access_tokens.issue(token_data)
 
         # Create refresh token - only include minimal data
         refresh_token_data = {
@@ -105,6 +205,11 @@ class AuthService:
             "user_id": user.id,
             "token_type": "refresh"
         }
+        if self._refresh_families:
+            if family_id is None:
+                family_id, jti = await self._refresh_families.create_family(user.id, client)
+            refresh_token_data.update({"fid": family_id, "jti": jti})
+
         refresh_token = self._jwt_handler.create_token(
             data=refresh_token_data,
             expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
@@ -116,8 +221,27 @@ class AuthService:
             token_type="bearer"
         )
 
+    @staticmethod
+    def _check_active(user: User) -> None:
+        if not user.is_active:
+            AUTH_FAILURES.labels("inactive_user").inc()
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Inactive user"
+            )
+
+    def _decode_refresh_token(self, refresh_token: str) -> dict:
+        """Decode a refresh token and check its type"""
+        payload = self._jwt_handler.decode_token(refresh_token)
+        if payload.get("token_type") != "refresh":
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token type"
+            )
+        return payload
+
     async def refresh_access_token(self, refresh_token: str) -> TokenResponse:
-        """Get new access token using refresh token"""
+        """Rotate a refresh token and issue a new token pair"""
         # Verify refresh token is not blacklisted
         if self._blacklist and await self._blacklist.is_blacklisted(refresh_token):
             raise HTTPException(
@@ -127,34 +251,136 @@ class AuthService:
 
         # Decode and verify refresh token menggunakan JWTHandler
         try:
-            payload = self._jwt_handler.decode_token(refresh_token)
-            if payload.get("token_type") != "refresh":
+            payload = self._decode_refresh_token(refresh_token)
+
+            if self._rate_limiter:
+                await self._rate_limiter.hit_identity("refresh", str(payload.get("user_id")))
+
+            family_id, new_jti = payload.get("fid"), None
+            # Tokens issued before rotation existed carry no family
+            if self._refresh_families and (not family_id or not payload.get("jti")):
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid token type"
+                    detail="Refresh token is no longer valid, please sign in again"
                 )
-            
-            # Get user and create new tokens
+
+            # Check the user before rotating: a refresh that cannot issue
+            # tokens must not burn the token or extend the session
             user = await self._security.get_user_by_email(payload["sub"])
             if not user:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="User not found"
                 )
-                
-            return await self.create_tokens(user)
+            self._check_active(user)
+
+            if self._refresh_families:
+                new_jti = self._refresh_families.new_id()
+                result = await self._refresh_families.rotate(family_id, user.id, payload["jti"], new_jti)
+                if result == RefreshTokenFamilyService.REUSED:
+                    AUTH_FAILURES.labels("refresh_reuse").inc()
+                    await audit_log.record(
+                        "auth.refresh_reuse", "user", payload.get("user_id"),
+                        actor_id=payload.get("user_id"), family=family_id
+                    )
+                    raise HTTPException(
+                        status_code=status.HTTP_401_UNAUTHORIZED,
+                        detail="Refresh token reuse detected, session revoked"
+                    )
+                if result != RefreshTokenFamilyService.ROTATED:
+                    raise HTTPException(
+                        status_code=status.HTTP_401_UNAUTHORIZED,
+                        detail="Refresh token has been revoked"
+                    )
+
+            tokens = await self.create_tokens(user, family_id=family_id, jti=new_jti)
+            await audit_log.record("auth.refresh", "user", user.id, actor_id=user.id, family=family_id)
+            return tokens
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=f"Could not validate credentials: {str(e)}"
             )
 
+    async def revoke_refresh_token(self, refresh_token: str) -> None:
+        """Revoke the refresh token family the token belongs to"""
+        payload = self._decode_refresh_token(refresh_token)
+        family_id = payload.get("fid")
+
+        if self._refresh_families and family_id:
+            await self._refresh_families.revoke_family(family_id)
+        else:
+            await self.blacklist_token(refresh_token, is_refresh_token=True)
+        await audit_log.record("auth.refresh_revoked", "user", payload.get("user_id"), family=family_id)
+
+    async def list_sessions(self, user: User) -> List[Dict]:
+        """Live sessions (refresh token families) of a user"""
+        return await self._refresh_families.list_sessions(user.id) if self._refresh_families else []
+
+    async def revoke_session(self, user: User, session_id: str) -> None:
+        """Sign one device out; its access token stays valid until it expires"""
+        if not self._refresh_families or not await self._refresh_families.is_session_of(session_id, user.id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
+            )
+        await self._refresh_families.revoke_family(session_id)
+        await audit_log.record("auth.session_revoked", "user", user.id, family=session_id)
+
+    async def revoke_all_sessions(self, user: User) -> int:
+        """Sign every device of a user out"""
+        if not self._refresh_families:
+            return 0
+        revoked = await self._refresh_families.revoke_all_sessions(user.id)
+        await audit_log.record("auth.sessions_revoked", "user", user.id, count=revoked)
+        return revoked
+
     async def blacklist_token(self, token: str, is_refresh_token: bool = False) -> None:
-        """Blacklist access or refresh token"""
+        """Blacklist access or refresh token
+
+        Access tokens must be live (401 otherwise), so arbitrary strings
+        never reach the blacklist or the shared revocation stream. Refresh
+        tokens come from revoke_refresh_token, which verified them.
+        """
+        # Looked up before the revoke below drops a reference token's claims
+        if is_refresh_token:
+            user_id = await self._access_tokens.user_id_of(token)
+        else:
+            user_id = (await self._access_tokens.resolve(token)).get("user_id")
         if self._blacklist:
             expires_in = settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400 if is_refresh_token else settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
-            await self._blacklist.add_to_blacklist(token, expires_in)
+            await self._blacklist.add_to_blacklist(token, expires_in, user_id)
+            # Refresh tokens never reach resource servers, so only access tokens are announced
+            if not is_refresh_token:
+                await self._revocations.publish_token(token, expires_in)
+        await self._access_tokens.revoke(token)
+        if self._introspection:
+            await self._introspection.invalidate(token)
+        await audit_log.record(
+            "auth.token_revoked",
+            "user",
+            user_id,
+            actor_id=user_id,
+            token_type="refresh" if is_refresh_token else "access"
+        )
+
+    async def verify_token(self, token: str) -> TokenVerifyResponse:
+        """Verify an access token, reusing cached introspection results"""
+        if self._introspection:
+            claims = await self._introspection.introspect(token)
+            if not claims["active"]:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Token is invalid or has been revoked",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+        else:
+            claims = await self._access_tokens.resolve(token)
+
+        return TokenVerifyResponse(is_valid=True, payload=TokenPayload(**claims))
 
     async def is_token_blacklisted(self, token: str) -> bool:
         return await self._blacklist.is_blacklisted(token) if self._blacklist else False
\ No newline at end of file
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from src.core.config import settings
+from src.core.database import get_engine
+from src.core.metrics import record_cache
+from src.core.redis import get_redis
+from src.utils.singleflight import SingleFlight
+
+_probe_flight = SingleFlight()
+_cached_result: Optional[Dict[str, Any]] = None
+_cached_at = 0.0
+
+async def _check_postgres() -> None:
+    async with get_engine().connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+async def _check_redis() -> None:
+    redis_client = await get_redis()
+    await redis_client.ping()
+
+class ReadinessService:
+    """Dependency checks for the readiness probe.
+
+    Results are cached for READINESS_CACHE_SECONDS and concurrent probes
+    share one check, so a probe flood costs at most one query per interval.
+    """
+
+    checks: Dict[str, Callable[[], Awaitable[None]]] = {
+        "postgres": _check_postgres,
+        "redis": _check_redis,
+    }
+
+    @staticmethod
+    async def _probe(check: Callable[[], Awaitable[None]]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(check(), timeout=settings.READINESS_TIMEOUT_SECONDS)
+            healthy, error = True, None
+        except asyncio.TimeoutError:
+            healthy, error = False, "timeout"
+        except Exception as e:
+            healthy, error = False, type(e).__name__
+
+        result = {
+            "healthy": healthy,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+        if error:
+            result["error"] = error
+        return result
+
+    async def _run_checks(self) -> Dict[str, Any]:
+        global _cached_result, _cached_at
+        names = list(self.checks)
+        results = await asyncio.gather(*(self._probe(self.checks[name]) for name in names))
+        dependencies = dict(zip(names, results))
+
+        _cached_result = {
+            "ready": all(result["healthy"] for result in results),
+            "dependencies": dependencies,
+        }
+        _cached_at = time.monotonic()
+        return _cached_result
+
+    async def check(self) -> Dict[str, Any]:
+        """Get dependency health, from cache when fresh"""
+        if _cached_result is not None and time.monotonic() - _cached_at < settings.READINESS_CACHE_SECONDS:
+            record_cache("readiness", True)
+            return _cached_result
+        record_cache("readiness", False)
+        return await _probe_flight.do("readiness", self._run_checks)
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import time
+from typing import Dict, List
+from fastapi import HTTPException
+import redis.asyncio as redis
+
+from src.core.config import settings
+from src.core.metrics import record_cache
+from src.services.revocation import RevocationStreamService
+from src.services.token import AccessTokenService, TokenBlacklistService, token_digest
+
+INACTIVE = {"active": False}
+
+class IntrospectionService:
+    """
+    RFC 7662 token introspection backed by a short-lived result cache
+
+    Results, inactive ones included, are cached under the token digest for
+    at most INTROSPECTION_CACHE_SECONDS and never past the token's own
+    expiry. Revoking a token overwrites its entry with an inactive result;
+    lookups only ever add missing entries, so one that started before the
+    revocation cannot put the token back.
+    """
+
+    def __init__(self, redis: redis.Redis):
+        self._redis = redis
+        self._prefix = "introspect:"
+        self._blacklist = TokenBlacklistService(redis)
+        self._access_tokens = AccessTokenService(redis)
+        self._revocations = RevocationStreamService(redis)
+
+    def _key(self, token: str) -> str:
+        return f"{self._prefix}{token_digest(token)}"
+
+    async def introspect(self, token: str) -> Dict:
+        """Introspection response for one token"""
+        return (await self.introspect_many([token]))[0]
+
+    async def introspect_many(self, tokens: List[str]) -> List[Dict]:
+        """Introspection responses in request order, with one cache read for the batch"""
+        keys = [self._key(token) for token in tokens]
+        results: List[Dict] = [INACTIVE] * len(tokens)
+
+        misses = []
+        for index, value in enumerate(await self._redis.mget(keys)):
+            record_cache("introspection", value is not None)
+            if value is None:
+                misses.append(index)
+            else:
+                results[index] = json.loads(value)
+        if misses:
+            await self._fill(tokens, keys, misses, results)
+
+        # User watermarks are checked on every call, so cached results never
+        # outlive a deactivation
+        user_ids = list({result["user_id"] for result in results if result.get("user_id") is not None})
+        watermarks = await self._revocations.user_watermarks(user_ids)
+        return [
+            INACTIVE if self._revocations.is_revoked(result, watermarks) else result
+            for result in results
+        ]
+
+    async def _fill(self, tokens: List[str], keys: List[str], misses: List[int], results: List[Dict]) -> None:
+        """Evaluate cache misses in place and write them back in one pipeline"""
+        revoked = await self._blacklist.are_blacklisted([tokens[i] for i in misses])
+        evaluated = await asyncio.gather(*(
+            self._evaluate(tokens[i]) for i, is_revoked in zip(misses, revoked) if not is_revoked
+        ))
+        live = iter(evaluated)
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for index, is_revoked in zip(misses, revoked):
+                result = INACTIVE if is_revoked else next(live)
+                results[index] = result
+                ttl = self._ttl(result)
+                if ttl > 0:
+                    pipe.set(keys[index], json.dumps(result, separators=(",", ":"), default=str), ex=ttl, nx=True)
+            await pipe.execute()
+
+    async def _evaluate(self, token: str) -> Dict:
+        try:
+            claims = await self._access_tokens.resolve(token)
+        except HTTPException:
+            # Also refresh tokens: only ever presented back to us, never to resource servers
+            return INACTIVE
+
+        return {
+            **claims,
+            "active": True,
+            "token_type": "Bearer",
+            "username": claims.get("sub"),
+        }
+
+    @staticmethod
+    def _ttl(result: Dict) -> int:
+        ttl = settings.INTROSPECTION_CACHE_SECONDS
+        if result.get("exp"):
+            ttl = min(ttl, int(result["exp"] - time.time()))
+        return ttl
+
+    async def invalidate(self, token: str) -> None:
+        """Cache a token as inactive, e.g. after revocation"""
+        ttl = settings.INTROSPECTION_CACHE_SECONDS
+        if ttl > 0:
+            await self._redis.set(self._key(token), json.dumps(INACTIVE), ex=ttl)
+        else:
+            await self._redis.delete(self._key(token))
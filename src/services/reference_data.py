@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Iterable, List, Mapping, Optional, Set
+
+from fastapi import HTTPException, status
+
+from src.core.cache import caches
+from src.core.config import settings
+from src.core.database import get_session
+from src.models.role import Role
+from src.models.unit import Unit
+from src.repositories.role import RoleRepository
+from src.repositories.unit import UnitRepository
+from src.utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    """
+    Every role and unit at one point in time
+
+    The mappings are read-only and the instances are detached from any
+    session; treat them as values; never modify or add them to a session.
+    """
+
+    roles: Mapping[int, Role]
+    roles_by_name: Mapping[str, Role]
+    units: Mapping[int, Unit]
+    units_by_code: Mapping[str, Unit]
+    # Distinct for every load, so values derived from a snapshot can be keyed by it
+    version: int = 0
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def build(cls, roles: Iterable[Role], units: Iterable[Unit], version: int = 0) -> "ReferenceSnapshot":
+        roles, units = list(roles), list(units)
+        return cls(
+            roles=MappingProxyType({role.id: role for role in roles}),
+            roles_by_name=MappingProxyType({role.name: role for role in roles}),
+            units=MappingProxyType({unit.id: unit for unit in units}),
+            units_by_code=MappingProxyType({unit.code: unit for unit in units}),
+            version=version,
+        )
+
+    def all_roles(self) -> List[Role]:
+        return list(self.roles.values())
+
+    def all_units(self) -> List[Unit]:
+        return list(self.units.values())
+
+    def subtree(self, path: str) -> List[Unit]:
+        """A unit and all of its descendants, ordered by path"""
+        return sorted((unit for unit in self.units.values() if unit.path.startswith(path)), key=lambda unit: unit.path)
+
+class ReferenceData:
+    """
+    Per-worker snapshot of roles and units, served with no I/O
+
+    Loaded at warm-up (or on first use) and rebuilt in the background
+    whenever the "roles" or "units" cache topic is invalidated, in this
+    worker or any other. Readers keep the old snapshot until the rebuild
+    replaces it in one assignment, so they see either the old or the new
+    data, never a mix, and never wait for the database.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._generation = 0
+        self._loads = 0
+        self._flight = SingleFlight()
+        self._rebuild: Optional[asyncio.Task] = None
+
+    async def _load(self) -> ReferenceSnapshot:
+        self._loads += 1
+        version = self._loads
+        async with get_session() as session:
+            roles = await RoleRepository(session).get_all()
+            units = await UnitRepository(session).get_all()
+        return ReferenceSnapshot.build(roles, units, version)
+
+    async def get(self) -> ReferenceSnapshot:
+        """Current snapshot, loading it if there is none"""
+        return self._snapshot or await self.reload()
+
+    async def reload(self) -> ReferenceSnapshot:
+        """Load a fresh snapshot and swap it in"""
+        while True:
+            generation = self._generation
+            # Keyed by generation: a change while a load is in flight starts a new load
+            snapshot = await self._flight.do(str(generation), self._load)
+            if generation == self._generation:
+                self._snapshot = snapshot
+                return snapshot
+
+    async def _on_change(self, _key) -> None:
+        self._generation += 1
+        # Off the writer's request and the invalidation listener; a running
+        # rebuild sees the new generation and loads again
+        if self._rebuild is None or self._rebuild.done():
+            self._rebuild = asyncio.create_task(self._rebuild_snapshot())
+
+    async def _rebuild_snapshot(self) -> None:
+        try:
+            await self.reload()
+        except Exception:
+            # Readers keep the old snapshot until the next change or lookup miss
+            logger.warning("Reference data rebuild failed", exc_info=True)
+
+    async def stop(self) -> None:
+        """Cancel a rebuild still running (shutdown)"""
+        if self._rebuild is not None:
+            self._rebuild.cancel()
+            await asyncio.gather(self._rebuild, return_exceptions=True)
+            self._rebuild = None
+
+    async def require_roles(self, role_ids: Iterable[int]) -> None:
+        """Raise 400 unless every role id exists"""
+        missing = await self._missing(set(role_ids), lambda snapshot: snapshot.roles)
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown role ids: {sorted(missing)}"
+            )
+
+    async def require_unit(self, unit_id: Optional[int]) -> None:
+        """Raise 400 unless the unit exists (None is allowed)"""
+        if unit_id is None:
+            return
+        if await self._missing({unit_id}, lambda snapshot: snapshot.units):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unit not found"
+            )
+
+    async def _missing(self, ids: Set[int], mapping) -> Set[int]:
+        snapshot = await self.get()
+        missing = ids - mapping(snapshot).keys()
+        # Maybe created in another worker just now, before its invalidation
+        # arrived; reload at most once per interval so unknown ids cannot
+        # turn every request into a full reload
+        if missing and time.monotonic() - snapshot.loaded_at >= settings.REFERENCE_DATA_MIN_RELOAD_SECONDS:
+            missing = ids - mapping(await self.reload()).keys()
+        return missing
+
+reference_data = ReferenceData()
+caches.subscribe("roles", reference_data._on_change)
+caches.subscribe("units", reference_data._on_change)
@@ -0,0 +1,130 @@
+import time
+from typing import Dict, List, Optional, Tuple
+import redis.asyncio as redis
+
+from src.core.config import settings
+from src.services.token import token_digest
+
+class RevocationStreamService:
+    """
+    Feed of revocations for services that cache verified tokens
+
+    Events are appended to one Redis Stream, trimmed to roughly
+    REVOCATION_STREAM_MAXLEN entries, and read with XREAD from a cursor
+    (the last event id seen):
+
+    - {"type": "token", "digest": sha256 of the token, "exp": unix time}
+    - {"type": "user", "user_id": ..., "not_before": unix time}; every token
+      of the user with iat <= not_before is revoked
+    """
+
+    def __init__(self, redis: redis.Redis):
+        self._redis = redis
+        self._stream = "revocations:stream"
+        self._watermark_prefix = "revocations:user:"
+
+    async def publish_token(self, token: str, expires_in: int) -> None:
+        """Announce a revoked token by its digest"""
+        await self._redis.xadd(
+            self._stream,
+            {"type": "token", "digest": token_digest(token), "exp": int(time.time()) + expires_in},
+            maxlen=settings.REVOCATION_STREAM_MAXLEN,
+            approximate=True
+        )
+
+    async def publish_user(self, user_id: int) -> None:
+        """Revoke every token issued to a user so far"""
+        not_before = int(time.time())
+        async with self._redis.pipeline(transaction=False) as pipe:
+            # Kept as long as an access token issued before it can live
+            pipe.setex(
+                self.watermark_key(user_id),
+                settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+                not_before
+            )
+            pipe.xadd(
+                self._stream,
+                {"type": "user", "user_id": user_id, "not_before": not_before},
+                maxlen=settings.REVOCATION_STREAM_MAXLEN,
+                approximate=True
+            )
+            await pipe.execute()
+
+    def watermark_key(self, user_id: int) -> str:
+        return f"{self._watermark_prefix}{user_id}"
+
+    async def user_watermarks(self, user_ids: List[int]) -> Dict[int, int]:
+        """Current not_before per user, for the users that have one"""
+        if not user_ids:
+            return {}
+        values = await self._redis.mget([self.watermark_key(user_id) for user_id in user_ids])
+        return {user_id: int(value) for user_id, value in zip(user_ids, values) if value is not None}
+
+    @staticmethod
+    def user_id_of(claims: Dict) -> Optional[int]:
+        """The claims' user id, or None when missing or malformed"""
+        user_id = claims.get("user_id")
+        return user_id if isinstance(user_id, int) and not isinstance(user_id, bool) else None
+
+    @classmethod
+    def is_revoked(cls, claims: Dict, watermarks: Dict[int, int]) -> bool:
+        """
+        Whether a user watermark covers the token; tokens without iat predate watermarks
+
+        Claims may be unverified: a malformed user_id or iat counts as not
+        covered, and verification rejects the token.
+        """
+        not_before = watermarks.get(cls.user_id_of(claims))
+        iat = claims.get("iat", 0)
+        if not_before is None or isinstance(iat, bool) or not isinstance(iat, (int, float)):
+            return False
+        return iat <= not_before
+
+    async def latest_cursor(self) -> str:
+        """Id of the newest event, for consumers starting from now"""
+        entries = await self._redis.xrevrange(self._stream, count=1)
+        return entries[0][0] if entries else "0-0"
+
+    async def has_gap(self, cursor: str) -> bool:
+        """Whether events after the cursor were already trimmed away"""
+        if cursor == "0-0":
+            return False
+        entries = await self._redis.xrange(self._stream, count=1)
+        return bool(entries) and _parse_id(entries[0][0]) > _parse_id(cursor)
+
+    async def read(
+        self,
+        cursor: str,
+        timeout: Optional[float] = None,
+        count: Optional[int] = None
+    ) -> Tuple[str, List[Dict]]:
+        """
+        Events after the cursor, waiting up to timeout seconds for the first
+
+        Returns the new cursor and the events, each with its "id".
+        """
+        block = int(timeout * 1000) if timeout else None
+        response = await self._redis.xread(
+            {self._stream: cursor},
+            count=count or settings.REVOCATION_BATCH_SIZE,
+            block=block
+        )
+
+        events = []
+        for _, entries in response or []:
+            for event_id, fields in entries:
+                events.append(_event(event_id, fields))
+                cursor = event_id
+        return cursor, events
+
+
+def _parse_id(event_id: str) -> Tuple[int, int]:
+    milliseconds, _, sequence = event_id.partition("-")
+    return int(milliseconds), int(sequence or 0)
+
+def _event(event_id: str, fields: Dict[str, str]) -> Dict:
+    event = {"id": event_id, **fields}
+    for name in ("exp", "user_id", "not_before"):
+        if name in event:
+            event[name] = int(event[name])
+    return event
@@ -4,6 +4,7 @@ from fastapi import HTTPException, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.repositories.role import RoleRepository
+from src.services.reference_data import reference_data
 from src.schemas.role import RoleCreate, RoleUpdate
 from src.models.role import Role
 
@@ -14,7 +15,7 @@ class RoleService:
     
     async def create_role(self, role_data: RoleCreate) -> Role:
         # Check if name already exists
-        existing_role: Optional[Role] = await self._repository.get_by_name(role_data.name)
+        existing_role: Optional[Role] = (await reference_data.get()).roles_by_name.get(role_data.name)
         if existing_role:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -24,7 +25,7 @@ class RoleService:
         return await self._repository.create(role_data)
     
     async def get_role(self, role_id: int) -> Role:
-        role: Optional[Role] = await self._repository.get_by_id(role_id)
+        role: Optional[Role] = (await reference_data.get()).roles.get(role_id)
         if not role:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -33,11 +34,11 @@ class RoleService:
         return role
     
     async def get_all_roles(self) -> List[Role]:
-        return await self._repository.get_all()
+        return (await reference_data.get()).all_roles()
     
     async def update_role(self, role_id: int, role_data: RoleUpdate) -> Role:
         if role_data.name:
-            existing_role: Optional[Role] = await self._repository.get_by_name(role_data.name)
+            existing_role: Optional[Role] = (await reference_data.get()).roles_by_name.get(role_data.name)
             if existing_role and existing_role.id != role_id:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
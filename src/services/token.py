@@ -1,10 +1,40 @@
+import hashlib
+import json
+import secrets
+import time
+from contextvars import ContextVar
 from datetime import timedelta
-from typing import Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
+from jose import JWTError, jwt
 import redis.asyncio as redis
 
 from src.core.config import settings
+from src.core.metrics import AUTH_FAILURES, BLACKLIST_LOOKUP_SECONDS, REVOCATIONS, timed
+from src.auth.jwt import JWTHandler
+
+def token_digest(token: str) -> str:
+    """Fixed-size, non-reversible key for a token"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def is_digest(value: str) -> bool:
+    return len(value) == 64 and all(char in "0123456789abcdef" for char in value)
+
+def is_reference_token(token: str) -> bool:
+    """Opaque handles have no JWT segments"""
+    return token.count(".") != 2
+
+# Access token whose user watermark TokenBlacklistMiddleware already checked
+# for the current request, so resolve() does not read it a second time
+_watermark_checked: ContextVar[Optional[str]] = ContextVar("watermark_checked", default=None)
+
+# Called after every SCAN page with (keys scanned, keys matched) so far
+Progress = Callable[[int, int], Awaitable[None]]
 
 class TokenBlacklistService:
+    # Unknown owner; entries written before owners were recorded hold "1" too
+    NO_USER = "1"
+
     def __init__(self, redis: redis.Redis):
         self._redis = redis
         self._prefix = "blacklist:token:"
@@ -12,7 +42,8 @@ class TokenBlacklistService:
     async def add_to_blacklist(
         self,
         token: str,
-        expires_in: Optional[int] = None
+        expires_in: Optional[int] = None,
+        user_id: Optional[int] = None
     ) -> None:
         """
         Add token to blacklist
@@ -21,21 +52,418 @@ class TokenBlacklistService:
             token: The token to blacklist
             expires_in: Time in seconds until token expires. 
                        Defaults to ACCESS_TOKEN_EXPIRE_MINUTES
+            user_id: Owner of the token, stored so entries can be purged per user
         """
         if expires_in is None:
             expires_in = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
 
+        # Keyed by digest: a few dozen bytes instead of the whole token
         await self._redis.setex(
-            f"{self._prefix}{token}",
+            f"{self._prefix}{token_digest(token)}",
             expires_in,
-            "1"
+            f"u{user_id}" if user_id is not None else self.NO_USER
         )
+        REVOCATIONS.labels("token").inc()
+
+    def keys(self, token: str) -> List[str]:
+        """Keys that blacklist a token: its digest, and the raw token while legacy keys are honoured"""
+        keys = [f"{self._prefix}{token_digest(token)}"]
+        if settings.BLACKLIST_LEGACY_KEYS:
+            keys.append(f"{self._prefix}{token}")
+        return keys
 
+    @timed(BLACKLIST_LOOKUP_SECONDS)
     async def is_blacklisted(self, token: str) -> bool:
         """Check if token is blacklisted"""
-        return await self._redis.exists(f"{self._prefix}{token}") > 0
+        return await self._redis.exists(*self.keys(token)) > 0
+
+    @timed(BLACKLIST_LOOKUP_SECONDS)
+    async def are_blacklisted(self, tokens: List[str]) -> List[bool]:
+        """Check several tokens in one round trip"""
+        keys = [self.keys(token) for token in tokens]
+        values = await self._redis.mget([key for token_keys in keys for key in token_keys])
+        # Every token has the same number of keys
+        width = len(keys[0]) if keys else 1
+        return [any(value is not None for value in values[i:i + width]) for i in range(0, len(values), width)]
+
+    # Maintenance. Every operation walks the keyspace with large SCAN pages
+    # and issues one batched command per page, so a million entries take
+    # about a thousand round trips and each page yields to the event loop.
+    # Run them as background jobs (src.core.jobs), not inside a request.
+
+    async def _pages(self) -> AsyncIterator[List[str]]:
+        cursor = 0
+        while True:
+            cursor, keys = await self._redis.scan(
+                cursor,
+                match=f"{self._prefix}*",
+                count=settings.BLACKLIST_SCAN_COUNT
+            )
+            if keys:
+                yield keys
+            if cursor == 0:
+                return
+
+    async def count(self, progress: Optional[Progress] = None) -> int:
+        """Count blacklisted tokens"""
+        scanned = 0
+        async for keys in self._pages():
+            scanned += len(keys)
+            if progress:
+                await progress(scanned, scanned)
+        return scanned
+
+    async def clear_blacklist(self, progress: Optional[Progress] = None) -> int:
+        """Remove (un-revoke) every blacklisted token and return how many were removed"""
+        scanned = 0
+        async for keys in self._pages():
+            # UNLINK frees memory in a background thread on the server
+            await self._redis.unlink(*keys)
+            scanned += len(keys)
+            if progress:
+                await progress(scanned, scanned)
+        return scanned
+
+    async def purge_user(self, user_id: int, progress: Optional[Progress] = None) -> int:
+        """Remove (un-revoke) the blacklisted tokens of one user and return how many were removed"""
+        owner = f"u{user_id}"
+        scanned = matched = 0
+        async for keys in self._pages():
+            values = await self._redis.mget(keys)
+            owned = [key for key, value in zip(keys, values) if value == owner]
+            if owned:
+                await self._redis.unlink(*owned)
+            scanned += len(keys)
+            matched += len(owned)
+            if progress:
+                await progress(scanned, matched)
+        return matched
+
+    async def export(self) -> AsyncIterator[Dict]:
+        """Yield {digest, user_id, ttl} for every blacklisted token"""
+        prefix_length = len(self._prefix)
+        async for keys in self._pages():
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.get(key)
+                    pipe.ttl(key)
+                results = await pipe.execute()
+
+            for key, value, ttl in zip(keys, results[::2], results[1::2]):
+                # Expired between SCAN and GET
+                if value is None:
+                    continue
+                digest = key[prefix_length:]
+                yield {
+                    # Legacy entries are keyed by the raw token, which must not leak
+                    "digest": digest if is_digest(digest) else token_digest(digest),
+                    "user_id": int(value[1:]) if value.startswith("u") else None,
+                    "ttl": ttl,
+                }
+
+# Rotate a family's current refresh token id and extend its session entry
+# KEYS: family hash, user's session set
+# ARGV: presented jti, new jti, ttl seconds, now, family id
+# Returns 1 rotated, 0 unknown/expired family, -1 family revoked, -2 reuse detected
+ROTATE_SCRIPT = """
+local state = redis.call('HMGET', KEYS[1], 'jti', 'revoked')
+if not state[1] then
+    return 0
+end
+if state[2] == '1' then
+    return -1
+end
+if state[1] ~= ARGV[1] then
+    redis.call('HSET', KEYS[1], 'revoked', '1')
+    redis.call('ZREM', KEYS[2], ARGV[5])
+    return -2
+end
+redis.call('HSET', KEYS[1], 'jti', ARGV[2], 'refreshed_at', ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('ZADD', KEYS[2], tonumber(ARGV[4]) + tonumber(ARGV[3]), ARGV[5])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return 1
+"""
+
+# Mark a family revoked, keeping it until expiry so later reuse is still
+# detected, and drop it from its owner's session set. The owner is read from
+# the family itself, never trusted from the caller.
+# KEYS: family hash; ARGV: family id, session set key prefix
+# Returns 1 revoked, 0 unknown family
+REVOKE_SCRIPT = """
+local user_id = redis.call('HGET', KEYS[1], 'user_id')
+if not user_id then
+    return 0
+end
+redis.call('ZREM', ARGV[2] .. user_id, ARGV[1])
+redis.call('HSET', KEYS[1], 'revoked', '1')
+return 1
+"""
+
+class RefreshTokenFamilyService:
+    """
+    Rotating refresh tokens grouped into families
+
+    Every login starts a family; each refresh replaces the family's current
+    token id. Presenting any older id from the family means the token was
+    copied, so the whole family is revoked. State is one small hash per
+    family: {user_id, jti, revoked, created_at, refreshed_at, client info}.
+
+    A family is also the user's session: each user has a sorted set of
+    their live family ids scored by expiry, so sessions are listed and
+    revoked without scanning the keyspace. Expired entries are pruned by
+    score whenever the set is written or listed.
+    """
+
+    ROTATED = 1
+    UNKNOWN = 0
+    REVOKED = -1
+    REUSED = -2
+
+    def __init__(self, redis: redis.Redis):
+        self._redis = redis
+        self._prefix = "refresh:family:"
+        self._sessions_prefix = "sessions:user:"
+        self._rotate = redis.register_script(ROTATE_SCRIPT)
+        self._revoke = redis.register_script(REVOKE_SCRIPT)
+
+    @staticmethod
+    def _ttl() -> int:
+        return settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+
+    @staticmethod
+    def new_id() -> str:
+        """Random id for a family or a token within it"""
+        return secrets.token_urlsafe(16)
+
+    def _sessions_key(self, user_id: int) -> str:
+        return f"{self._sessions_prefix}{user_id}"
+
+    async def create_family(self, user_id: int, client: Optional[Dict[str, str]] = None) -> Tuple[str, str]:
+        """Start a family and return (family_id, first token id)
+
+        Args:
+            user_id: Owner of the new session
+            client: Optional description of the device, e.g. {"ip": ..., "user_agent": ...}
+        """
+        family_id, jti = self.new_id(), self.new_id()
+        key = f"{self._prefix}{family_id}"
+        sessions_key = self._sessions_key(user_id)
+        now, ttl = int(time.time()), self._ttl()
+
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={
+                **{name: value for name, value in (client or {}).items() if value},
+                "user_id": user_id,
+                "jti": jti,
+                "revoked": 0,
+                "created_at": now,
+                "refreshed_at": now,
+            })
+            pipe.expire(key, ttl)
+            pipe.zremrangebyscore(sessions_key, "-inf", now)
+            pipe.zadd(sessions_key, {family_id: now + ttl})
+            pipe.expire(sessions_key, ttl)
+            await pipe.execute()
+
+        return family_id, jti
+
+    async def rotate(self, family_id: str, user_id: int, jti: str, new_jti: str) -> int:
+        """Swap the family's current token id, detecting reuse"""
+        return int(await self._rotate(
+            keys=[f"{self._prefix}{family_id}", self._sessions_key(user_id)],
+            args=[jti, new_jti, self._ttl(), int(time.time()), family_id]
+        ))
+
+    async def revoke_family(self, family_id: str) -> bool:
+        """Revoke every refresh token in a family"""
+        revoked = bool(await self._revoke(
+            keys=[f"{self._prefix}{family_id}"],
+            args=[family_id, self._sessions_prefix]
+        ))
+        if revoked:
+            REVOCATIONS.labels("refresh_family").inc()
+        return revoked
+
+    async def list_sessions(self, user_id: int) -> List[Dict]:
+        """Live sessions of a user, newest expiry first"""
+        sessions_key = self._sessions_key(user_id)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(sessions_key, "-inf", int(time.time()))
+            pipe.zrevrange(sessions_key, 0, -1, withscores=True)
+            _, entries = await pipe.execute()
+        if not entries:
+            return []
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for family_id, _ in entries:
+                pipe.hgetall(f"{self._prefix}{family_id}")
+            states = await pipe.execute()
+
+        return [
+            {**state, "id": family_id, "expires_at": int(expires_at)}
+            for (family_id, expires_at), state in zip(entries, states)
+            if state and state.get("revoked") != "1"
+        ]
+
+    async def is_session_of(self, family_id: str, user_id: int) -> bool:
+        """Whether a family is a live session of the user, e.g. before revoking it on their behalf"""
+        return await self._redis.zscore(self._sessions_key(user_id), family_id) is not None
+
+    async def revoke_all_sessions(self, user_id: int) -> int:
+        """Revoke every session of a user and return how many were live"""
+        sessions_key = self._sessions_key(user_id)
+        family_ids = await self._redis.zrange(sessions_key, 0, -1)
+        if not family_ids:
+            return 0
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for family_id in family_ids:
+                await self._revoke(
+                    keys=[f"{self._prefix}{family_id}"],
+                    args=[family_id, self._sessions_prefix],
+                    client=pipe
+                )
+            revoked = sum(int(result) for result in await pipe.execute())
+
+        REVOCATIONS.labels("refresh_family").inc(revoked)
+        return revoked
+
+
+class ReferenceTokenService:
+    """
+    Opaque access tokens
+
+    The client only gets a random handle; the claims live in Redis under
+    the handle's digest until the token expires, so revocation is a delete.
+    """
+
+    def __init__(self, redis: redis.Redis):
+        self._redis = redis
+        self._prefix = "token:ref:"
+
+    async def issue(self, claims: Dict, expires_in: int) -> str:
+        """Store claims and return a new handle"""
+        handle = secrets.token_urlsafe(32)
+        now = int(time.time())
+        claims = {**claims, "iat": now, "exp": now + expires_in}
+        await self._redis.setex(
+            f"{self._prefix}{token_digest(handle)}",
+            expires_in,
+            json.dumps(claims, separators=(",", ":"), default=str)
+        )
+        return handle
+
+    async def resolve(self, handle: str) -> Optional[Dict]:
+        """Claims for a handle, or None when unknown, expired or revoked"""
+        value = await self._redis.get(f"{self._prefix}{token_digest(handle)}")
+        return json.loads(value) if value else None
+
+    async def revoke(self, handle: str) -> None:
+        await self._redis.delete(f"{self._prefix}{token_digest(handle)}")
+
+
+class AccessTokenService:
+    """Issue and resolve access tokens in the configured ACCESS_TOKEN_FORMAT"""
+
+    def __init__(self, redis: Optional[redis.Redis] = None):
+        # Imported here: src.services.revocation imports token_digest from this module
+        from src.services.revocation import RevocationStreamService
+
+        self._redis = redis
+        self._references = ReferenceTokenService(redis) if redis else None
+        self._revocations = RevocationStreamService(redis) if redis else None
+        self._blacklist = TokenBlacklistService(redis) if redis else None
+
+    async def issue(self, claims: Dict) -> str:
+        expires_delta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        if settings.ACCESS_TOKEN_FORMAT == "reference" and self._references:
+            return await self._references.issue(claims, int(expires_delta.total_seconds()))
+        return JWTHandler.create_token(data=claims, expires_delta=expires_delta)
+
+    async def resolve(self, token: str) -> Dict:
+        """
+        Claims of a live access token of either format, or 401
+
+        Refresh tokens are rejected, and so are tokens issued before their
+        user's revocation watermark, so every caller sees a deactivated
+        user's tokens as revoked. The watermark costs one Redis GET unless
+        is_revoked() already read it for this token in the current request.
+        """
+        if not is_reference_token(token):
+            claims = JWTHandler.decode_token(token)
+        else:
+            claims = await self._references.resolve(token) if self._references else None
+            if claims is None:
+                AUTH_FAILURES.labels("invalid_token").inc()
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Could not validate credentials",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+
+        if claims.get("token_type", "access") != "access":
+            AUTH_FAILURES.labels("invalid_token").inc()
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token type",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        if _watermark_checked.get() != token and await self._is_watermarked(claims):
+            AUTH_FAILURES.labels("revoked_token").inc()
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return claims
+
+    async def _is_watermarked(self, claims: Dict) -> bool:
+        user_id = self._revocations.user_id_of(claims) if self._revocations else None
+        if user_id is None:
+            return False
+        watermarks = await self._revocations.user_watermarks([user_id])
+        return self._revocations.is_revoked(claims, watermarks)
+
+    async def _unverified_claims(self, token: str) -> Optional[Dict]:
+        if is_reference_token(token):
+            return await self._references.resolve(token) if self._references else None
+        try:
+            return jwt.get_unverified_claims(token)
+        except JWTError:
+            return None
+
+    async def user_id_of(self, token: str) -> Optional[int]:
+        """Owner of a token without verifying it, for callers that already verified it"""
+        return (await self._unverified_claims(token) or {}).get("user_id")
+
+    async def is_revoked(self, token: str) -> bool:
+        """
+        Whether a token is blacklisted or predates its user's watermark
+
+        One MGET for both. A JWT's owner is read without verifying it, so a
+        forged owner can only make this say "revoked"; verification rejects
+        the forgery later anyway. Reference tokens need their claims first,
+        so resolve() checks their watermark instead.
+        """
+        keys = self._blacklist.keys(token)
+        claims = None if is_reference_token(token) else await self._unverified_claims(token)
+        user_id = self._revocations.user_id_of(claims or {})
+        if user_id is not None:
+            keys.append(self._revocations.watermark_key(user_id))
+
+        values = await self._redis.mget(keys)
+        if user_id is None:
+            return any(value is not None for value in values)
+        if any(value is not None for value in values[:-1]):
+            return True
+        watermarks = {user_id: int(values[-1])} if values[-1] is not None else {}
+        if self._revocations.is_revoked(claims, watermarks):
+            return True
+        _watermark_checked.set(token)
+        return False
 
-    async def clear_blacklist(self) -> None:
-        """Clear all blacklisted tokens (useful for testing)"""
-        async for key in self._redis.scan_iter(f"{self._prefix}*"):
-            await self._redis.delete(key)
\ No newline at end of file
+    async def revoke(self, token: str) -> None:
+        """Drop a reference token's claims; JWTs rely on the blacklist"""
+        if is_reference_token(token) and self._references:
+            await self._references.revoke(token)
\ No newline at end of file
@@ -3,28 +3,66 @@ from typing import Dict, List, Optional, Any
 from fastapi import HTTPException, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.core.cache import caches
+from src.core.config import settings
 from src.repositories.unit import UnitRepository
+from src.repositories.user import UserRepository
+from src.services.reference_data import ReferenceSnapshot, reference_data
 from src.schemas.unit import UnitCreate, UnitUpdate
 from src.models.unit import Unit
+from src.models.user import User
+
+# Subtree unit ids per (snapshot version, unit), so a lookup never mixes in
+# a snapshot that a rebuild has replaced; entries of old snapshots are
+# dropped on every "units" invalidation
+_subtree_cache = caches.register(
+    "unit_subtree",
+    max_size=4096,
+    ttl=lambda: settings.UNIT_SUBTREE_CACHE_SECONDS
+)
+
+async def _drop_subtrees(_key) -> None:
+    # Not topics=("units",): entries are keyed by (version, unit), and all
+    # of them belong to a snapshot that is about to be replaced
+    _subtree_cache.invalidate()
+
+caches.subscribe("units", _drop_subtrees)
 
 class UnitService:
     def __init__(self, db: AsyncSession) -> None:
         self._db = db
         self._repository = UnitRepository(db)
+        self._user_repository = UserRepository(db)
+
+    async def _get_parent(self, parent_id: Optional[int]) -> Optional[Unit]:
+        if parent_id is None:
+            return None
+        parent: Optional[Unit] = (await reference_data.get()).units.get(parent_id)
+        if not parent:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Parent unit not found"
+            )
+        return parent
     
     async def create_unit(self, unit_data: UnitCreate) -> Unit:
         # Check if code already exists
-        existing_unit: Optional[Unit] = await self._repository.get_by_code(unit_data.code)
+        existing_unit: Optional[Unit] = (await reference_data.get()).units_by_code.get(unit_data.code)
         if existing_unit:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Unit code already exists"
             )
-        
+
+        await self._get_parent(unit_data.parent_id)
         return await self._repository.create(unit_data)
     
     async def get_unit(self, unit_id: int) -> Unit:
-        unit: Optional[Unit] = await self._repository.get_by_id(unit_id)
+        return self._unit_in(await reference_data.get(), unit_id)
+
+    @staticmethod
+    def _unit_in(snapshot: ReferenceSnapshot, unit_id: int) -> Unit:
+        unit: Optional[Unit] = snapshot.units.get(unit_id)
         if not unit:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -33,16 +71,44 @@ class UnitService:
         return unit
     
     async def get_all_units(self) -> List[Unit]:
-        return await self._repository.get_all()
+        return (await reference_data.get()).all_units()
+
+    async def get_subtree(self, unit_id: int) -> List[Unit]:
+        """Get a unit and all units below it"""
+        unit = await self.get_unit(unit_id)
+        return (await reference_data.get()).subtree(unit.path)
+
+    async def get_subtree_ids(self, unit_id: int) -> List[int]:
+        """Get ids of a unit and all units below it (cached)"""
+        snapshot = await reference_data.get()
+
+        async def load() -> List[int]:
+            unit = self._unit_in(snapshot, unit_id)
+            return [child.id for child in snapshot.subtree(unit.path)]
+
+        return await _subtree_cache.get_or_load((snapshot.version, unit_id), load)
+
+    async def get_unit_users(self, unit_id: int, recursive: bool = True) -> List[User]:
+        """Get users of a unit, including units below it when recursive"""
+        unit_ids = await self.get_subtree_ids(unit_id) if recursive else [(await self.get_unit(unit_id)).id]
+        return await self._user_repository.get_by_unit_ids(unit_ids)
     
     async def update_unit(self, unit_id: int, unit_data: UnitUpdate) -> Unit:
         if unit_data.code:
-            existing_unit: Optional[Unit] = await self._repository.get_by_code(unit_data.code)
+            existing_unit: Optional[Unit] = (await reference_data.get()).units_by_code.get(unit_data.code)
             if existing_unit and existing_unit.id != unit_id:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Unit code already exists"
                 )
+
+        if "parent_id" in unit_data.model_fields_set:
+            parent = await self._get_parent(unit_data.parent_id)
+            if parent and f"/{unit_id}/" in parent.path:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="A unit cannot be moved below itself"
+                )
         
         unit: Optional[Unit] = await self._repository.update(unit_id, unit_data)
         if not unit:
@@ -53,10 +119,16 @@ class UnitService:
         return unit
     
     async def delete_unit(self, unit_id: int) -> Dict[str, str]:
+        if await self._repository.has_children(unit_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unit has child units"
+            )
+
         success: bool = await self._repository.delete(unit_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Unit not found"
             )
-        return {"message": "Unit deleted successfully"}
\ No newline at end of file
+        return {"message": "Unit deleted successfully"}
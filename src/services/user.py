@@ -1,14 +1,20 @@
 from fastapi import HTTPException, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List, Optional, Dict
+import redis.asyncio as redis
 
 from src.schemas.user import UserCreate, UserUpdate, UserResponse
 from src.repositories.user import UserRepository
+from src.services.reference_data import reference_data
+from src.services.revocation import RevocationStreamService
+from src.services.token import RefreshTokenFamilyService
 
 class UserService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, redis_client: Optional[redis.Redis] = None):
         self.db = db
         self._repository = UserRepository(db)
+        self._revocations = RevocationStreamService(redis_client) if redis_client else None
+        self._refresh_families = RefreshTokenFamilyService(redis_client) if redis_client else None
 
     async def create_user(self, user_data: UserCreate) -> UserResponse:
         """Create a new user"""
@@ -18,7 +24,9 @@ class UserService:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
-        
+
+        await reference_data.require_roles(user_data.roles)
+        await reference_data.require_unit(user_data.unit_id)
         return await self._repository.create(user_data)
 
     async def get_user(self, user_id: int) -> UserResponse:
@@ -37,12 +45,20 @@ class UserService:
         
     async def update_user(self, user_id: int, user_data: UserUpdate) -> UserResponse:
         """Update an existing user."""
+        if user_data.roles is not None:
+            await reference_data.require_roles(user_data.roles)
+        await reference_data.require_unit(user_data.unit_id)
         user = await self._repository.update(user_id, user_data)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
+
+        # Outstanding tokens of a deactivated user must stop working downstream
+        if user_data.is_active is False and self._revocations:
+            await self._revocations.publish_user(user_id)
+            await self._refresh_families.revoke_all_sessions(user_id)
         return user
         
     async def delete_user(self, user_id: int) -> Dict[str, str]:
@@ -53,4 +69,7 @@ class UserService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
+        if self._revocations:
+            await self._revocations.publish_user(user_id)
+            await self._refresh_families.revoke_all_sessions(user_id)
         return {"message": "User deleted successfully"}
\ No newline at end of file
@@ -9,6 +9,10 @@ def get_timestamp() -> datetime:
     """Get current UTC timestamp."""
     return datetime.now(timezone.utc)
 
+def claim_is_true(value: Any) -> bool:
+    """Interpret a boolean claim; some providers send "true" as a string."""
+    return value is True or (isinstance(value, str) and value.lower() == "true")
+
 def remove_none_values(data: Dict[str, Any]) -> Dict[str, Any]:
     """Remove None values from dictionary."""
     return {k: v for k, v in data.items() if v is not None}
\ No newline at end of file
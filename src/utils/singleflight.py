@@ -0,0 +1,47 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the work; callers arriving while it is
+    in flight await the same result (or exception) instead of repeating it.
+    If the first caller is cancelled, a waiting caller runs the work itself.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        while (future := self._calls.get(key)) is not None:
+            try:
+                # Shield so a cancelled follower does not cancel the leader's result
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Only the leader was cancelled (e.g. its client went away): take over
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an exception nobody waited for is not logged
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        """Number of keys currently being computed"""
+        return len(self._calls)
@@ -0,0 +1,177 @@
+"""Shared fixtures
+
+Tests run in-process against SQLite (aiosqlite) and fakeredis, like
+benchmarks/sso.py, so no Postgres or Redis server is needed:
+
+    pip install pytest pytest-asyncio aiosqlite "fakeredis[lua]"
+    python -m pytest -q
+"""
+import json
+import os
+import time
+
+# Credentials of the one configured introspection client
+CLIENT = ("resource-server", "secret")
+
+# Must be set before anything reads settings
+os.environ.update({
+    "ENVIRONMENT": "test",
+    "DEBUG": "false",
+    "DATABASE_URL": "sqlite+aiosqlite:///:memory:",
+    "REDIS_URL": "redis://test:6379/0",
+    "JWT_SECRET_KEY": "test-secret",
+    "GOOGLE_CLIENT_ID": "test-client",
+    "GOOGLE_CLIENT_SECRET": "test",
+    "GOOGLE_REDIRECT_URI": "http://test/auth/callback",
+    "RATE_LIMIT_ENABLED": "false",
+    "METRICS_ENABLED": "false",
+    "WARMUP_ENABLED": "false",
+    "AUDIT_ENABLED": "false",
+    "INTROSPECTION_CLIENTS": json.dumps(dict([CLIENT])),
+})
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable
+
+import httpx
+import pytest
+import pytest_asyncio
+from fakeredis import FakeServer, aioredis as fakeredis
+from sqlalchemy import insert
+from sqlmodel import SQLModel
+
+import src.core.redis as redis_module
+from src.auth.permissions import ALL_PERMISSIONS, Permission
+from src.core.audit import audit_log
+from src.core.cache import caches
+from src.core.config import get_settings
+from src.core.database import close_db, get_engine, get_session
+from src.models import Role, Unit, User, UserRole
+from src.services.reference_data import reference_data
+
+def bearer(token: str) -> dict:
+    """Authorization header for a token"""
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def override_settings(monkeypatch) -> Callable[..., None]:
+    """Change settings for one test, e.g. override_settings(RATE_LIMIT_ENABLED=True)"""
+    def override(**values) -> None:
+        for name, value in values.items():
+            monkeypatch.setattr(get_settings(), name, value)
+    return override
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() and time.monotonic(): clock.advance(seconds)
+
+    asyncio timers read the same clock, so tests using it must not sleep.
+    """
+    class Clock:
+        now = 1_700_000_000.0
+
+        def advance(self, seconds: float) -> None:
+            self.now += seconds
+
+    clock = Clock()
+    monkeypatch.setattr(time, "time", lambda: clock.now)
+    monkeypatch.setattr(time, "monotonic", lambda: clock.now)
+    return clock
+
+@pytest.fixture(autouse=True)
+def reset_local_caches():
+    """Per-worker caches are module singletons; start every test empty"""
+    for cache in caches._caches.values():
+        cache.invalidate()
+    reference_data._snapshot = None
+    # A rebuild scheduled by the previous test belongs to its closed event loop
+    reference_data._rebuild = None
+    yield
+
+@pytest_asyncio.fixture
+async def redis_client(monkeypatch):
+    client = fakeredis.FakeRedis(server=FakeServer(), decode_responses=True)
+    monkeypatch.setattr(redis_module, "redis_client", client)
+    return client
+
+@pytest_asyncio.fixture
+async def engine(tmp_path, override_settings):
+    override_settings(DATABASE_URL=f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    engine = get_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await close_db()
+
+@pytest_asyncio.fixture
+async def db(engine):
+    async with get_session() as session:
+        yield session
+
+@pytest_asyncio.fixture
+async def seed(engine) -> SimpleNamespace:
+    """Two units (/1/ and /1/2/), two roles and three users
+
+    admin is a superuser, alice holds the reader role in unit 2, bob is
+    inactive.
+    """
+    now = datetime.now(timezone.utc)
+    stamps = {"created_at": now, "updated_at": now}
+    async with engine.begin() as conn:
+        await conn.execute(insert(Unit), [
+            {"id": 1, "name": "Head Office", "code": "HQ", "parent_id": None, "path": "/1/", **stamps},
+            {"id": 2, "name": "Branch", "code": "BR", "parent_id": 1, "path": "/1/2/", **stamps},
+        ])
+        await conn.execute(insert(Role), [
+            {"id": 1, "name": "admin", "permissions": int(ALL_PERMISSIONS), **stamps},
+            {"id": 2, "name": "reader", "permissions": int(Permission.USERS_READ | Permission.UNITS_READ), **stamps},
+        ])
+        await conn.execute(insert(User), [
+            {"id": 1, "email": "admin@example.com", "first_name": "Admin", "is_active": True, "is_superuser": True, "unit_id": 1, **stamps},
+            {"id": 2, "email": "alice@example.com", "first_name": "Alice", "is_active": True, "is_superuser": False, "unit_id": 2, **stamps},
+            {"id": 3, "email": "bob@example.com", "first_name": "Bob", "is_active": False, "is_superuser": False, "unit_id": 2, **stamps},
+        ])
+        await conn.execute(insert(UserRole), [
+            {"user_id": 1, "role_id": 1},
+            {"user_id": 2, "role_id": 2},
+        ])
+    return SimpleNamespace(admin_id=1, alice_id=2, bob_id=3, hq_id=1, branch_id=2, admin_role_id=1, reader_role_id=2)
+
+@pytest.fixture
+def app(monkeypatch, redis_client, engine):
+    import main
+
+    async def use_test_redis() -> None:
+        redis_module.redis_client = redis_client
+
+    # Lifespan would replace the fakeredis client with a real (unreachable) pool
+    monkeypatch.setattr(main, "init_redis_pool", use_test_redis)
+    return main.create_app()
+
+@pytest_asyncio.fixture
+async def client(app):
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
+
+@pytest_asyncio.fixture
+async def login(db, redis_client) -> Callable:
+    """Issue a token pair for a seeded user: await login(user_id)"""
+    from src.repositories.user import UserRepository
+    from src.services.auth import AuthService
+
+    async def issue(user_id: int):
+        user = await UserRepository(db).get_by_id(user_id, loader="auth")
+        return await AuthService(db, redis_client).create_tokens(user)
+    return issue
+
+@pytest_asyncio.fixture
+async def audit(monkeypatch, override_settings, engine):
+    """The shared audit logger, enabled, with a fresh queue and writer"""
+    override_settings(AUDIT_ENABLED=True, AUDIT_FLUSH_INTERVAL_SECONDS=0.01)
+    monkeypatch.setattr(audit_log, "_queue", None)
+    audit_log.start()
+    yield audit_log
+    await audit_log.stop()
@@ -0,0 +1,56 @@
+import pytest
+
+from src.auth.jwt import JWTHandler
+from src.services.auth import AuthService
+from src.services.token import AccessTokenService, is_reference_token
+
+from conftest import bearer
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.mark.parametrize("profile, extra", [
+    ("minimal", set()),
+    ("standard", {"unit", "roles"}),
+    ("full", {"unit", "roles", "email", "is_active", "is_superuser", "first_name", "last_name"}),
+])
+async def test_claim_profiles(seed, override_settings, login, profile, extra):
+    override_settings(TOKEN_CLAIM_PROFILE=profile)
+
+    claims = JWTHandler.decode_token((await login(seed.alice_id)).access_token)
+
+    assert set(claims) == {"sub", "user_id", "perms", "iat", "exp"} | extra
+
+async def test_smaller_profiles_make_smaller_tokens(seed, override_settings, login):
+    sizes = []
+    for profile in ("minimal", "standard", "full"):
+        override_settings(TOKEN_CLAIM_PROFILE=profile)
+        sizes.append(len((await login(seed.alice_id)).access_token))
+
+    assert sizes == sorted(sizes) and len(set(sizes)) == 3
+
+async def test_reference_tokens_are_opaque_handles(client, redis_client, seed, override_settings, login):
+    override_settings(ACCESS_TOKEN_FORMAT="reference")
+    tokens = await login(seed.alice_id)
+
+    assert is_reference_token(tokens.access_token)
+    claims = await AccessTokenService(redis_client).resolve(tokens.access_token)
+    assert claims["user_id"] == seed.alice_id and claims["exp"] > claims["iat"]
+
+    response = await client.get("/auth/me", headers=bearer(tokens.access_token))
+    assert response.status_code == 200
+    assert response.json()["email"] == "alice@example.com"
+
+async def test_revoked_reference_tokens_stop_resolving(client, db, redis_client, seed, override_settings, login):
+    override_settings(ACCESS_TOKEN_FORMAT="reference")
+    tokens = await login(seed.alice_id)
+
+    await AuthService(db, redis_client).blacklist_token(tokens.access_token)
+
+    response = await client.get("/auth/me", headers=bearer(tokens.access_token))
+    assert response.status_code == 401
+    assert await redis_client.keys("token:ref:*") == []
+
+async def test_unknown_handles_are_rejected(client, redis_client):
+    response = await client.get("/auth/me", headers=bearer("no-such-handle"))
+
+    assert response.status_code == 401
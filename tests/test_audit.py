@@ -0,0 +1,77 @@
+import pytest
+from jose import jwt
+from sqlmodel import select
+
+from src.core import query_counter
+from src.core.audit import AuditLogger, bind_actor
+from src.core.query_counter import count_queries
+from src.models import AuditLog
+from src.services.auth import AuthService
+
+pytestmark = pytest.mark.asyncio
+
+async def events(db, action: str = None):
+    query = select(AuditLog).order_by(AuditLog.id)
+    if action:
+        query = query.where(AuditLog.action == action)
+    return (await db.exec(query)).all()
+
+async def test_events_are_written_in_one_insert_per_batch(db, engine, audit):
+    query_counter.install(engine)
+    await audit.stop()
+
+    with count_queries() as stats:
+        # The writer task counts into the scope it was started in
+        audit.start()
+        for index in range(50):
+            await audit.record("test.event", "user", index, actor_id=1, n=index)
+        await audit.stop()
+
+    inserts = [statement for statement in stats.statements if statement.startswith("INSERT INTO audit_logs")]
+    assert len(inserts) == 1
+    written = await events(db)
+    assert [event.subject_id for event in written] == [str(index) for index in range(50)]
+    assert written[0].details == {"n": 0}
+
+async def test_full_queue_drops_instead_of_blocking(override_settings):
+    override_settings(AUDIT_ENABLED=True, AUDIT_QUEUE_SIZE=2)
+    logger = AuditLogger()
+
+    for _ in range(5):
+        await logger.record("test.event")
+
+    assert logger.queue.qsize() == 2
+
+async def test_disabled_audit_records_nothing(override_settings):
+    override_settings(AUDIT_ENABLED=False)
+    logger = AuditLogger()
+
+    await logger.record("test.event")
+
+    assert logger.queue.empty()
+
+async def test_actor_defaults_to_the_authenticated_user(db, audit):
+    bind_actor(7)
+    await audit.record("test.event")
+    await audit.stop()
+
+    assert [event.actor_id for event in await events(db)] == [7]
+
+async def test_token_revocation_names_the_user(db, redis_client, seed, login, audit):
+    tokens = await login(seed.alice_id)
+
+    await AuthService(db, redis_client).blacklist_token(tokens.access_token)
+    await audit.stop()
+
+    [event] = await events(db, "auth.token_revoked")
+    assert (event.subject_type, event.subject_id, event.actor_id) == ("user", str(seed.alice_id), seed.alice_id)
+    assert event.details == {"token_type": "access"}
+
+async def test_forged_tokens_cannot_revoke_in_someone_elses_name(client, db, seed, audit):
+    forged = jwt.encode({"sub": "admin@example.com", "user_id": seed.admin_id}, "not-the-key", algorithm="HS256")
+
+    response = await client.post("/auth/logout", headers={"Authorization": f"Bearer {forged}"})
+    await audit.stop()
+
+    assert response.status_code == 401
+    assert await events(db, "auth.token_revoked") == []
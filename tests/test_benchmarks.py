@@ -0,0 +1,26 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_every_scenario_runs_without_errors(tmp_path):
+    output = tmp_path / "results.json"
+    result = subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.sso",
+            "--users", "20", "--requests", "10", "--concurrency", "2",
+            "--output", str(output),
+        ],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+
+    results = json.loads(output.read_text())["results"]
+    assert {r["scenario"] for r in results} == {
+        "token_verify", "me", "refresh", "list_users", "get_user", "bulk_role_update", "mixed"
+    }
+    assert [r for r in results if r["errors"]] == []
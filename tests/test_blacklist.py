@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from sqlmodel import select
+
+from src.core.jobs import jobs
+from src.models import AuditLog
+from src.services.token import TokenBlacklistService, token_digest
+
+from conftest import bearer
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def blacklist(redis_client, override_settings):
+    # Small pages, so every operation spans several SCAN round trips
+    override_settings(BLACKLIST_SCAN_COUNT=7)
+    return TokenBlacklistService(redis_client)
+
+async def fill(blacklist, owners):
+    for index, owner in enumerate(owners):
+        await blacklist.add_to_blacklist(f"token-{index}", 60, owner)
+
+async def wait_for(redis_client, job_id: str) -> dict:
+    for _ in range(100):
+        job = await jobs.get(redis_client, job_id)
+        if job["state"] != "running":
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+async def test_entries_are_keyed_by_digest_with_their_owner(blacklist, redis_client):
+    await blacklist.add_to_blacklist("a.b.c", 60, 7)
+    await blacklist.add_to_blacklist("d.e.f", 60)
+
+    assert await blacklist.are_blacklisted(["a.b.c", "d.e.f", "g.h.i"]) == [True, True, False]
+    assert not any("a.b.c" in key for key in await redis_client.keys("*"))
+    entries = [entry async for entry in blacklist.export()]
+    assert {entry["user_id"] for entry in entries} == {7, None}
+    assert all(0 < entry["ttl"] <= 60 for entry in entries)
+
+async def test_entries_written_before_digest_keys_still_count(blacklist, redis_client, override_settings):
+    # As written by earlier releases: the whole token is the key
+    await redis_client.setex("blacklist:token:a.b.c", 60, "1")
+
+    assert await blacklist.is_blacklisted("a.b.c")
+    assert await blacklist.are_blacklisted(["g.h.i", "a.b.c"]) == [False, True]
+    assert [entry["digest"] async for entry in blacklist.export()] == [token_digest("a.b.c")]
+
+    override_settings(BLACKLIST_LEGACY_KEYS=False)
+    assert not await blacklist.is_blacklisted("a.b.c")
+
+async def test_maintenance_walks_every_page(blacklist):
+    await fill(blacklist, [1, 2] * 20)
+    progress = []
+
+    async def report(scanned: int, matched: int) -> None:
+        progress.append((scanned, matched))
+
+    assert await blacklist.count() == 40
+    assert await blacklist.purge_user(1, report) == 20
+    assert len(progress) > 1 and progress[-1] == (40, 20)
+    assert await blacklist.clear_blacklist() == 20
+    assert await blacklist.count() == 0
+
+async def test_admin_jobs_report_progress(client, redis_client, blacklist, seed, login):
+    tokens = await login(seed.admin_id)
+    await fill(blacklist, [seed.alice_id] * 5 + [seed.bob_id] * 3)
+
+    response = await client.post(f"/api/admin/blacklist/purge/{seed.alice_id}", headers=bearer(tokens.access_token))
+    assert response.status_code == 202
+    job = await wait_for(redis_client, response.json()["id"])
+
+    assert job["state"] == "succeeded" and job["result"] == "5"
+    assert job["started_by"] == str(seed.admin_id)
+    assert (await client.get(f"/api/admin/jobs/{job['id']}", headers=bearer(tokens.access_token))).json() == job
+    assert await blacklist.count() == 3
+
+async def test_only_superusers_run_maintenance(client, seed, login):
+    tokens = await login(seed.alice_id)
+
+    response = await client.post("/api/admin/blacklist/clear", headers=bearer(tokens.access_token))
+
+    assert response.status_code == 403
+
+async def test_unrevoking_is_audited_with_the_admin(client, db, redis_client, seed, login, audit):
+    tokens = await login(seed.admin_id)
+
+    response = await client.post("/api/admin/blacklist/clear", headers=bearer(tokens.access_token))
+    await wait_for(redis_client, response.json()["id"])
+    await audit.stop()
+
+    events = (await db.exec(select(AuditLog).order_by(AuditLog.id))).all()
+    assert [(event.action, event.actor_id) for event in events] == [
+        ("job.start", seed.admin_id),
+        ("auth.tokens_unrevoked", seed.admin_id),
+    ]
+    assert events[1].details == {"job": response.json()["id"]}
@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+import pytest
+
+from src.core.cache import CHANNEL, CacheRegistry, LocalCache
+
+pytestmark = pytest.mark.asyncio
+
+async def test_least_recently_used_entries_are_evicted():
+    cache = LocalCache("test", max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+async def test_entries_expire(clock):
+    cache = LocalCache("test", max_size=10, ttl=lambda: 5)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+
+    clock.advance(10)
+
+    assert (cache.get("a"), cache.get("b")) == (None, 2)
+
+async def test_concurrent_misses_load_once():
+    cache = LocalCache("test", max_size=10)
+    calls = 0
+
+    async def load() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    assert await asyncio.gather(*(cache.get_or_load("a", load) for _ in range(5))) == [1] * 5
+    assert await cache.get_or_load("a", load) == 1
+
+async def test_load_racing_an_invalidation_is_not_stored():
+    cache = LocalCache("test", max_size=10)
+    database = {"a": "old"}
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_load() -> str:
+        value = database["a"]
+        started.set()
+        await release.wait()
+        return value
+
+    async def load() -> str:
+        return database["a"]
+
+    stale = asyncio.create_task(cache.get_or_load("a", slow_load))
+    await started.wait()
+    # The write lands and is invalidated while the old value is in flight
+    database["a"] = "new"
+    cache.invalidate("a")
+    fresh = asyncio.create_task(cache.get_or_load("a", load))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(stale, fresh) == ["old", "new"]
+    assert cache.get("a") == "new"
+
+async def test_topics_drop_subscribed_caches_and_broadcast(redis_client):
+    registry = CacheRegistry()
+    cache = registry.register("things", max_size=10, topics=("things",))
+    cache.set(1, "one")
+    cache.set(2, "two")
+    pubsub = redis_client.pubsub()
+    await pubsub.subscribe(CHANNEL)
+    await pubsub.get_message(timeout=1)
+
+    await registry.invalidate("things", 1)
+
+    assert (cache.get(1), cache.get(2)) == (None, "two")
+    message = await pubsub.get_message(timeout=1)
+    assert json.loads(message["data"])["topic"] == "things"
+    assert json.loads(message["data"])["key"] == 1
+    await pubsub.aclose()
+
+async def test_invalidations_from_other_workers_are_applied(redis_client):
+    this, other = CacheRegistry(), CacheRegistry()
+    cache = this.register("things", max_size=10, topics=("things",))
+    other.register("things", max_size=10, topics=("things",))
+    this.start()
+    try:
+        # Wait until the listener is subscribed
+        while (await redis_client.pubsub_numsub(CHANNEL))[0][1] == 0:
+            await asyncio.sleep(0.01)
+
+        cache.set(1, "one")
+        await other.invalidate("things", 1)
+        for _ in range(100):
+            if cache.get(1) is None:
+                break
+            await asyncio.sleep(0.01)
+
+        assert cache.get(1) is None
+    finally:
+        await this.stop()
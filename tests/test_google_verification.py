@@ -0,0 +1,113 @@
+import asyncio
+import datetime
+import time
+
+import httpx
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from fastapi import HTTPException
+from google.auth import crypt, jwt as google_jwt
+
+import src.auth.security as security
+import src.core.http as http_module
+from src.auth.security import GOOGLE_CERTS_URL, SecurityService
+
+pytestmark = pytest.mark.asyncio
+
+KEY_ID = "test-key"
+
+@pytest.fixture(scope="module")
+def signing_key():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "google-test")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(1)
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    key_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ).decode()
+    return crypt.RSASigner.from_string(key_pem, KEY_ID), cert.public_bytes(serialization.Encoding.PEM).decode()
+
+@pytest.fixture
+def certs_endpoint(monkeypatch, signing_key):
+    """Serve the test cert as Google's and count the fetches"""
+    _, cert_pem = signing_key
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert str(request.url) == GOOGLE_CERTS_URL
+        calls.append(request)
+        return httpx.Response(200, json={KEY_ID: cert_pem}, headers={"Cache-Control": "public, max-age=300"})
+
+    monkeypatch.setattr(http_module, "http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    return calls
+
+def id_token(signing_key, **claims) -> str:
+    signer, _ = signing_key
+    now = int(time.time())
+    payload = {
+        "iss": "https://accounts.google.com",
+        "aud": "test-client",
+        "sub": "google-123",
+        "email": "alice@example.com",
+        "email_verified": True,
+        "iat": now,
+        "exp": now + 300,
+        **claims,
+    }
+    return google_jwt.encode(signer, payload).decode()
+
+async def test_verifies_signature_and_caches_certs(signing_key, certs_endpoint):
+    first = await SecurityService.verify_google_token(id_token(signing_key))
+    second = await SecurityService.verify_google_token(id_token(signing_key, sub="google-456"))
+
+    assert (first.email, first.google_id) == ("alice@example.com", "google-123")
+    assert second.google_id == "google-456"
+    # max-age=300: the second verification reuses the cached certs
+    assert len(certs_endpoint) == 1
+
+async def test_rejects_wrong_audience_and_issuer(signing_key, certs_endpoint):
+    with pytest.raises(HTTPException) as wrong_audience:
+        await SecurityService.verify_google_token(id_token(signing_key, aud="someone-else"))
+    with pytest.raises(HTTPException) as wrong_issuer:
+        await SecurityService.verify_google_token(id_token(signing_key, iss="https://evil.example.com"))
+
+    assert wrong_audience.value.status_code == 401
+    assert wrong_issuer.value.status_code == 401
+
+async def test_busy_verifier_returns_503(monkeypatch, override_settings, signing_key, certs_endpoint):
+    override_settings(GOOGLE_VERIFY_QUEUE_TIMEOUT_SECONDS=0.01)
+    # Every slot taken by in-flight verifications
+    monkeypatch.setattr(security, "_verify_slots", asyncio.Semaphore(0))
+
+    with pytest.raises(HTTPException) as busy:
+        await SecurityService.verify_google_token(id_token(signing_key))
+
+    assert busy.value.status_code == 503
+    assert certs_endpoint == []
+
+async def test_certs_without_max_age_are_kept_briefly(monkeypatch, signing_key):
+    _, cert_pem = signing_key
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={KEY_ID: cert_pem})
+
+    monkeypatch.setattr(http_module, "http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    await SecurityService.verify_google_token(id_token(signing_key))
+
+    # No max-age must not mean "cache forever"
+    expires_at, _ = security._google_certs._entries[GOOGLE_CERTS_URL]
+    assert expires_at - time.monotonic() <= 1
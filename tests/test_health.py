@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+import src.services.health as health
+from src.services.health import ReadinessService
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture(autouse=True)
+def fresh_readiness(monkeypatch):
+    monkeypatch.setattr(health, "_cached_result", None)
+
+async def test_liveness_does_no_io(client):
+    response = await client.get("/healthz")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+async def test_ready_when_dependencies_answer(client):
+    response = await client.get("/readyz")
+    body = response.json()
+
+    assert response.status_code == 200
+    assert body["ready"] is True
+    assert set(body["dependencies"]) == {"postgres", "redis"}
+    assert all(dependency["healthy"] for dependency in body["dependencies"].values())
+
+async def test_slow_dependency_fails_readiness(client, monkeypatch, override_settings):
+    override_settings(READINESS_TIMEOUT_SECONDS=0.01)
+
+    async def hang() -> None:
+        await asyncio.sleep(1)
+
+    monkeypatch.setitem(ReadinessService.checks, "redis", hang)
+    response = await client.get("/readyz")
+    body = response.json()
+
+    assert response.status_code == 503
+    assert not body["dependencies"]["redis"]["healthy"]
+    assert body["dependencies"]["redis"]["error"] == "timeout"
+    assert body["dependencies"]["postgres"]["healthy"]
+
+async def test_probe_results_are_cached(monkeypatch, override_settings):
+    override_settings(READINESS_CACHE_SECONDS=60)
+    calls = 0
+
+    async def check() -> None:
+        nonlocal calls
+        calls += 1
+
+    monkeypatch.setattr(ReadinessService, "checks", {"dependency": check})
+    results = await asyncio.gather(*(ReadinessService().check() for _ in range(10)))
+    await ReadinessService().check()
+
+    assert all(result["ready"] for result in results)
+    assert calls == 1
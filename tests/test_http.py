@@ -0,0 +1,31 @@
+import httpx
+import pytest
+
+import src.core.http as http_module
+from src.core.http import close_http_client, get_http_client, init_http_client, shared_client_kwargs
+
+pytestmark = pytest.mark.asyncio
+
+async def test_short_lived_clients_share_the_pool(monkeypatch):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"ok": True})
+
+    await init_http_client()
+    shared = await get_http_client()
+    monkeypatch.setattr(http_module, "http_transport", httpx.MockTransport(handler))
+
+    # What authlib does per call: open a client, use it, close it
+    for _ in range(2):
+        async with httpx.AsyncClient(**shared_client_kwargs()) as client:
+            response = await client.get("https://idp.example.com/userinfo")
+            assert response.json() == {"ok": True}
+
+    assert len(requests) == 2
+    # Closing the short-lived clients left the shared one open
+    assert not shared.is_closed
+    assert await get_http_client() is shared
+    await close_http_client()
+    assert http_module.http_client is None
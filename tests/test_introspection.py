@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+import pytest
+
+from src.services.auth import AuthService
+from src.services.introspection import IntrospectionService
+from src.services.token import token_digest
+
+from conftest import CLIENT
+
+pytestmark = pytest.mark.asyncio
+
+async def introspect(client, *tokens, auth=CLIENT):
+    return await client.post("/auth/introspect", data={"token": list(tokens)}, auth=auth)
+
+@pytest.mark.parametrize("auth", [None, ("resource-server", "wrong"), ("someone", "secret")])
+async def test_unknown_clients_are_rejected(client, seed, login, auth):
+    tokens = await login(seed.alice_id)
+
+    response = await introspect(client, tokens.access_token, auth=auth)
+
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Basic"
+
+async def test_no_configured_clients_rejects_everyone(client, seed, login, override_settings):
+    override_settings(INTROSPECTION_CLIENTS={})
+    tokens = await login(seed.alice_id)
+
+    assert (await introspect(client, tokens.access_token)).status_code == 401
+    assert (await introspect(client, tokens.access_token, auth=None)).status_code == 401
+    assert (await client.get("/auth/revocations")).status_code == 401
+
+async def test_active_token(client, seed, login):
+    tokens = await login(seed.alice_id)
+
+    response = await introspect(client, tokens.access_token)
+    body = response.json()
+
+    assert response.status_code == 200
+    assert body["active"] is True
+    assert body["username"] == "alice@example.com"
+    assert body["user_id"] == seed.alice_id
+
+async def test_refresh_and_garbage_tokens_are_inactive(client, seed, login):
+    tokens = await login(seed.alice_id)
+
+    response = await introspect(client, tokens.refresh_token, "garbage.jwt.token", tokens.access_token)
+
+    assert [result["active"] for result in response.json()] == [False, False, True]
+
+async def test_batch_size_is_limited(client, override_settings):
+    override_settings(INTROSPECTION_MAX_BATCH=2)
+
+    assert (await introspect(client, "a", "b", "c")).status_code == 400
+    assert (await introspect(client)).status_code == 400
+
+async def test_results_are_cached_until_revocation(client, db, redis_client, seed, login):
+    tokens = await login(seed.alice_id)
+    key = f"introspect:{token_digest(tokens.access_token)}"
+
+    await introspect(client, tokens.access_token)
+    assert 0 < await redis_client.ttl(key) <= 30
+
+    await AuthService(db, redis_client).blacklist_token(tokens.access_token)
+    assert json.loads(await redis_client.get(key)) == {"active": False}
+    assert (await introspect(client, tokens.access_token)).json() == {"active": False}
+
+async def test_a_lookup_racing_a_revocation_cannot_cache_the_token_as_active(db, redis_client, seed, login, monkeypatch):
+    tokens = await login(seed.alice_id)
+    service = IntrospectionService(redis_client)
+    release = asyncio.Event()
+    evaluate = service._evaluate
+
+    async def slow_evaluate(token):
+        result = await evaluate(token)
+        await release.wait()
+        return result
+
+    monkeypatch.setattr(service, "_evaluate", slow_evaluate)
+    stale = asyncio.create_task(service.introspect(tokens.access_token))
+    await asyncio.sleep(0.01)
+    await AuthService(db, redis_client).blacklist_token(tokens.access_token)
+    release.set()
+
+    # The lookup answers for the moment it started, but does not cache that
+    assert (await stale)["active"] is True
+    assert await service.introspect(tokens.access_token) == {"active": False}
+
+async def test_a_batch_reads_the_cache_once(redis_client, seed, login, monkeypatch):
+    tokens = [(await login(user_id)).access_token for user_id in (seed.admin_id, seed.alice_id)]
+    service = IntrospectionService(redis_client)
+    await service.introspect(tokens[0])
+
+    reads = []
+    mget = redis_client.mget
+    async def counting_mget(keys, *args):
+        reads.append(keys)
+        return await mget(keys, *args)
+    monkeypatch.setattr(redis_client, "mget", counting_mget)
+
+    results = await service.introspect_many(tokens)
+
+    assert [result["active"] for result in results] == [True, True]
+    assert len([keys for keys in reads if keys[0].startswith("introspect:")]) == 1
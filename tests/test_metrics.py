@@ -0,0 +1,40 @@
+import pytest
+from prometheus_client import REGISTRY
+
+pytestmark = pytest.mark.asyncio
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+@pytest.fixture
+def app(app, override_settings):
+    import main
+
+    # Metrics middleware and route are only mounted when enabled at app creation
+    override_settings(METRICS_ENABLED=True)
+    return main.create_app()
+
+async def test_requests_are_labelled_by_route_template(client, seed, login):
+    tokens = await login(seed.admin_id)
+    labels = {"method": "GET", "route": "/api/users/{user_id}", "status": "200"}
+    before = sample("sso_http_request_duration_seconds_count", **labels)
+
+    for user_id in (seed.alice_id, seed.bob_id):
+        response = await client.get(f"/api/users/{user_id}", headers={"Authorization": f"Bearer {tokens.access_token}"})
+        assert response.status_code == 200
+
+    assert sample("sso_http_request_duration_seconds_count", **labels) == before + 2
+
+async def test_auth_failures_are_counted_by_reason(client):
+    before = sample("sso_auth_failures_total", reason="invalid_token")
+
+    response = await client.get("/auth/me", headers={"Authorization": "Bearer not.a.jwt"})
+
+    assert response.status_code == 401
+    assert sample("sso_auth_failures_total", reason="invalid_token") == before + 1
+
+async def test_scrape_endpoint(client):
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert "sso_http_request_duration_seconds_bucket" in response.text
@@ -0,0 +1,48 @@
+import importlib.util
+import os
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, exc, text
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_migration(name: str):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, "migrations", "versions", f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture
+def users_0006(tmp_path):
+    """A users table as revision 0006 left it: lower(email) indexed, not unique"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR NOT NULL UNIQUE)"))
+        conn.execute(text("CREATE INDEX ix_users_email_lower ON users (lower(email))"))
+    yield engine
+    engine.dispose()
+
+def upgrade(engine, migration) -> None:
+    with engine.connect() as conn:
+        # As on PostgreSQL, where env.py runs each upgrade in a transaction
+        context = MigrationContext.configure(conn, opts={"transactional_ddl": True})
+        with context.begin_transaction(), Operations.context(context):
+            migration.upgrade()
+
+def test_email_case_duplicates_block_the_upgrade(users_0006):
+    with users_0006.begin() as conn:
+        conn.execute(text("INSERT INTO users (email) VALUES ('Alice@example.com'), ('alice@example.com')"))
+
+    with pytest.raises(RuntimeError, match="alice@example.com"):
+        upgrade(users_0006, load_migration("0007_unique_email_lower"))
+
+def test_upgrade_makes_email_unique_regardless_of_case(users_0006):
+    with users_0006.begin() as conn:
+        conn.execute(text("INSERT INTO users (email) VALUES ('alice@example.com')"))
+
+    upgrade(users_0006, load_migration("0007_unique_email_lower"))
+
+    with pytest.raises(exc.IntegrityError), users_0006.begin() as conn:
+        conn.execute(text("INSERT INTO users (email) VALUES ('ALICE@example.com')"))
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import select
+
+from src.auth.jwt import JWTHandler
+from src.auth.oauth import OAuthProvider, oauth_provider
+from src.core.database import get_session
+from src.core.config import OAuthProviderSettings
+from src.models import UserIdentity
+from src.schemas.token import OAuthUserData
+from src.services.auth import AuthService
+from src.utils.helpers import claim_is_true
+
+pytestmark = pytest.mark.asyncio
+
+def provider(**overrides) -> OAuthProviderSettings:
+    return OAuthProviderSettings(**{
+        "name": "acme",
+        "client_id": "acme-client",
+        "client_secret": "acme-secret",
+        "server_metadata_url": "https://idp.acme.example.com/.well-known/openid-configuration",
+        **overrides,
+    })
+
+@pytest.fixture
+def providers(monkeypatch, override_settings):
+    """Configure the acme provider (plus Google) on a fresh registry"""
+    def configure(**overrides) -> None:
+        override_settings(OAUTH_PROVIDERS=[provider(**overrides)])
+        monkeypatch.setattr(oauth_provider, "_configs", {})
+    configure()
+    return configure
+
+def identity(subject: str = "acme-1", email: str = "alice@example.com", verified: bool = True, name: str = "acme"):
+    return OAuthUserData(provider=name, subject=subject, email=email, email_verified=verified)
+
+async def links(db):
+    return (await db.exec(select(UserIdentity))).all()
+
+async def test_registry_reads_providers_lazily(override_settings):
+    registry = OAuthProvider()
+    override_settings(OAUTH_PROVIDERS=[provider()])
+
+    assert registry.names == ["google", "acme"]
+    assert registry.get_config("acme").require_verified_email
+    with pytest.raises(HTTPException) as unknown:
+        registry.get_config("nope")
+    assert unknown.value.status_code == 404
+
+async def test_first_verified_login_links_the_account(db, redis_client, seed, providers):
+    auth = AuthService(db, redis_client)
+
+    user = await auth.get_provider_user(identity())
+    [link] = await links(db)
+
+    assert user.id == seed.alice_id
+    assert (link.user_id, link.provider, link.subject) == (seed.alice_id, "acme", "acme-1")
+
+async def test_linked_account_is_found_by_subject_not_email(db, redis_client, seed, providers):
+    auth = AuthService(db, redis_client)
+    await auth.get_provider_user(identity())
+
+    # The address changed at the provider (even to another user's); the link decides
+    user = await auth.get_provider_user(identity(email="admin@example.com", verified=False))
+
+    assert user.id == seed.alice_id
+
+async def test_unverified_email_cannot_claim_an_account(db, redis_client, seed, providers):
+    auth = AuthService(db, redis_client)
+
+    with pytest.raises(HTTPException) as denied:
+        await auth.get_provider_user(identity(verified=False))
+
+    assert denied.value.status_code == 403
+    assert await links(db) == []
+
+async def test_provider_can_waive_verified_email(db, redis_client, seed, providers):
+    providers(require_verified_email=False)
+
+    user = await AuthService(db, redis_client).get_provider_user(identity(verified=False))
+
+    assert user.id == seed.alice_id
+
+async def test_second_account_at_same_provider_is_rejected(db, redis_client, seed, providers):
+    auth = AuthService(db, redis_client)
+    await auth.get_provider_user(identity(subject="acme-1"))
+
+    with pytest.raises(HTTPException) as denied:
+        await auth.get_provider_user(identity(subject="acme-2"))
+
+    assert denied.value.status_code == 403
+    assert [link.subject for link in await links(db)] == ["acme-1"]
+
+async def test_unregistered_email_is_rejected(db, redis_client, seed, providers):
+    with pytest.raises(HTTPException) as denied:
+        await AuthService(db, redis_client).get_provider_user(identity(email="mallory@example.com"))
+
+    assert denied.value.status_code == 403
+
+async def test_google_requires_verified_email_and_matching_link(db, redis_client, seed, providers):
+    auth = AuthService(db, redis_client)
+
+    with pytest.raises(HTTPException) as unverified:
+        await auth.get_provider_user(identity(name="google", subject="g-1", verified=False))
+    user = await auth.get_provider_user(identity(name="google", subject="g-1"))
+    with pytest.raises(HTTPException) as other_account:
+        await auth.get_provider_user(identity(name="google", subject="g-2"))
+
+    assert unverified.value.status_code == 403
+    assert (user.id, user.google_id) == (seed.alice_id, "g-1")
+    assert other_account.value.status_code == 403
+
+async def test_string_email_verified_claims_are_understood():
+    assert claim_is_true(True) and claim_is_true("true") and claim_is_true("True")
+    assert not any(claim_is_true(value) for value in (False, "false", None, 1, "yes"))
+
+async def test_concurrent_logins_share_the_lookup_but_not_the_session(monkeypatch, redis_client, seed, providers):
+    lookups = 0
+    resolve = AuthService.get_provider_user
+
+    async def counted(self, user_data):
+        nonlocal lookups
+        lookups += 1
+        await asyncio.sleep(0.01)
+        return await resolve(self, user_data)
+
+    monkeypatch.setattr(AuthService, "get_provider_user", counted)
+
+    async def login():
+        async with get_session() as session:
+            return await AuthService(session, redis_client).login(identity())
+
+    responses = await asyncio.gather(*(login() for _ in range(3)))
+
+    assert lookups == 1
+    families = {JWTHandler.decode_token(tokens.refresh_token)["fid"] for tokens in responses}
+    assert len(families) == 3
+    # Every caller can rotate its own refresh token without tripping reuse detection
+    async with get_session() as session:
+        auth = AuthService(session, redis_client)
+        for tokens in responses:
+            await auth.refresh_access_token(tokens.refresh_token)
@@ -0,0 +1,105 @@
+import pytest
+
+from src.auth.dependencies import require_permission
+from src.auth.jwt import JWTHandler
+from src.auth.permissions import (
+    ALL_PERMISSIONS, Permission, compile_permissions, decode_permissions, encode_permissions, permission_names,
+)
+from src.core import query_counter
+from src.core.query_counter import assert_max_queries
+from src.services.revocation import RevocationStreamService
+from src.services.token import AccessTokenService
+
+from conftest import bearer
+
+pytestmark = pytest.mark.asyncio
+
+async def test_permission_names_compile_to_bitsets():
+    mask = compile_permissions(["users:read", "roles:write"])
+
+    assert mask == Permission.USERS_READ | Permission.ROLES_WRITE
+    assert permission_names(mask) == ["users:read", "roles:write"]
+    assert decode_permissions(encode_permissions(mask)) == mask
+    with pytest.raises(ValueError):
+        compile_permissions(["users:delete"])
+
+async def test_malformed_permissions_grant_nothing():
+    assert decode_permissions(None) == 0
+    assert decode_permissions("not-hex") == 0
+
+async def test_tokens_carry_the_union_of_role_permissions(seed, login):
+    admin = JWTHandler.decode_token((await login(seed.admin_id)).access_token)
+    alice = JWTHandler.decode_token((await login(seed.alice_id)).access_token)
+
+    assert decode_permissions(admin["perms"]) == ALL_PERMISSIONS
+    assert decode_permissions(alice["perms"]) == Permission.USERS_READ | Permission.UNITS_READ
+
+async def test_check_needs_no_database_or_redis(engine, monkeypatch, redis_client, seed, login):
+    query_counter.install(engine)
+    token = (await login(seed.admin_id)).access_token
+    check = require_permission(Permission.ROLES_WRITE, Permission.UNITS_WRITE)
+
+    async def no_redis(*args, **kwargs):
+        raise AssertionError(f"Redis command during a permission check: {args}")
+
+    # As TokenBlacklistMiddleware does before the route runs
+    assert not await AccessTokenService(redis_client).is_revoked(token)
+    monkeypatch.setattr(redis_client, "execute_command", no_redis)
+    with assert_max_queries(0):
+        claims = await check(token, redis_client)
+
+    assert claims["user_id"] == seed.admin_id
+
+async def test_missing_permission_is_forbidden(client, seed, login):
+    tokens = await login(seed.alice_id)
+
+    response = await client.post("/api/roles/", json={"name": "auditor"}, headers=bearer(tokens.access_token))
+
+    assert response.status_code == 403
+
+async def test_granted_permission_is_allowed(client, seed, login):
+    tokens = await login(seed.admin_id)
+
+    response = await client.post(
+        "/api/roles/",
+        json={"name": "auditor", "permissions": ["users:read"]},
+        headers=bearer(tokens.access_token)
+    )
+
+    assert response.status_code == 201
+    assert response.json()["permissions"] == ["users:read"]
+
+async def test_refresh_tokens_are_not_access_tokens(client, seed, login):
+    tokens = await login(seed.admin_id)
+
+    response = await client.post("/api/roles/", json={"name": "auditor"}, headers=bearer(tokens.refresh_token))
+
+    assert response.status_code == 401
+
+async def test_deactivated_users_lose_access(client, redis_client, seed, login):
+    tokens = await login(seed.admin_id)
+
+    await RevocationStreamService(redis_client).publish_user(seed.admin_id)
+    response = await client.delete(f"/api/roles/{seed.reader_role_id}", headers=bearer(tokens.access_token))
+
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+
+async def test_user_routes_require_user_permissions(client, seed, login):
+    tokens = await login(seed.alice_id)
+
+    listed = await client.get("/api/users/", headers=bearer(tokens.access_token))
+    updated = await client.put(f"/api/users/{seed.bob_id}", json={"first_name": "Robert"}, headers=bearer(tokens.access_token))
+    anonymous = await client.get("/api/users/")
+
+    assert listed.status_code == 200
+    assert updated.status_code == 403
+    assert anonymous.status_code == 401
+
+async def test_users_may_read_their_own_roles(client, seed, login):
+    tokens = await login(seed.alice_id)
+
+    own = await client.get(f"/api/roles/user/{seed.alice_id}", headers=bearer(tokens.access_token))
+
+    assert own.status_code == 200
+    assert [role["name"] for role in own.json()] == ["reader"]
@@ -0,0 +1,74 @@
+import asyncio
+
+import httpx
+import pytest
+from sqlmodel import select
+
+from src.core import query_counter
+from src.core.query_counter import QueryBudgetExceeded, assert_max_queries, count_queries, normalize
+from src.models import Unit, User
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture(autouse=True)
+def counted(engine):
+    query_counter.install(engine)
+
+async def test_in_lists_of_any_length_normalize_alike():
+    assert normalize("SELECT *\n  FROM roles WHERE id IN (1, 2, 3)") == normalize("SELECT * FROM roles WHERE id IN (4)")
+
+async def test_lazy_loads_are_reported_by_relationship(db, seed):
+    users = (await db.exec(select(User))).all()
+
+    with pytest.raises(QueryBudgetExceeded, match="possible N\\+1 on User.unit: 3"):
+        with assert_max_queries(10, label="unit per user"):
+            # What an unloaded User.unit costs: one SELECT per user
+            for user in users:
+                await db.exec(select(Unit).where(Unit.id == user.unit_id))
+
+async def test_over_budget_fails(db, seed):
+    with pytest.raises(QueryBudgetExceeded, match="at most 1 statements"):
+        with assert_max_queries(1):
+            await db.exec(select(User))
+            await db.exec(select(Unit))
+
+async def test_concurrent_scopes_count_separately(db, seed, engine):
+    async def scope(statements: int) -> int:
+        async with engine.connect() as conn:
+            with count_queries() as stats:
+                for _ in range(statements):
+                    await conn.exec_driver_sql("SELECT 1")
+                    await asyncio.sleep(0)
+        return stats.count
+
+    assert await asyncio.gather(scope(2), scope(5)) == [2, 5]
+
+@pytest.mark.parametrize("path, budget", [
+    ("/auth/me", 2),
+    ("/api/users/", 3),
+    ("/api/users/2", 2),
+])
+async def test_route_query_budgets(client, seed, login, path, budget):
+    tokens = await login(seed.admin_id)
+
+    with assert_max_queries(budget, label=f"GET {path}") as stats:
+        response = await client.get(path, headers={"Authorization": f"Bearer {tokens.access_token}"})
+
+    assert response.status_code == 200
+    assert stats.count > 0
+
+async def test_middleware_reports_the_count(app, override_settings, seed, login):
+    import main
+
+    # The middleware is only mounted when enabled at app creation
+    override_settings(QUERY_COUNT_ENABLED=True)
+    app = main.create_app()
+    tokens = await login(seed.admin_id)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/api/users/", headers={"Authorization": f"Bearer {tokens.access_token}"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Query-Count"] == "3"
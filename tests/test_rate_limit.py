@@ -0,0 +1,52 @@
+import pytest
+from fastapi import HTTPException
+
+from src.services.rate_limit import RateLimitService
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def limiter(redis_client, override_settings):
+    override_settings(RATE_LIMIT_ENABLED=True, RATE_LIMIT_WINDOW_SECONDS=60)
+    return RateLimitService(redis_client)
+
+async def test_rejects_requests_over_the_limit_with_retry_after(limiter, clock):
+    for _ in range(3):
+        await limiter.hit("login", {"ip:1.2.3.4": 3})
+        clock.advance(10)
+
+    with pytest.raises(HTTPException) as limited:
+        await limiter.hit("login", {"ip:1.2.3.4": 3})
+
+    assert limited.value.status_code == 429
+    # The oldest hit (30s ago) leaves the 60s window in 30s
+    assert limited.value.headers["Retry-After"] == "30"
+
+async def test_window_slides(limiter, clock):
+    for _ in range(3):
+        await limiter.hit("login", {"ip:1.2.3.4": 3})
+    clock.advance(61)
+
+    await limiter.hit("login", {"ip:1.2.3.4": 3})
+
+async def test_subjects_are_checked_together_and_recorded_only_on_success(limiter, redis_client, clock):
+    await limiter.hit("callback", {"id:alice": 1})
+
+    # The identity is exhausted, so the IP must not be charged for the rejected attempt
+    with pytest.raises(HTTPException):
+        await limiter.hit("callback", {"ip:1.2.3.4": 5, "id:alice": 1})
+
+    assert await redis_client.zcard("ratelimit:callback:ip:1.2.3.4") == 0
+    assert await redis_client.zcard("ratelimit:callback:id:alice") == 1
+
+async def test_scopes_and_subjects_are_independent(limiter, clock):
+    await limiter.hit("login", {"ip:1.2.3.4": 1})
+    await limiter.hit("refresh", {"ip:1.2.3.4": 1})
+    await limiter.hit("login", {"ip:5.6.7.8": 1})
+
+async def test_disabled_limiter_records_nothing(limiter, redis_client, override_settings):
+    override_settings(RATE_LIMIT_ENABLED=False)
+    for _ in range(5):
+        await limiter.hit("login", {"ip:1.2.3.4": 1})
+
+    assert await redis_client.keys("ratelimit:*") == []
@@ -0,0 +1,90 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import insert
+
+from src.core.cache import caches
+from src.models import Role, Unit
+from src.schemas.role import RoleCreate, RoleUpdate
+from src.schemas.unit import UnitCreate, UnitUpdate
+from src.services.reference_data import reference_data
+from src.services.role import RoleService
+from src.services.unit import UnitService
+
+pytestmark = pytest.mark.asyncio
+
+@pytest_asyncio.fixture
+async def stale(engine, seed, redis_client):
+    """A snapshot taken before another worker added the "auditor" role and the "AU" unit"""
+    await reference_data.get()
+    now = datetime.now(timezone.utc)
+    async with engine.begin() as conn:
+        await conn.execute(insert(Role), [{"id": 3, "name": "auditor", "permissions": 0, "created_at": now, "updated_at": now}])
+        await conn.execute(insert(Unit), [{"id": 3, "name": "Audit", "code": "AU", "parent_id": None, "path": "/3/", "created_at": now, "updated_at": now}])
+
+async def test_duplicate_role_names_missed_by_the_snapshot_are_rejected(db, stale, seed):
+    service = RoleService(db)
+
+    with pytest.raises(HTTPException) as created:
+        await service.create_role(RoleCreate(name="auditor"))
+    with pytest.raises(HTTPException) as renamed:
+        await service.update_role(seed.reader_role_id, RoleUpdate(name="auditor"))
+
+    assert created.value.status_code == renamed.value.status_code == 400
+    # The session is still usable after the rollback
+    assert (await service.create_role(RoleCreate(name="viewer"))).name == "viewer"
+
+async def test_duplicate_unit_codes_missed_by_the_snapshot_are_rejected(db, stale, seed):
+    service = UnitService(db)
+
+    with pytest.raises(HTTPException) as created:
+        await service.create_unit(UnitCreate(name="Audit Two", code="AU"))
+    with pytest.raises(HTTPException) as recoded:
+        await service.update_unit(seed.branch_id, UnitUpdate(code="AU"))
+
+    assert created.value.status_code == recoded.value.status_code == 400
+
+async def test_readers_keep_the_old_snapshot_until_the_rebuild_is_done(monkeypatch, seed, redis_client):
+    old = await reference_data.get()
+    release = asyncio.Event()
+    load = reference_data._load
+
+    async def slow_load():
+        await release.wait()
+        return await load()
+
+    monkeypatch.setattr(reference_data, "_load", slow_load)
+    await asyncio.wait_for(caches.invalidate("roles"), timeout=1)
+    # Served without waiting for the database
+    assert await asyncio.wait_for(reference_data.get(), timeout=1) is old
+
+    release.set()
+    await reference_data._rebuild
+    new = await reference_data.get()
+    assert new is not old and new.version > old.version
+
+async def test_unknown_ids_reload_at_most_once_per_interval(monkeypatch, override_settings, seed):
+    override_settings(REFERENCE_DATA_MIN_RELOAD_SECONDS=60)
+    await reference_data.get()
+    loads = 0
+    load = reference_data._load
+
+    async def counting_load():
+        nonlocal loads
+        loads += 1
+        return await load()
+
+    monkeypatch.setattr(reference_data, "_load", counting_load)
+    for role_id in range(100, 110):
+        with pytest.raises(HTTPException) as unknown:
+            await reference_data.require_roles([role_id])
+        assert unknown.value.status_code == 400
+
+    assert loads == 0
+    override_settings(REFERENCE_DATA_MIN_RELOAD_SECONDS=0)
+    with pytest.raises(HTTPException):
+        await reference_data.require_roles([100])
+    assert loads == 1
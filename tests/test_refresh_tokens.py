@@ -0,0 +1,135 @@
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from src.auth.jwt import JWTHandler
+from src.models import User
+from src.services.auth import AuthService
+from src.services.token import RefreshTokenFamilyService
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def families(redis_client):
+    return RefreshTokenFamilyService(redis_client)
+
+def claims(token: str) -> dict:
+    return JWTHandler.decode_token(token)
+
+async def test_rotate_swaps_the_current_token(families):
+    family_id, jti = await families.create_family(7)
+    new_jti = families.new_id()
+
+    assert await families.rotate(family_id, 7, jti, new_jti) == families.ROTATED
+    assert await families.rotate(family_id, 7, new_jti, families.new_id()) == families.ROTATED
+
+async def test_reusing_an_old_token_revokes_the_family(families, redis_client):
+    family_id, jti = await families.create_family(7)
+    new_jti = families.new_id()
+    await families.rotate(family_id, 7, jti, new_jti)
+
+    assert await families.rotate(family_id, 7, jti, families.new_id()) == families.REUSED
+    # The legitimate holder is signed out too, and the session is gone
+    assert await families.rotate(family_id, 7, new_jti, families.new_id()) == families.REVOKED
+    assert await redis_client.zscore("sessions:user:7", family_id) is None
+
+async def test_unknown_and_revoked_families(families):
+    family_id, jti = await families.create_family(7)
+    await families.revoke_family(family_id)
+
+    assert await families.rotate("missing", 7, jti, families.new_id()) == families.UNKNOWN
+    assert await families.rotate(family_id, 7, jti, families.new_id()) == families.REVOKED
+
+async def test_refresh_rotates_and_rejects_replay(db, redis_client, seed, login):
+    tokens = await login(seed.alice_id)
+    auth = AuthService(db, redis_client)
+
+    refreshed = await auth.refresh_access_token(tokens.refresh_token)
+    assert claims(refreshed.refresh_token)["fid"] == claims(tokens.refresh_token)["fid"]
+
+    with pytest.raises(HTTPException) as replay:
+        await auth.refresh_access_token(tokens.refresh_token)
+    assert "reuse" in replay.value.detail
+    with pytest.raises(HTTPException):
+        await auth.refresh_access_token(refreshed.refresh_token)
+
+async def test_refresh_for_inactive_user_does_not_touch_the_session(db, redis_client, seed, login):
+    tokens = await login(seed.alice_id)
+    family_id = claims(tokens.refresh_token)["fid"]
+    state = await redis_client.hgetall(f"refresh:family:{family_id}")
+    score = await redis_client.zscore(f"sessions:user:{seed.alice_id}", family_id)
+
+    alice = await db.get(User, seed.alice_id)
+    alice.is_active = False
+    await db.commit()
+    with pytest.raises(HTTPException) as inactive:
+        await AuthService(db, redis_client).refresh_access_token(tokens.refresh_token)
+
+    assert inactive.value.status_code == 401
+    assert await redis_client.hgetall(f"refresh:family:{family_id}") == state
+    assert await redis_client.zscore(f"sessions:user:{seed.alice_id}", family_id) == score
+
+    # Reactivated, the same token still works: it was never burned
+    alice.is_active = True
+    await db.commit()
+    await AuthService(db, redis_client).refresh_access_token(tokens.refresh_token)
+
+async def test_access_token_is_not_a_refresh_token(db, redis_client, seed, login):
+    tokens = await login(seed.alice_id)
+
+    with pytest.raises(HTTPException) as wrong_type:
+        await AuthService(db, redis_client).refresh_access_token(tokens.access_token)
+
+    assert wrong_type.value.detail == "Invalid token type"
+
+async def test_revoking_a_family_removes_its_owners_session(families, redis_client):
+    family_id, _ = await families.create_family(7)
+
+    assert await families.revoke_family(family_id)
+
+    assert await redis_client.zcard("sessions:user:7") == 0
+    assert await redis_client.hget(f"refresh:family:{family_id}", "revoked") == "1"
+    assert not await families.revoke_family("missing")
+
+async def test_revoking_a_token_without_user_id_finds_the_owner(db, redis_client, families, seed):
+    family_id, jti = await families.create_family(seed.alice_id)
+    token = JWTHandler.create_token(
+        {"sub": "alice@example.com", "token_type": "refresh", "fid": family_id, "jti": jti},
+        timedelta(minutes=5)
+    )
+
+    await AuthService(db, redis_client).revoke_refresh_token(token)
+
+    assert await families.list_sessions(seed.alice_id) == []
+    assert await redis_client.keys("sessions:user:None") == []
+
+async def test_listing_prunes_expired_sessions(families, redis_client):
+    live, _ = await families.create_family(7, {"ip": "10.0.0.1", "user_agent": ""})
+    await redis_client.zadd("sessions:user:7", {"expired": time.time() - 1})
+
+    sessions = await families.list_sessions(7)
+
+    assert [session["id"] for session in sessions] == [live]
+    assert sessions[0]["ip"] == "10.0.0.1" and "user_agent" not in sessions[0]
+    assert await redis_client.zscore("sessions:user:7", "expired") is None
+
+async def test_revoke_all_sessions(families):
+    for _ in range(3):
+        await families.create_family(7)
+    other, _ = await families.create_family(8)
+
+    assert await families.revoke_all_sessions(7) == 3
+    assert await families.list_sessions(7) == []
+    assert await families.is_session_of(other, 8)
+
+async def test_users_cannot_revoke_each_others_sessions(db, redis_client, families, seed):
+    family_id, _ = await families.create_family(seed.admin_id)
+    alice = await db.get(User, seed.alice_id)
+
+    with pytest.raises(HTTPException) as not_found:
+        await AuthService(db, redis_client).revoke_session(alice, family_id)
+
+    assert not_found.value.status_code == 404
+    assert await families.is_session_of(family_id, seed.admin_id)
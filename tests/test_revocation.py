@@ -0,0 +1,127 @@
+import pytest
+from jose import jwt
+
+from src.auth.jwt import JWTHandler
+from src.services.auth import AuthService
+from src.services.introspection import IntrospectionService
+from src.services.revocation import RevocationStreamService
+from src.services.token import token_digest
+
+from conftest import CLIENT, bearer
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def revocations(redis_client):
+    return RevocationStreamService(redis_client)
+
+async def test_watermark_revokes_tokens_issued_until_then(client, redis_client, revocations, seed, login):
+    tokens = await login(seed.alice_id)
+    iat = JWTHandler.decode_token(tokens.access_token)["iat"]
+
+    await revocations.publish_user(seed.alice_id)
+    assert (await client.get("/auth/me", headers=bearer(tokens.access_token))).status_code == 401
+
+    # A token issued after the watermark is fine
+    await redis_client.set(f"revocations:user:{seed.alice_id}", iat - 1)
+    assert (await client.get("/auth/me", headers=bearer(tokens.access_token))).status_code == 200
+
+async def test_middleware_rejects_watermarked_tokens(client, revocations, seed, login):
+    tokens = await login(seed.alice_id)
+
+    await revocations.publish_user(seed.alice_id)
+    # Refused before any route dependency runs
+    response = await client.get("/api/users/", headers=bearer(tokens.access_token))
+
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+
+@pytest.mark.parametrize("path", ["/auth/me", "/api/users/2"])
+async def test_revocation_is_read_once_per_request(client, redis_client, monkeypatch, seed, login, path):
+    tokens = await login(seed.admin_id)
+    commands = []
+    execute = redis_client.execute_command
+
+    async def recording(*args, **kwargs):
+        commands.append(args)
+        return await execute(*args, **kwargs)
+
+    monkeypatch.setattr(redis_client, "execute_command", recording)
+    response = await client.get(path, headers=bearer(tokens.access_token))
+
+    assert response.status_code == 200
+    # Blacklist and watermark together, and nothing else reads them again
+    reads = [args for args in commands if any(str(arg).startswith(("revocations:user:", "blacklist:")) for arg in args)]
+    assert [args[0] for args in reads] == ["MGET"]
+
+async def test_malformed_claims_are_unauthorized_not_errors(client, revocations, seed):
+    await revocations.publish_user(seed.alice_id)
+    forged = jwt.encode({"user_id": seed.alice_id, "iat": "yesterday"}, "not-the-key", algorithm="HS256")
+
+    response = await client.get("/auth/me", headers=bearer(forged))
+
+    assert response.status_code == 401
+
+async def test_watermark_applies_to_reference_tokens(client, revocations, seed, login, override_settings):
+    override_settings(ACCESS_TOKEN_FORMAT="reference")
+    tokens = await login(seed.alice_id)
+
+    await revocations.publish_user(seed.alice_id)
+
+    assert (await client.get("/auth/me", headers=bearer(tokens.access_token))).status_code == 401
+
+async def test_cached_introspection_respects_watermarks(redis_client, revocations, seed, login):
+    tokens = await login(seed.alice_id)
+    service = IntrospectionService(redis_client)
+    assert (await service.introspect(tokens.access_token))["active"]
+
+    await revocations.publish_user(seed.alice_id)
+
+    assert await redis_client.exists(f"introspect:{token_digest(tokens.access_token)}")
+    assert await service.introspect(tokens.access_token) == {"active": False}
+
+async def test_deactivation_publishes_a_watermark(client, revocations, seed, login):
+    admin = await login(seed.admin_id)
+    alice = await login(seed.alice_id)
+
+    response = await client.put(f"/api/users/{seed.alice_id}", json={"is_active": False}, headers=bearer(admin.access_token))
+
+    assert response.status_code == 200
+    assert seed.alice_id in await revocations.user_watermarks([seed.alice_id, seed.admin_id])
+    assert (await client.get("/auth/me", headers=bearer(alice.access_token))).status_code == 401
+
+async def test_feed_resumes_from_a_cursor(client, db, redis_client, revocations, seed, login):
+    tokens = await login(seed.alice_id)
+    start = (await client.get("/auth/revocations", auth=CLIENT)).json()
+    assert start["events"] == []
+
+    await AuthService(db, redis_client).blacklist_token(tokens.access_token)
+    await revocations.publish_user(seed.bob_id)
+    feed = (await client.get("/auth/revocations", params={"cursor": start["cursor"]}, auth=CLIENT)).json()
+
+    assert [event["type"] for event in feed["events"]] == ["token", "user"]
+    assert feed["events"][0]["digest"] == token_digest(tokens.access_token)
+    assert feed["events"][1]["user_id"] == seed.bob_id
+    assert not feed["reset"]
+    again = (await client.get("/auth/revocations", params={"cursor": feed["cursor"]}, auth=CLIENT)).json()
+    assert again["events"] == []
+
+async def test_trimmed_feed_asks_for_a_reset(redis_client, revocations):
+    await revocations.publish_user(1)
+    cursor = await revocations.latest_cursor()
+    for user_id in range(2, 6):
+        await revocations.publish_user(user_id)
+    await redis_client.xtrim("revocations:stream", maxlen=2, approximate=False)
+
+    assert await revocations.has_gap(cursor)
+    assert not await revocations.has_gap(await revocations.latest_cursor())
+
+async def test_logout_publishes_only_live_access_tokens(client, redis_client, seed, login):
+    forged = jwt.encode({"user_id": seed.alice_id}, "not-the-key", algorithm="HS256")
+    refresh = (await login(seed.alice_id)).refresh_token
+
+    for presented in ("random-garbage", forged, refresh):
+        assert (await client.post("/auth/logout", headers=bearer(presented))).status_code == 401
+
+    assert await redis_client.xlen("revocations:stream") == 0
+    assert await redis_client.keys("blacklist:*") == []
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from src.utils.singleflight import SingleFlight
+
+pytestmark = pytest.mark.asyncio
+
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def work() -> int:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return calls
+
+    waiters = [asyncio.create_task(flight.do("key", work)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert flight.in_flight() == 1
+    release.set()
+
+    assert await asyncio.gather(*waiters) == [1] * 5
+    assert calls == 1
+    assert flight.in_flight() == 0
+
+async def test_distinct_keys_run_separately():
+    flight = SingleFlight()
+
+    async def work(value: str) -> str:
+        await asyncio.sleep(0)
+        return value
+
+    assert await asyncio.gather(flight.do("a", lambda: work("a")), flight.do("b", lambda: work("b"))) == ["a", "b"]
+
+async def test_followers_receive_the_leaders_exception():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def fail() -> None:
+        await release.wait()
+        raise ValueError("boom")
+
+    waiters = [asyncio.create_task(flight.do("key", fail)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    # Finished calls are forgotten, so the next call runs again
+    assert flight.in_flight() == 0
+
+async def test_cancelled_follower_does_not_cancel_the_leader():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work() -> str:
+        await release.wait()
+        return "done"
+
+    leader = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    follower.cancel()
+    release.set()
+
+    assert await leader == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await follower
+
+async def test_followers_take_over_from_a_cancelled_leader():
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def work() -> int:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return calls
+
+    leader = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    followers = [asyncio.create_task(flight.do("key", work)) for _ in range(3)]
+    await asyncio.sleep(0)
+    leader.cancel()
+    # Let the cancellation reach every follower before the work can finish
+    for _ in range(5):
+        await asyncio.sleep(0)
+    release.set()
+
+    # One follower re-ran the work and the others shared its result
+    assert await asyncio.gather(*followers) == [2] * 3
+    assert calls == 2
+    with pytest.raises(asyncio.CancelledError):
+        await leader
@@ -0,0 +1,55 @@
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import UniqueConstraint
+from sqlmodel import SQLModel
+
+import src.models  # noqa: F401 - registers all tables on SQLModel.metadata
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_python(code: str, **env) -> subprocess.CompletedProcess:
+    """Run code in a fresh interpreter with only the given environment"""
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        env={"PATH": os.environ.get("PATH", ""), **env},
+        capture_output=True,
+        text=True,
+    )
+
+def test_importing_the_service_has_no_side_effects():
+    # No settings in the environment: anything that reads them at import fails
+    result = run_python(
+        "import src.api.auth, src.api.user, src.services.auth\n"
+        "import src.core.database as database, src.core.redis as redis, src.core.config as config\n"
+        "assert database._engine is None and redis.redis_client is None\n"
+        "assert config.get_settings.cache_info().currsize == 0\n"
+    )
+    assert result.returncode == 0, result.stderr
+
+@pytest.fixture(scope="module")
+def migration_sql() -> str:
+    """The whole migration chain rendered as PostgreSQL DDL (offline, no database)"""
+    result = subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head", "--sql"],
+        cwd=ROOT,
+        env={**os.environ, "DATABASE_URL": "postgresql+asyncpg://sso@localhost/sso"},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+def test_migrations_create_every_table_and_index_of_the_models(migration_sql):
+    for table in SQLModel.metadata.sorted_tables:
+        assert f"CREATE TABLE {table.name} (" in migration_sql
+        for index in table.indexes:
+            create = "CREATE UNIQUE INDEX" if index.unique else "CREATE INDEX"
+            assert re.search(rf"{create} (CONCURRENTLY )?{index.name} ", migration_sql), f"no migration creates {index.name}"
+        for constraint in table.constraints:
+            if isinstance(constraint, UniqueConstraint) and constraint.name:
+                assert constraint.name in migration_sql, f"no migration creates {constraint.name}"
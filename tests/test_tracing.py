@@ -0,0 +1,46 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+
+pytest.importorskip("opentelemetry.sdk")
+from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+from opentelemetry.instrumentation.redis import RedisInstrumentor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+import src.core.tracing as tracing
+from src.core.database import close_db, get_engine
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def exporter():
+    return InMemorySpanExporter()
+
+@pytest_asyncio.fixture
+async def app(app, monkeypatch, override_settings, exporter):
+    import main
+
+    # Would sample nearly nothing if it applied to an injected exporter
+    override_settings(TRACING_SAMPLE_RATIO=0.0)
+    monkeypatch.setattr(tracing, "_tracer", None)
+    monkeypatch.setattr(tracing, "_tracer_provider", None)
+    yield main.create_app(span_exporter=exporter)
+    RedisInstrumentor().uninstrument()
+    HTTPXClientInstrumentor().uninstrument()
+
+async def test_every_request_is_traced(client, exporter):
+    for _ in range(5):
+        await client.get("/healthz")
+
+    traces = {span.context.trace_id for span in exporter.get_finished_spans()}
+    assert len(traces) == 5
+
+async def test_every_rebuilt_engine_is_traced(app, exporter):
+    for _ in range(2):
+        # Same as a restart of the lifespan: the next use builds a new engine
+        await close_db()
+        exporter.clear()
+        async with get_engine().connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+        assert [span.name.split()[0] for span in exporter.get_finished_spans()] == ["SELECT"]
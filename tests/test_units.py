@@ -0,0 +1,76 @@
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import insert
+
+from src.models import Unit
+from src.models.unit import ancestor_ids, build_path
+from src.repositories.unit import UnitRepository
+from src.schemas.unit import UnitUpdate
+from src.services.reference_data import reference_data
+from src.services.unit import UnitService
+
+pytestmark = pytest.mark.asyncio
+
+@pytest_asyncio.fixture
+async def tree(engine, seed):
+    """/1/ -> /1/2/ -> /1/2/3/ from the seed plus a sibling root /10/ -> /10/11/
+
+    "/10/" starts with "/1" but is not below "/1/".
+    """
+    now = datetime.now(timezone.utc)
+    async with engine.begin() as conn:
+        await conn.execute(insert(Unit), [
+            {"id": 3, "name": "Desk", "code": "DK", "parent_id": 2, "path": "/1/2/3/", "created_at": now, "updated_at": now},
+            {"id": 10, "name": "Other", "code": "OT", "parent_id": None, "path": "/10/", "created_at": now, "updated_at": now},
+            {"id": 11, "name": "Other Branch", "code": "OB", "parent_id": 10, "path": "/10/11/", "created_at": now, "updated_at": now},
+        ])
+
+async def test_paths():
+    assert build_path(4) == "/4/"
+    assert build_path(9, "/1/4/") == "/1/4/9/"
+    assert ancestor_ids("/1/4/9/") == [1, 4, 9]
+
+async def test_subtree_is_a_prefix_range_not_a_string_prefix(db, tree):
+    repository = UnitRepository(db)
+
+    assert sorted(await repository.get_subtree_ids("/1/")) == [1, 2, 3]
+    assert sorted(await repository.get_subtree_ids("/1/2/")) == [2, 3]
+    assert sorted(await repository.get_subtree_ids("/10/")) == [10, 11]
+    assert [unit.path for unit in await repository.get_subtree("/1/")] == ["/1/", "/1/2/", "/1/2/3/"]
+
+async def test_moving_a_unit_rewrites_its_whole_subtree(db, tree):
+    await UnitService(db).update_unit(2, UnitUpdate(parent_id=11))
+    db.expunge_all()
+
+    repository = UnitRepository(db)
+    assert (await repository.get_by_id(2)).path == "/10/11/2/"
+    assert (await repository.get_by_id(3)).path == "/10/11/2/3/"
+    assert sorted(await repository.get_subtree_ids("/1/")) == [1]
+    assert sorted(await repository.get_subtree_ids("/10/")) == [2, 3, 10, 11]
+
+async def test_cached_subtrees_follow_moves(db, tree, redis_client):
+    service = UnitService(db)
+    assert sorted(await service.get_subtree_ids(10)) == [10, 11]
+
+    await service.update_unit(2, UnitUpdate(parent_id=10))
+    # Rebuilt in the background; wait for the new snapshot
+    await reference_data.reload()
+
+    assert sorted(await service.get_subtree_ids(10)) == [2, 3, 10, 11]
+    assert await service.get_subtree_ids(1) == [1]
+
+async def test_a_unit_cannot_move_below_itself(db, tree):
+    with pytest.raises(HTTPException) as cycle:
+        await UnitService(db).update_unit(1, UnitUpdate(parent_id=3))
+
+    assert cycle.value.status_code == 400
+
+async def test_unit_users_include_descendants(db, seed):
+    users = await UnitService(db).get_unit_users(seed.hq_id)
+    direct = await UnitService(db).get_unit_users(seed.hq_id, recursive=False)
+
+    assert sorted(user.id for user in users) == [seed.admin_id, seed.alice_id, seed.bob_id]
+    assert [user.id for user in direct] == [seed.admin_id]
@@ -0,0 +1,112 @@
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import event, insert
+
+from src.core import query_counter
+from src.core.query_counter import assert_max_queries, count_queries
+from src.models import User, UserRole
+from src.repositories.user import UserRepository
+from src.schemas.user import UserCreate, UserResponse, UserUpdate
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture(autouse=True)
+def counted(engine):
+    query_counter.install(engine)
+
+@pytest_asyncio.fixture
+async def foreign_keys(engine):
+    """SQLite checks foreign keys only when each connection turns them on"""
+    def enable(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    event.listen(engine.sync_engine, "connect", enable)
+    await engine.dispose()
+    yield
+    event.remove(engine.sync_engine, "connect", enable)
+
+async def add_users(engine, count: int, start: int = 100) -> None:
+    now = datetime.now(timezone.utc)
+    users = [
+        {"id": i, "email": f"user{i}@example.com", "first_name": "User", "is_active": True, "is_superuser": False, "unit_id": 1 + i % 2, "created_at": now, "updated_at": now}
+        for i in range(start, start + count)
+    ]
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), users)
+        await conn.execute(insert(UserRole), [{"user_id": user["id"], "role_id": 1 + user["id"] % 2} for user in users])
+
+@pytest.mark.parametrize("loader, budget", [("list", 3), ("detail", 2)])
+async def test_user_listing_costs_the_same_for_any_directory_size(db, engine, seed, loader, budget):
+    for size in (10, 100):
+        await add_users(engine, size, start=100 * size)
+        db.expunge_all()
+
+        with assert_max_queries(budget, label=f"get_all({loader}) of {size}"):
+            users = await UserRepository(db).get_all(loader=loader)
+            # Serialising touches roles and unit: nothing may load lazily
+            responses = [UserResponse.model_validate(user, from_attributes=True) for user in users]
+
+        assert all(response.unit is not None for response in responses)
+
+@pytest.mark.parametrize("loader", ["detail", "auth"])
+async def test_single_user_is_loaded_with_roles_and_unit(db, seed, loader):
+    with assert_max_queries(2):
+        user = await UserRepository(db).get_by_id(seed.alice_id, loader=loader)
+        response = UserResponse.model_validate(user, from_attributes=True)
+
+    assert response.unit.code == "BR"
+    assert [role.name for role in response.roles] == ["reader"]
+
+async def test_lookup_by_email_honours_the_loader(db, seed):
+    with assert_max_queries(2):
+        user = await UserRepository(db).get_by_email("Alice@Example.com", loader="auth")
+        assert user.unit.code == "BR" and [role.name for role in user.roles] == ["reader"]
+
+async def test_emails_differing_only_in_case_are_rejected(db, seed):
+    repository = UserRepository(db)
+
+    with pytest.raises(HTTPException) as conflict:
+        await repository.update(seed.alice_id, UserUpdate(email="ADMIN@example.com"))
+
+    assert conflict.value.status_code == 400
+    # Lookups stay unambiguous
+    assert (await repository.get_by_email("admin@EXAMPLE.com")).id == seed.admin_id
+
+async def test_create_links_roles_without_deleting_first(db, seed):
+    carol = UserCreate(email="carol@example.com", first_name="Carol", roles=[seed.admin_role_id, seed.reader_role_id])
+
+    with count_queries() as stats:
+        created = await UserRepository(db).create(carol)
+
+    assert sorted(role.name for role in created.roles) == ["admin", "reader"]
+    assert not [statement for statement in stats.statements if statement.startswith("DELETE")]
+
+async def test_a_failed_create_leaves_nothing_behind(db, seed, foreign_keys):
+    repository = UserRepository(db)
+    carol = UserCreate(email="carol@example.com", first_name="Carol", unit_id=seed.branch_id, roles=[seed.reader_role_id, 99])
+
+    with pytest.raises(HTTPException) as conflict:
+        await repository.create(carol)
+
+    assert conflict.value.status_code == 400
+    assert await repository.get_by_email("carol@example.com") is None
+    # The session is usable again and the email is still free
+    created = await repository.create(carol.model_copy(update={"roles": [seed.reader_role_id]}))
+    assert [role.name for role in created.roles] == ["reader"]
+
+async def test_a_failed_role_replace_keeps_the_old_roles_and_fields(db, seed, foreign_keys):
+    repository = UserRepository(db)
+
+    with pytest.raises(HTTPException) as conflict:
+        await repository.update(seed.alice_id, UserUpdate(first_name="Alicia", roles=[seed.admin_role_id, 99]))
+
+    assert conflict.value.status_code == 400
+    db.expunge_all()
+    alice = await repository.get_by_id(seed.alice_id)
+    assert alice.first_name == "Alice"
+    assert [role.name for role in alice.roles] == ["reader"]
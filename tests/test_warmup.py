@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+import src.core.warmup as warmup
+from src.services.reference_data import reference_data
+
+pytestmark = pytest.mark.asyncio
+
+async def test_failing_steps_are_skipped(monkeypatch, override_settings, redis_client, seed):
+    override_settings(WARMUP_STEP_TIMEOUT_SECONDS=0.05)
+
+    async def unreachable() -> None:
+        raise ConnectionError("no route to the identity provider")
+
+    async def hang() -> None:
+        await asyncio.sleep(1)
+
+    monkeypatch.setitem(warmup.WARMUP_STEPS, "oidc_metadata", unreachable)
+    monkeypatch.setitem(warmup.WARMUP_STEPS, "slow", hang)
+
+    timings = await warmup.warm_up()
+
+    assert set(timings) == set(warmup.WARMUP_STEPS)
+    assert timings["slow"] < 0.5
+    # Steps after a failure still ran
+    assert reference_data._snapshot is not None
+    assert set(reference_data._snapshot.roles) == {seed.admin_role_id, seed.reader_role_id}